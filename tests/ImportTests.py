@@ -15,14 +15,27 @@ __version__ = "V0.07"
 import unittest
 
 # pylint: disable=unused-import
+import wwpdb.utils.ws_utils.ServiceAdmissionControl
+import wwpdb.utils.ws_utils.ServiceConfigCache
 import wwpdb.utils.ws_utils.ServiceDataStore
 import wwpdb.utils.ws_utils.ServiceHistory
+import wwpdb.utils.ws_utils.ServiceJobManager
+import wwpdb.utils.ws_utils.ServiceJson
 import wwpdb.utils.ws_utils.ServiceLockFile
+import wwpdb.utils.ws_utils.ServiceLockMetrics
+import wwpdb.utils.ws_utils.ServiceProfiler
 import wwpdb.utils.ws_utils.ServiceRequest
 import wwpdb.utils.ws_utils.ServiceResponse
+import wwpdb.utils.ws_utils.ServiceResultCache
+import wwpdb.utils.ws_utils.ServiceRouter
 import wwpdb.utils.ws_utils.ServiceSessionFactory
+import wwpdb.utils.ws_utils.ServiceSessionIndex
+import wwpdb.utils.ws_utils.ServiceSessionPool
 import wwpdb.utils.ws_utils.ServiceSessionState
+import wwpdb.utils.ws_utils.ServiceSessionSweeper
+import wwpdb.utils.ws_utils.ServiceSessionUsage
 import wwpdb.utils.ws_utils.ServiceSmtpUtils
+import wwpdb.utils.ws_utils.ServiceTimingMetrics
 import wwpdb.utils.ws_utils.ServiceUploadUtils
 import wwpdb.utils.ws_utils.ServiceUtilsMisc
 import wwpdb.utils.ws_utils.ServiceWorkerBase
@@ -35,3 +48,22 @@ class ImportTests(unittest.TestCase):
 
     def testPass(self):
         pass
+
+    def testModules(self):
+        """Test the modules added to the package are importable"""
+        for mod in (
+            wwpdb.utils.ws_utils.ServiceAdmissionControl,
+            wwpdb.utils.ws_utils.ServiceConfigCache,
+            wwpdb.utils.ws_utils.ServiceJobManager,
+            wwpdb.utils.ws_utils.ServiceJson,
+            wwpdb.utils.ws_utils.ServiceLockMetrics,
+            wwpdb.utils.ws_utils.ServiceProfiler,
+            wwpdb.utils.ws_utils.ServiceResultCache,
+            wwpdb.utils.ws_utils.ServiceRouter,
+            wwpdb.utils.ws_utils.ServiceSessionIndex,
+            wwpdb.utils.ws_utils.ServiceSessionPool,
+            wwpdb.utils.ws_utils.ServiceSessionSweeper,
+            wwpdb.utils.ws_utils.ServiceSessionUsage,
+            wwpdb.utils.ws_utils.ServiceTimingMetrics,
+        ):
+            self.assertEqual(mod.__version__, "V0.07")
@@ -0,0 +1,188 @@
+##
+# File: ServiceAdmissionControlTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceAdmissionControl per-user request limits --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import concurrent.futures
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceAdmissionControl import ServiceAdmissionControl
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+from wwpdb.utils.ws_utils.ServiceWorkerBase import ServiceWorkerBase
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+_HOLD_SLOT = """
+import fcntl, os, sys, time
+fd = os.open(sys.argv[1], os.O_RDWR | os.O_CREAT, 0o664)
+fcntl.flock(fd, fcntl.LOCK_EX)
+sys.stdout.write("ready\\n")
+sys.stdout.flush()
+time.sleep(60)
+"""
+
+
+class _TestWorker(ServiceWorkerBase):
+    guard = threading.Lock()
+    activeCount = 0
+    maxActiveCount = 0
+
+    def __init__(self, reqObj):
+        super(_TestWorker, self).__init__(reqObj)
+        self.addServices({"/service/v1/compute": "_computeOp"})
+
+    def _computeOp(self):
+        cls = self.__class__
+        with cls.guard:
+            cls.activeCount += 1
+            cls.maxActiveCount = max(cls.maxActiveCount, cls.activeCount)
+        time.sleep(0.05)
+        with cls.guard:
+            cls.activeCount -= 1
+        return ServiceSessionState()
+
+
+class ServiceAdmissionControlTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "admission")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        self.__lockDirPath = os.path.join(self.__topPath, "admission")
+        ServiceAdmissionControl.reset()
+
+    def testLimit(self):
+        """Test slots are limited per user and route and counted"""
+        ac = ServiceAdmissionControl(self.__lockDirPath, maxInFlight=2, routeLimitD={"/v1/upload": 1})
+        s1 = ac.acquire("user1", "/v1/compute")
+        s2 = ac.acquire("user1", "/v1/compute")
+        self.assertIsNotNone(s1)
+        self.assertIsNotNone(s2)
+        self.assertIsNone(ac.acquire("user1", "/v1/compute"))
+        self.assertEqual(ac.getInFlight("user1", "/v1/compute"), 2)
+        with ac.admit("user2", "/v1/compute") as ok:
+            self.assertTrue(ok)
+        with ac.admit("user1", "/v1/upload") as ok:
+            self.assertTrue(ok)
+            with ac.admit("user1", "/v1/upload") as ok2:
+                self.assertFalse(ok2)
+        ac.release(s1)
+        self.assertEqual(ac.getInFlight("user1", "/v1/compute"), 1)
+        s3 = ac.acquire("user1", "/v1/compute")
+        self.assertIsNotNone(s3)
+        ac.release(s2)
+        ac.release(s3)
+        sD = ServiceAdmissionControl.getSummary()
+        self.assertEqual(sD["user1"]["/v1/compute"], {"in_flight": 0, "admitted": 3, "queued": 0, "rejected": 1})
+        self.assertEqual(sD["user1"]["/v1/upload"]["rejected"], 1)
+        self.assertEqual(sD["user2"]["/v1/compute"]["admitted"], 1)
+
+    def testQueueTimeout(self):
+        """Test a request waits for a slot released within the timeout"""
+        ac = ServiceAdmissionControl(self.__lockDirPath, maxInFlight=1, timeoutSeconds=5.0)
+        slot = ac.acquire("user1", "/v1/compute")
+        timer = threading.Timer(0.2, ac.release, args=(slot,))
+        timer.start()
+        tBegin = time.monotonic()
+        slot2 = ac.acquire("user1", "/v1/compute")
+        self.assertIsNotNone(slot2)
+        self.assertGreaterEqual(time.monotonic() - tBegin, 0.15)
+        ac.release(slot2)
+        timer.join()
+        self.assertEqual(ServiceAdmissionControl.getSummary()["user1"]["/v1/compute"]["queued"], 1)
+
+    def testCrossProcess(self):
+        """Test a slot held by another process counts against the limit until that process exits"""
+        ac = ServiceAdmissionControl(self.__lockDirPath, maxInFlight=1)
+        with ac.admit("user1", "/v1/compute") as ok:
+            self.assertTrue(ok)
+        slotPath = os.path.join(self.__lockDirPath, "user1", min(os.listdir(os.path.join(self.__lockDirPath, "user1"))))
+        proc = subprocess.Popen([sys.executable, "-c", _HOLD_SLOT, slotPath], stdout=subprocess.PIPE)  # noqa: S603
+        try:
+            self.assertEqual(proc.stdout.readline().strip(), b"ready")
+            self.assertIsNone(ac.acquire("user1", "/v1/compute"))
+            self.assertEqual(ac.getInFlight("user1", "/v1/compute"), 1)
+        finally:
+            proc.kill()
+            proc.wait()
+            proc.stdout.close()
+        with ac.admit("user1", "/v1/compute") as ok:
+            self.assertTrue(ok)
+
+    def testWorker(self):
+        """Test ServiceWorkerBase rejects requests over the limit with status code 429"""
+        ac = ServiceAdmissionControl(self.__lockDirPath, maxInFlight=2)
+
+        def _request():
+            req = ServiceRequest({"service_user_id": ["user1"], "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"]})
+            worker = _TestWorker(req)
+            worker.setAdmissionControl(ac)
+            return worker._run("/service/v1/compute")  # pylint: disable=protected-access
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            sstL = list(executor.map(lambda _: _request(), range(16)))
+        rejectL = [sst for sst in sstL if sst.getServiceErrorFlag()]
+        self.assertLessEqual(_TestWorker.maxActiveCount, 2)
+        self.assertGreater(len(rejectL), 0)
+        self.assertTrue(all(sst.getServiceStatusCode() == 429 for sst in rejectL))
+        sD = ServiceAdmissionControl.getSummary()["user1"]["/service/v1/compute"]
+        self.assertEqual(sD["rejected"], len(rejectL))
+        self.assertEqual(sD["admitted"], 16 - len(rejectL))
+        logger.info("Admitted %d rejected %d", sD["admitted"], sD["rejected"])
+        # a worker with its own admission control under <top_session_path>/admission
+        req = ServiceRequest({"top_session_path": [self.__topPath], "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"]})
+        worker = _TestWorker(req)
+        worker.setAdmissionControl(maxInFlight=1)
+        self.assertFalse(worker._run("/service/v1/compute").getServiceErrorFlag())  # pylint: disable=protected-access
+        self.assertTrue(os.path.isdir(os.path.join(self.__lockDirPath, "ANONYMOUS")))
+
+
+def suiteServiceAdmissionControl():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceAdmissionControlTests("testLimit"))
+    suite.addTest(ServiceAdmissionControlTests("testQueueTimeout"))
+    suite.addTest(ServiceAdmissionControlTests("testCrossProcess"))
+    suite.addTest(ServiceAdmissionControlTests("testWorker"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceAdmissionControl())
@@ -0,0 +1,128 @@
+##
+# File: ServiceConfigCacheTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceConfigCache process-wide site configuration --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import logging
+import os
+import platform
+import threading
+import time
+import timeit
+import unittest
+
+from wwpdb.utils.config.ConfigInfo import ConfigInfo
+
+from wwpdb.utils.ws_utils.ServiceConfigCache import ServiceConfigCache
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceWorkerBase import ServiceWorkerBase
+from wwpdb.utils.ws_utils.TokenUtils import JwtTokenReader
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class ServiceConfigCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.__siteId = "WWPDB_DEPLOY_TEST"
+        ServiceConfigCache.reload()
+
+    def tearDown(self):
+        ServiceConfigCache.setTtl(None)
+        ServiceConfigCache.reload()
+
+    def testCache(self):
+        """Test shared objects, memoized values, reload and time to live"""
+        cI = ServiceConfigCache.getConfigInfo(self.__siteId)
+        self.assertIs(ServiceConfigCache.getConfigInfo(self.__siteId), cI)
+        self.assertEqual(ServiceConfigCache.get(self.__siteId, "SITE_NO_SUCH_KEY", "dflt"), "dflt")
+        self.assertIsNone(ServiceConfigCache.get(self.__siteId, "SITE_NO_SUCH_KEY"))
+        self.assertEqual(
+            ServiceConfigCache.get(self.__siteId, "SITE_SERVICE_REGISTRATION_KEY"),
+            cI.get("SITE_SERVICE_REGISTRATION_KEY"),
+        )
+        ServiceConfigCache.reload(self.__siteId)
+        cI2 = ServiceConfigCache.getConfigInfo(self.__siteId)
+        self.assertIsNot(cI2, cI)
+        ServiceConfigCache.setTtl(0.05)
+        self.assertIs(ServiceConfigCache.getConfigInfo(self.__siteId), cI2)
+        time.sleep(0.1)
+        self.assertIsNot(ServiceConfigCache.getConfigInfo(self.__siteId), cI2)
+
+    def testShared(self):
+        """Test workers and token readers share one configuration object across threads"""
+        req = ServiceRequest({"wwpdb_site_id": [self.__siteId]})
+        cI = ServiceConfigCache.getConfigInfo(self.__siteId)
+        self.assertIs(ServiceWorkerBase(req)._cI, cI)  # pylint: disable=protected-access
+        self.assertIs(JwtTokenReader(siteId=self.__siteId)._cI, cI)  # pylint: disable=protected-access
+        ServiceConfigCache.reload()
+        objL = []
+
+        def _get():
+            objL.append(ServiceConfigCache.getConfigInfo(self.__siteId))
+
+        thL = [threading.Thread(target=_get) for _ in range(8)]
+        for th in thL:
+            th.start()
+        for th in thL:
+            th.join()
+        self.assertEqual(len({id(obj) for obj in objL}), 1)
+
+    def testBenchmark(self):
+        """Compare per-request construction of ConfigInfo and token readers with and without the cache"""
+        nLoop = 200
+        tCold = min(timeit.repeat(lambda: ConfigInfo(self.__siteId), number=nLoop, repeat=3))
+        tWarm = min(timeit.repeat(lambda: ServiceConfigCache.getConfigInfo(self.__siteId), number=nLoop, repeat=3))
+        ServiceConfigCache.reload()
+        tBegin = time.perf_counter()
+        JwtTokenReader(siteId=self.__siteId)
+        tStartup = time.perf_counter() - tBegin
+        tReader = min(timeit.repeat(lambda: JwtTokenReader(siteId=self.__siteId), number=nLoop, repeat=3))
+        logger.info(
+            "ConfigInfo construction %.1f us cached lookup %.2f us - token reader first %.1f us warm %.2f us",
+            1.0e6 * tCold / nLoop,
+            1.0e6 * tWarm / nLoop,
+            1.0e6 * tStartup,
+            1.0e6 * tReader / nLoop,
+        )
+
+
+def suiteServiceConfigCache():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceConfigCacheTests("testCache"))
+    suite.addTest(ServiceConfigCacheTests("testShared"))
+    suite.addTest(ServiceConfigCacheTests("testBenchmark"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceConfigCache())
@@ -0,0 +1,201 @@
+##
+# File: ServiceJobManagerTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for background job execution of service operations --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceHistory import ServiceHistory
+from wwpdb.utils.ws_utils.ServiceJobManager import ServiceJobManager
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+from wwpdb.utils.ws_utils.ServiceSessionSweeper import ServiceSessionSweeper
+from wwpdb.utils.ws_utils.ServiceWorkerBase import ServiceWorkerBase
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class _TestWorker(ServiceWorkerBase):
+    def __init__(self, reqObj):
+        super(_TestWorker, self).__init__(reqObj)
+        self.addServices(
+            {
+                "/service/v1/compute": {"opName": "_computeOp", "asynchronous": True},
+                "/service/v1/fail": {"opName": "_failOp", "asynchronous": True},
+                "/service/v1/echo": {"opName": "_echoOp", "asynchronous": True},
+                "/service/v1/job/{job_id}": "_jobStatusOp",
+            }
+        )
+
+    def _computeOp(self):
+        sst = ServiceSessionState()
+        self._getSession()
+        time.sleep(float(self._reqObj.getValue("seconds") or "0"))
+        with open(os.path.join(self._sessionPath, "result.txt"), "w") as ofh:
+            ofh.write("done")
+        sst.setAppDataDict({"value": 42})
+        return sst
+
+    def _failOp(self):
+        raise ValueError("compute failure")
+
+    def _echoOp(self):
+        sst = ServiceSessionState()
+        time.sleep(float(self._reqObj.getValue("seconds") or "0"))
+        sst.setAppDataDict({"x": self._reqObj.getValue("x")})
+        return sst
+
+
+class ServiceJobManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "jobmanager")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+
+    def __run(self, path, **params):
+        pD = {
+            "top_session_path": [self.__topPath],
+            "service_user_id": ["jobuser"],
+            "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"],
+        }
+        for k, v in params.items():
+            pD[k] = [v]
+        return _TestWorker(ServiceRequest(pD))._run(path)  # pylint: disable=protected-access
+
+    def testJob(self):
+        """Test submission returns at once and the status route reports the result"""
+        tBegin = time.perf_counter()
+        sst = self.__run("/service/v1/compute", seconds="0.5")
+        tSubmit = time.perf_counter() - tBegin
+        jobId = sst.getAppDataDict()["job_id"]
+        self.assertFalse(sst.getServiceErrorFlag())
+        self.assertLess(tSubmit, 0.5)
+        self.assertIn(self.__run("/service/v1/job/%s" % jobId).getAppDataDict()["status"], ("submitted", "running"))
+        self.assertTrue(ServiceJobManager.wait(jobId, timeout=30))
+        rD = self.__run("/service/v1/job/%s" % jobId).getAppDataDict()
+        self.assertEqual(rD["status"], "completed")
+        self.assertEqual(rD["result"], {"value": 42})
+        self.assertLessEqual(rD["submitted"], rD["running"])
+        logger.info("Job submitted in %.2f ms, completed at %s", tSubmit * 1e3, rD["completed"])
+        # a second job in the same session
+        sessionId = sst.getAppDataDict()["session_id"]
+        self.assertEqual(rD["session_id"], sessionId)
+        jobId2 = self.__run("/service/v1/fail", session_id=sessionId).getAppDataDict()["job_id"]
+        self.assertNotEqual(jobId2, jobId)
+        self.assertTrue(ServiceJobManager.wait(jobId2, timeout=30))
+        rD = self.__run("/service/v1/job/%s" % jobId2).getAppDataDict()
+        self.assertEqual(rD["status"], "failed")
+        self.assertEqual(rD["errormessage"], "Operation failure")
+        self.assertEqual(rD["session_id"], sessionId)
+        self.assertEqual(self.__run("/service/v1/job/%s" % jobId).getAppDataDict()["status"], "completed")
+        sst = self.__run("/service/v1/job/nosuchjob")
+        self.assertTrue(sst.getServiceErrorFlag())
+        self.assertEqual(sst.getAppDataDict()["status"], "none")
+
+    def testJobsInSession(self):
+        """Test concurrent jobs in one session keep their own status and result"""
+        sst = self.__run("/service/v1/echo", x="slow", seconds="0.5")
+        jobIdSlow = sst.getAppDataDict()["job_id"]
+        sessionId = sst.getAppDataDict()["session_id"]
+        jobIdFast = self.__run("/service/v1/echo", x="fast", session_id=sessionId).getAppDataDict()["job_id"]
+        self.assertNotEqual(jobIdFast, jobIdSlow)
+        self.assertTrue(ServiceJobManager.wait(jobIdFast, timeout=30))
+        rD = self.__run("/service/v1/job/%s" % jobIdFast).getAppDataDict()
+        self.assertEqual(rD["status"], "completed")
+        self.assertEqual(rD["result"], {"x": "fast"})
+        self.assertIn(self.__run("/service/v1/job/%s" % jobIdSlow).getAppDataDict()["status"], ("submitted", "running"))
+        self.assertFalse(ServiceJobManager.wait(jobIdSlow, timeout=0))
+        self.assertTrue(ServiceJobManager.wait(jobIdSlow, timeout=30))
+        for jobId, x in ((jobIdSlow, "slow"), (jobIdFast, "fast")):
+            rD = self.__run("/service/v1/job/%s" % jobId).getAppDataDict()
+            self.assertEqual(rD["status"], "completed")
+            self.assertEqual(rD["session_id"], sessionId)
+            self.assertEqual(rD["result"], {"x": x})
+        sw = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=0)
+        rowD = {row["sid"]: row for row in sw.getIndexRows("jobuser")}
+        self.assertEqual(rowD[sessionId]["status"], "completed")
+
+    def testJobIsolation(self):
+        """Test the job runs on its own copy of the request and session state"""
+        pD = {
+            "top_session_path": [self.__topPath],
+            "service_user_id": ["jobuser"],
+            "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"],
+            "x": ["fromrequest"],
+            "seconds": ["0.2"],
+        }
+        worker = _TestWorker(ServiceRequest(pD))
+        jobId = worker._run("/service/v1/echo").getAppDataDict()["job_id"]  # pylint: disable=protected-access
+        # the request thread goes on with the worker and request objects
+        worker._reqObj.getDictionary().clear()  # pylint: disable=protected-access
+        worker._sessionId = "othersession"  # pylint: disable=protected-access
+        self.assertTrue(ServiceJobManager.wait(jobId, timeout=30))
+        rD = self.__run("/service/v1/job/%s" % jobId).getAppDataDict()
+        self.assertEqual(rD["status"], "completed")
+        self.assertEqual(rD["result"], {"x": "fromrequest"})
+        self.assertFalse(os.path.exists("history-session-store.pic"))
+
+    def testInterruptedJob(self):
+        """Test a job left running by an exited process is reported as failed"""
+        sst = self.__run("/service/v1/compute")
+        jobId = sst.getAppDataDict()["job_id"]
+        self.assertTrue(ServiceJobManager.wait(jobId, timeout=30))
+        proc = subprocess.Popen([sys.executable, "-c", "pass"])  # noqa: S603
+        proc.wait()
+        userPath = os.path.join(self.__topPath, "sessions", "jobuser")
+        owner = ServiceJobManager.getOwner()
+        owner["pid"] = proc.pid
+        ServiceHistory(historyPath=userPath).add(jobId, "running", **owner)
+        rD = ServiceJobManager.getJobStatus(userPath, jobId)
+        self.assertEqual(rD["status"], "failed")
+        self.assertEqual(rD["errormessage"], "Job interrupted")
+
+
+def suiteServiceJobManager():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceJobManagerTests("testJob"))
+    suite.addTest(ServiceJobManagerTests("testJobsInSession"))
+    suite.addTest(ServiceJobManagerTests("testJobIsolation"))
+    suite.addTest(ServiceJobManagerTests("testInterruptedJob"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceJobManager())
@@ -0,0 +1,154 @@
+##
+# File: ServiceJsonTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceJson engine selection and output equivalence --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import json
+import logging
+import os
+import platform
+import timeit
+import unittest
+
+from wwpdb.utils.ws_utils import ServiceJson
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceResponse import ServiceResponse
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+def _getPayload(nRows=200):
+    """Service response payload resembling a validation report summary."""
+    return {
+        "statuscode": "OK",
+        "errorflag": False,
+        "statustext": "Entry D_1000000001 processed — résumé",
+        "datacontent": {
+            "entry_id": "D_1000000001",
+            "pdb_id": "9XYZ",
+            "rows": [
+                {
+                    "ordinal": ii,
+                    "chain": "ABCD"[ii % 4],
+                    "residue": "ALA",
+                    "seq_id": ii + 1,
+                    "rsrz": 0.125 * ii,
+                    "outlier": ii % 7 == 0,
+                    "alt_id": None,
+                }
+                for ii in range(nRows)
+            ],
+            "counts": {1: 10, 2: 20},
+        },
+        "htmllinkcontent": "",
+    }
+
+
+class ServiceJsonTests(unittest.TestCase):
+    def setUp(self):
+        self.__engine = ServiceJson.getEngine()
+
+    def tearDown(self):
+        ServiceJson.setEngine(self.__engine)
+
+    def __getEngineList(self):
+        return [eng for eng in ServiceJson.ENGINE_LIST if ServiceJson.setEngine(eng) == eng]
+
+    def testEquivalence(self):
+        """Test every available engine decodes to the same value as the standard library"""
+        objL = [
+            _getPayload(5),
+            [1, 2.5, "three", True, False, None],
+            "ünïcödé ✓",
+            {"big": 2**70, "tuple": (1, 2)},
+            {},
+            [],
+        ]
+        engL = self.__getEngineList()
+        self.assertIn("json", engL)
+        for eng in engL:
+            ServiceJson.setEngine(eng)
+            for obj in objL:
+                ref = json.loads(json.dumps(obj))
+                self.assertEqual(json.loads(ServiceJson.dumpb(obj)), ref, eng)
+                self.assertEqual(json.loads(ServiceJson.dumps(obj)), ref, eng)
+                self.assertEqual(ServiceJson.loads(json.dumps(obj)), ref, eng)
+                self.assertEqual(ServiceJson.loads(json.dumps(obj).encode("utf-8")), ref, eng)
+        self.assertEqual(ServiceJson.setEngine("nosuchengine"), "json")
+
+    def testServiceObjects(self):
+        """Test JSON responses and request round trips with each engine"""
+        for eng in self.__getEngineList():
+            ServiceJson.setEngine(eng)
+            sr = ServiceResponse()
+            sr.setData({"label": "é", "value": 3})
+            resp = sr.getResponse()
+            self.assertEqual(resp.content_type, "application/json")
+            self.assertEqual(json.loads(resp.body), {"label": "é", "value": 3})
+            sr.setReturnFormat("jsonText")
+            body = sr.getResponse().body
+            self.assertTrue(body.startswith(b"<textarea>"))
+            self.assertEqual(json.loads(body[10:-11])["label"], "é")
+            req = ServiceRequest({"session_id": ["abc"], "count": ["1"]})
+            req2 = ServiceRequest({})
+            req2.setJSON(req.getJSON())
+            self.assertEqual(req2.getDictionary(), req.getDictionary())
+
+    def testBenchmark(self):
+        """Compare serialization and parsing time of each engine on a service payload"""
+        payload = _getPayload(int(os.environ.get("WS_UTILS_BENCH_JSON_ROWS", "200")))
+        nLoop = 200
+        for eng in self.__getEngineList():
+            ServiceJson.setEngine(eng)
+            text = ServiceJson.dumpb(payload)
+            tDump = min(timeit.repeat(lambda: ServiceJson.dumpb(payload), number=nLoop, repeat=3))  # noqa: B023
+            tLoad = min(timeit.repeat(lambda: ServiceJson.loads(text), number=nLoop, repeat=3))  # noqa: B023
+            logger.info(
+                "Engine %-6s payload %d bytes dump %.1f us load %.1f us",
+                eng,
+                len(text),
+                1.0e6 * tDump / nLoop,
+                1.0e6 * tLoad / nLoop,
+            )
+
+
+def suiteServiceJson():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceJsonTests("testEquivalence"))
+    suite.addTest(ServiceJsonTests("testServiceObjects"))
+    suite.addTest(ServiceJsonTests("testBenchmark"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceJson())
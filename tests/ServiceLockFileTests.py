@@ -0,0 +1,380 @@
+##
+# File: ServiceLockFileTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceLockFile and ServiceKernelLockFile classes --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import socket
+import statistics
+import threading
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceLockFile import (
+    LockFileTimeoutException,
+    ServiceKernelLockFile,
+    ServiceLockFile,
+    ServiceLockManager,
+)
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+def _contendWorker(lockFactory, filePath, iterations, holdSeconds, releaseTime, inside, overlap, waitQ, gapSeconds=0):
+    """Repeatedly take the lock, recording the handoff latency from the previous holder's release
+    and the time spent waiting in acquire.
+    """
+    handoffL = []
+    acquireL = []
+    retries = 0
+    for _ in range(iterations):
+        tBegin = time.time()
+        with lockFactory(filePath) as lk:
+            tNow = time.time()
+            acquireL.append(tNow - tBegin)
+            if hasattr(lk, "getRetryCount"):
+                retries += lk.getRetryCount()
+            if releaseTime.value > 0:
+                handoffL.append(tNow - releaseTime.value)
+            if inside.value != 0:
+                overlap.value += 1
+            inside.value = 1
+            time.sleep(holdSeconds)
+            inside.value = 0
+            releaseTime.value = time.time()
+        time.sleep(gapSeconds)
+    waitQ.put((handoffL, acquireL, retries))
+
+
+def runContention(lockFactory, filePath, numProc=4, iterations=10, holdSeconds=0.002, gapSeconds=0):
+    """Run numProc processes contending for the same lock.
+
+    Returns a dictionary with lists of handoff latencies and acquire waits (seconds), the count of
+    mutual exclusion violations and the count of failed attempts to lock.
+    """
+    ctx = multiprocessing.get_context("fork")
+    releaseTime = ctx.Value("d", 0.0, lock=False)
+    inside = ctx.Value("i", 0, lock=False)
+    overlap = ctx.Value("i", 0, lock=False)
+    waitQ = ctx.Queue()
+    pL = [
+        ctx.Process(
+            target=_contendWorker,
+            args=(lockFactory, filePath, iterations, holdSeconds, releaseTime, inside, overlap, waitQ, gapSeconds),
+        )
+        for _ in range(numProc)
+    ]
+    for pr in pL:
+        pr.start()
+    rD = {"handoff": [], "wait": [], "retries": 0}
+    for _ in pL:
+        handoffL, acquireL, retries = waitQ.get(timeout=60)
+        rD["handoff"].extend(handoffL)
+        rD["wait"].extend(acquireL)
+        rD["retries"] += retries
+    for pr in pL:
+        pr.join()
+    rD["overlap"] = overlap.value
+    return rD
+
+
+def _quantile(vL, q):
+    sL = sorted(vL)
+    return sL[min(len(sL) - 1, int(q * len(sL)))]
+
+
+def _exclLockFactory(filePath):
+    return ServiceLockFile(filePath, timeoutSeconds=30, retrySeconds=0.02)
+
+
+def _backoffLockFactory(filePath):
+    return ServiceLockFile(filePath, timeoutSeconds=30, retrySeconds=0.02, waitStrategy="backoff")
+
+
+def _inotifyLockFactory(filePath):
+    return ServiceLockFile(filePath, timeoutSeconds=30, retrySeconds=0.02, waitStrategy="inotify")
+
+
+def _pollingKernelLockFactory(filePath):
+    return ServiceKernelLockFile(filePath, timeoutSeconds=30, retrySeconds=0.02, useHelperThread=False)
+
+
+class ServiceLockFileTests(unittest.TestCase):
+    def setUp(self):
+        self.__lockdir = os.path.join(TESTOUTPUT, "locks")
+        if not os.path.exists(self.__lockdir):  # pragma: no cover
+            os.makedirs(self.__lockdir)
+        self.__filePath = os.path.join(self.__lockdir, "target-%s.db" % self._testMethodName)
+
+    def testLockFile(self):
+        """Test acquire, release and timeout of the lock file strategy"""
+        with ServiceLockFile(self.__filePath, timeoutSeconds=1, retrySeconds=0.05):
+            self.assertTrue(os.path.exists(self.__filePath + ".lock"))
+            with self.assertRaises(LockFileTimeoutException):
+                ServiceLockFile(self.__filePath, timeoutSeconds=0.2, retrySeconds=0.05).acquire()
+        self.assertFalse(os.path.exists(self.__filePath + ".lock"))
+
+    def __writeLockFile(self, pid, ageSeconds=0):
+        with open(self.__filePath + ".lock", "w") as ofh:
+            json.dump({"pid": pid, "host": socket.gethostname(), "time": time.time() - ageSeconds}, ofh)
+
+    def testLockFileOwner(self):
+        """Test owner details are recorded in the lock file"""
+        with ServiceLockFile(self.__filePath, timeoutSeconds=1):
+            with open(self.__filePath + ".lock") as fin:
+                oD = json.load(fin)
+            self.assertEqual(oD["pid"], os.getpid())
+            self.assertEqual(oD["host"], socket.gethostname())
+
+    def testBreakStaleLock(self):
+        """Test recovery of locks left by dead processes or exceeding the lease"""
+        ctx = multiprocessing.get_context("fork")
+        pr = ctx.Process(target=time.sleep, args=(0,))
+        pr.start()
+        pr.join()
+        # Owner process has exited
+        self.__writeLockFile(pr.pid)
+        with ServiceLockFile(self.__filePath, timeoutSeconds=1, retrySeconds=0.05):
+            pass
+        self.assertFalse(os.path.exists(self.__filePath + ".lock"))
+        # Live owner - not broken without lease
+        self.__writeLockFile(os.getpid(), ageSeconds=100)
+        with self.assertRaises(LockFileTimeoutException):
+            ServiceLockFile(self.__filePath, timeoutSeconds=0.2, retrySeconds=0.05).acquire()
+        # Broken with lease exceeded
+        with ServiceLockFile(self.__filePath, timeoutSeconds=1, retrySeconds=0.05, leaseSeconds=10):
+            pass
+        # Stale checks disabled
+        self.__writeLockFile(pr.pid)
+        with self.assertRaises(LockFileTimeoutException):
+            ServiceLockFile(self.__filePath, timeoutSeconds=0.2, retrySeconds=0.05, breakStale=False).acquire()
+        os.unlink(self.__filePath + ".lock")
+
+    def testReleaseBrokenLock(self):
+        """Test release of a lock broken while held does not remove the new owner's lock"""
+        lk = ServiceLockFile(self.__filePath, timeoutSeconds=1)
+        lk.acquire()
+        time.sleep(0.1)
+        lk2 = ServiceLockFile(self.__filePath, timeoutSeconds=1, retrySeconds=0.05, leaseSeconds=0.05)
+        lk2.acquire()
+        lk.release()
+        self.assertTrue(os.path.exists(self.__filePath + ".lock"))
+        lk2.release()
+        self.assertFalse(os.path.exists(self.__filePath + ".lock"))
+
+    def testKernelLockFile(self):
+        """Test acquire, release and timeout of the kernel lock strategy"""
+        for useHelperThread in (True, False):
+            with ServiceKernelLockFile(self.__filePath, timeoutSeconds=1, useHelperThread=useHelperThread):
+                lk = ServiceKernelLockFile(
+                    self.__filePath, timeoutSeconds=0.2, retrySeconds=0.05, useHelperThread=useHelperThread
+                )
+                tBegin = time.time()
+                with self.assertRaises(LockFileTimeoutException):
+                    lk.acquire()
+                self.assertGreaterEqual(time.time() - tBegin, 0.2)
+            # Lock is available once released - including after an abandoned helper thread wait
+            with ServiceKernelLockFile(self.__filePath, timeoutSeconds=1, useHelperThread=useHelperThread):
+                pass
+
+    def testKernelLockAbandonedWait(self):
+        """Test a lock granted to an abandoned helper thread wait is dropped at once"""
+        with ServiceKernelLockFile(self.__filePath, timeoutSeconds=1):
+            for _ in range(3):
+                with self.assertRaises(LockFileTimeoutException):
+                    ServiceKernelLockFile(self.__filePath, timeoutSeconds=0.1).acquire()
+            self.assertEqual(sum(1 for th in threading.enumerate() if th.name == "ServiceKernelLockFile"), 3)
+        time.sleep(0.1)
+        self.assertFalse(any(th.name == "ServiceKernelLockFile" for th in threading.enumerate()))
+        # free for a single non-blocking attempt
+        with ServiceKernelLockFile(self.__filePath, timeoutSeconds=0, useHelperThread=False):
+            pass
+
+    def testKernelLockHandoff(self):
+        """Test a waiter blocked in the kernel is woken by release"""
+        lk = ServiceKernelLockFile(self.__filePath, timeoutSeconds=5)
+        lk.acquire()
+        ctx = multiprocessing.get_context("fork")
+        releaseTime = ctx.Value("d", 0.0, lock=False)
+        inside = ctx.Value("i", 0, lock=False)
+        overlap = ctx.Value("i", 0, lock=False)
+        waitQ = ctx.Queue()
+        pr = ctx.Process(
+            target=_contendWorker,
+            args=(ServiceKernelLockFile, self.__filePath, 1, 0, releaseTime, inside, overlap, waitQ),
+        )
+        pr.start()
+        time.sleep(0.2)
+        releaseTime.value = time.time()
+        lk.release()
+        waitL, _, _ = waitQ.get(timeout=10)
+        pr.join()
+        self.assertEqual(len(waitL), 1)
+        self.assertLess(waitL[0], 0.2)
+
+    def testContentionBenchmark(self):
+        """Compare median and tail handoff latency of lock strategies with contending processes"""
+        numProc = 4
+        for name, factory in (
+            ("lockfile", _exclLockFactory),
+            ("kernel", ServiceKernelLockFile),
+            ("kernel-polling", _pollingKernelLockFactory),
+        ):
+            rD = runContention(factory, self.__filePath + name, numProc=numProc)
+            waitL = rD["handoff"]
+            self.assertEqual(rD["overlap"], 0)
+            self.assertGreater(len(waitL), 0)
+            logger.info(
+                "%-15s procs %d handoffs %3d median %.6f p95 %.6f max %.6f (seconds)",
+                name,
+                numProc,
+                len(waitL),
+                statistics.median(waitL),
+                _quantile(waitL, 0.95),
+                max(waitL),
+            )
+
+    def testInotifyWakeup(self):
+        """Test a waiter using the inotify strategy is woken promptly by release"""
+        lk = ServiceLockFile(self.__filePath, timeoutSeconds=5)
+        lk.acquire()
+        ctx = multiprocessing.get_context("fork")
+        releaseTime = ctx.Value("d", 0.0, lock=False)
+        inside = ctx.Value("i", 0, lock=False)
+        overlap = ctx.Value("i", 0, lock=False)
+        waitQ = ctx.Queue()
+        factory = functools.partial(ServiceLockFile, timeoutSeconds=10, retrySeconds=2.0, waitStrategy="inotify")
+        pr = ctx.Process(
+            target=_contendWorker, args=(factory, self.__filePath, 1, 0, releaseTime, inside, overlap, waitQ)
+        )
+        pr.start()
+        time.sleep(0.3)
+        releaseTime.value = time.time()
+        lk.release()
+        waitL, _, retries = waitQ.get(timeout=10)
+        pr.join()
+        self.assertEqual(len(waitL), 1)
+        self.assertLess(waitL[0], 0.5)
+        logger.info("inotify wake-up after %.6f seconds with %d retries", waitL[0], retries)
+
+    def testWaitStrategyBenchmark(self):
+        """Compare acquire wait (median/p99) and failed lock attempts of the lock file wait strategies"""
+        numProc = 6
+        for name, factory in (
+            ("fixed", _exclLockFactory),
+            ("backoff", _backoffLockFactory),
+            ("inotify", _inotifyLockFactory),
+        ):
+            rD = runContention(
+                factory, self.__filePath + name, numProc=numProc, iterations=15, holdSeconds=0.005, gapSeconds=0.001
+            )
+            self.assertEqual(rD["overlap"], 0)
+            waitL = rD["wait"]
+            logger.info(
+                "%-8s procs %d acquisitions %3d wait median %.6f p99 %.6f (seconds) failed attempts %d",
+                name,
+                numProc,
+                len(waitL),
+                statistics.median(waitL),
+                _quantile(waitL, 0.99),
+                rD["retries"],
+            )
+
+    def testLockManagerReentrant(self):
+        """Test nested acquisition of the same lock in one thread"""
+        with ServiceLockManager.lock(self.__filePath, timeoutSeconds=0.5, retrySeconds=0.05):
+            self.assertTrue(ServiceLockManager.isHeld(self.__filePath))
+            with ServiceLockManager.lock(self.__filePath, timeoutSeconds=0.5, retrySeconds=0.05):
+                self.assertTrue(os.path.exists(self.__filePath + ".lock"))
+            # inner release keeps the file lock
+            self.assertTrue(os.path.exists(self.__filePath + ".lock"))
+        self.assertFalse(ServiceLockManager.isHeld(self.__filePath))
+        self.assertFalse(os.path.exists(self.__filePath + ".lock"))
+        with self.assertRaises(RuntimeError):
+            ServiceLockManager.release(self.__filePath)
+
+    def testLockManagerThreads(self):
+        """Test threads are serialized in-process and time out while the lock is held"""
+        state = {"inside": 0, "overlap": 0, "count": 0, "timeouts": 0}
+
+        def worker(timeoutSeconds):
+            try:
+                with ServiceLockManager.lock(self.__filePath, timeoutSeconds=timeoutSeconds, retrySeconds=0.01):
+                    if state["inside"]:
+                        state["overlap"] += 1
+                    state["inside"] = 1
+                    time.sleep(0.001)
+                    state["inside"] = 0
+                    state["count"] += 1
+            except LockFileTimeoutException:
+                state["timeouts"] += 1
+
+        thL = [threading.Thread(target=worker, args=(10,)) for _ in range(8)]
+        for th in thL:
+            th.start()
+        for th in thL:
+            th.join()
+        self.assertEqual(state["count"], 8)
+        self.assertEqual(state["overlap"], 0)
+        # held by this thread - another thread times out
+        with ServiceLockManager.lock(self.__filePath, timeoutSeconds=1, lockClass=ServiceKernelLockFile):
+            th = threading.Thread(target=worker, args=(0.1,))
+            th.start()
+            th.join()
+        self.assertEqual(state["timeouts"], 1)
+
+
+def suiteServiceLockFile():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceLockFileTests("testLockFile"))
+    suite.addTest(ServiceLockFileTests("testLockFileOwner"))
+    suite.addTest(ServiceLockFileTests("testBreakStaleLock"))
+    suite.addTest(ServiceLockFileTests("testReleaseBrokenLock"))
+    suite.addTest(ServiceLockFileTests("testKernelLockFile"))
+    suite.addTest(ServiceLockFileTests("testKernelLockAbandonedWait"))
+    suite.addTest(ServiceLockFileTests("testKernelLockHandoff"))
+    suite.addTest(ServiceLockFileTests("testContentionBenchmark"))
+    suite.addTest(ServiceLockFileTests("testInotifyWakeup"))
+    suite.addTest(ServiceLockFileTests("testWaitStrategyBenchmark"))
+    suite.addTest(ServiceLockFileTests("testLockManagerReentrant"))
+    suite.addTest(ServiceLockFileTests("testLockManagerThreads"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceLockFile())
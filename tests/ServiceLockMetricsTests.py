@@ -0,0 +1,171 @@
+##
+# File: ServiceLockMetricsTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceLockMetrics lock contention instrumentation --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import json
+import logging
+import os
+import platform
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceDataStore import ServiceDataStore
+from wwpdb.utils.ws_utils.ServiceLockFile import (
+    LockFileTimeoutException,
+    ServiceKernelLockFile,
+    ServiceLockFile,
+)
+from wwpdb.utils.ws_utils.ServiceLockMetrics import (
+    LockHistogram,
+    ServiceLockMetrics,
+    synchronized,
+)
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class ServiceLockMetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.__lockdir = os.path.join(TESTOUTPUT, "lockmetrics")
+        if not os.path.exists(self.__lockdir):  # pragma: no cover
+            os.makedirs(self.__lockdir)
+        ServiceLockMetrics.reset()
+        ServiceLockMetrics.enable()
+
+    def tearDown(self):
+        ServiceLockMetrics.stopPeriodicDump()
+        ServiceLockMetrics.disable()
+        ServiceLockMetrics.reset()
+
+    def testHistogram(self):
+        """Test histogram bucketing and quantiles"""
+        hg = LockHistogram()
+        for _ in range(98):
+            hg.add(1.0e-5)
+        hg.add(0.5)
+        hg.add(100.0)
+        hD = hg.getDict()
+        self.assertEqual(hD["count"], 100)
+        self.assertLessEqual(hD["p50"], 2.0e-5)
+        self.assertGreaterEqual(hD["p99"], 0.5)
+        self.assertEqual(hD["max"], 100.0)
+        self.assertEqual(sum(hD["buckets"]), 100)
+
+    def testLockFileMetrics(self):
+        """Test wait, hold, retry and timeout statistics for lock files"""
+        filePath = os.path.join(self.__lockdir, "metrics.db")
+        with ServiceLockFile(filePath, timeoutSeconds=1, lockName="history"):
+            time.sleep(0.01)
+            with self.assertRaises(LockFileTimeoutException):
+                ServiceLockFile(filePath, timeoutSeconds=0.1, retrySeconds=0.02, lockName="history").acquire()
+        with ServiceKernelLockFile(os.path.join(self.__lockdir, "kernel-metrics.db"), timeoutSeconds=1):
+            pass
+        sD = ServiceLockMetrics.getSummary()
+        self.assertEqual(sD["history"]["hold"]["count"], 1)
+        self.assertGreaterEqual(sD["history"]["hold"]["max"], 0.01)
+        self.assertEqual(sD["history"]["wait"]["count"], 2)
+        self.assertEqual(sD["history"]["timeouts"], 1)
+        self.assertGreater(sD["history"]["retries"], 0)
+        self.assertEqual(sD["kernel-metrics.db"]["hold"]["count"], 1)
+
+    def testSynchronizedMetrics(self):
+        """Test statistics for oslo-backed synchronized methods"""
+        sds = ServiceDataStore(self.__lockdir, prefix="metrics")
+        sds.set("k", "v")
+        self.assertEqual(sds.get("k"), "v")
+        sD = ServiceLockMetrics.getSummary()
+        self.assertEqual(sD["sessiondatastore.lock"]["hold"]["count"], 2)
+        self.assertEqual(sD["sessiondatastore.lock"]["wait"]["count"], 2)
+
+    def testDump(self):
+        """Test JSON dump and periodic dump"""
+        filePath = os.path.join(self.__lockdir, "lock-metrics.json")
+        if os.path.exists(filePath):
+            os.unlink(filePath)
+        with ServiceLockFile(os.path.join(self.__lockdir, "dump.db"), timeoutSeconds=1):
+            pass
+        ServiceLockMetrics.dump(filePath)
+        with open(filePath) as fin:
+            dD = json.load(fin)
+        self.assertIn("dump.db", dD["locks"])
+        os.unlink(filePath)
+        ServiceLockMetrics.startPeriodicDump(filePath, intervalSeconds=0.05)
+        time.sleep(0.3)
+        ServiceLockMetrics.stopPeriodicDump()
+        self.assertTrue(os.path.exists(filePath))
+
+    def testDisabledOverhead(self):
+        """Test no statistics are collected when disabled and report the per-call overhead"""
+        ServiceLockMetrics.disable()
+        calls = 200000
+
+        def plain():
+            return None
+
+        tBegin = time.perf_counter()
+        for _ in range(calls):
+            if ServiceLockMetrics.enabled:
+                plain()  # pragma: no cover
+        perCall = (time.perf_counter() - tBegin) / calls
+        with ServiceLockFile(os.path.join(self.__lockdir, "disabled.db"), timeoutSeconds=1):
+            pass
+        self.assertEqual(ServiceLockMetrics.getSummary(), {})
+        logger.info("Disabled instrumentation check costs %.1f nanoseconds", perCall * 1.0e9)
+        self.assertLess(perCall, 1.0e-6)
+
+    def testSynchronizedDisabled(self):
+        """Test the synchronized wrapper delegates when disabled"""
+        ServiceLockMetrics.disable()
+
+        @synchronized("metrics-test.lock")
+        def add(a, b):
+            return a + b
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(ServiceLockMetrics.getSummary(), {})
+
+
+def suiteServiceLockMetrics():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceLockMetricsTests("testHistogram"))
+    suite.addTest(ServiceLockMetricsTests("testLockFileMetrics"))
+    suite.addTest(ServiceLockMetricsTests("testSynchronizedMetrics"))
+    suite.addTest(ServiceLockMetricsTests("testDump"))
+    suite.addTest(ServiceLockMetricsTests("testDisabledOverhead"))
+    suite.addTest(ServiceLockMetricsTests("testSynchronizedDisabled"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceLockMetrics())
@@ -0,0 +1,184 @@
+##
+# File: ServiceProfilerTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceProfiler on-demand route profiling --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import json
+import logging
+import os
+import platform
+import pstats
+import shutil
+import time
+import timeit
+import tracemalloc
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceProfiler import ServiceProfiler
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+from wwpdb.utils.ws_utils.ServiceWorkerBase import ServiceWorkerBase
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+ROUTE = "/service/v1/compute/{entry_id}"
+
+
+class _TestWorker(ServiceWorkerBase):
+    def __init__(self, reqObj):
+        super(_TestWorker, self).__init__(reqObj)
+        self.addServices({ROUTE: "_computeOp"})
+
+    def _computeOp(self):
+        sst = ServiceSessionState()
+        sst.setAppDataDict({"total": self._busyLoop(0.05)})
+        return sst
+
+    def _busyLoop(self, seconds):
+        tEnd = time.perf_counter() + seconds
+        dataL = []
+        while time.perf_counter() < tEnd:
+            dataL.append(str(len(dataL)))
+        return len(dataL)
+
+
+class ServiceProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "profiler")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        self.__profileDirPath = os.path.join(self.__topPath, "profiles")
+        ServiceProfiler.setControlFile(None)
+        ServiceProfiler.disable()
+        ServiceProfiler.reset()
+        ServiceProfiler.setProfileDirPath(self.__profileDirPath)
+
+    def tearDown(self):
+        ServiceProfiler.setControlFile(None)
+        ServiceProfiler.disable()
+
+    def __run(self, entryId="D_1"):
+        req = ServiceRequest({"wwpdb_site_id": ["WWPDB_DEPLOY_TEST"]})
+        sst = _TestWorker(req)._run("/service/v1/compute/%s" % entryId)  # pylint: disable=protected-access
+        self.assertFalse(sst.getServiceErrorFlag())
+        return sst
+
+    def __getProfileFiles(self, ext):
+        if not os.path.exists(self.__profileDirPath):
+            return []
+        return sorted(
+            os.path.join(self.__profileDirPath, fn) for fn in os.listdir(self.__profileDirPath) if fn.endswith(ext)
+        )
+
+    def testCProfile(self):
+        """Test cProfile statistics and tracemalloc snapshots are written for a profiled route"""
+        ServiceProfiler.configure(ROUTE, memory=True)
+        self.__run()
+        pathL = self.__getProfileFiles(".pstats")
+        self.assertEqual(len(pathL), 1)
+        self.assertTrue(os.path.basename(pathL[0]).startswith("service_v1_compute_entry_id."))
+        st = pstats.Stats(pathL[0])
+        self.assertTrue(any(fT[2] == "_busyLoop" for fT in st.stats))  # pylint: disable=no-member
+        snapshot = tracemalloc.Snapshot.load(self.__getProfileFiles(".tracemalloc")[0])
+        self.assertGreater(len(snapshot.statistics("filename")), 0)
+        self.assertFalse(tracemalloc.is_tracing())
+        sD = ServiceProfiler.getSummary()[ROUTE]
+        self.assertEqual(sD["profiled"], 1)
+        self.assertEqual(len(sD["last"]), 2)
+
+    def testSample(self):
+        """Test the sampling profiler writes collapsed stacks"""
+        ServiceProfiler.configure(ROUTE, mode="sample", intervalSeconds=0.002)
+        self.__run()
+        pathL = self.__getProfileFiles(".collapsed")
+        self.assertEqual(len(pathL), 1)
+        with open(pathL[0], "r") as ifh:
+            lineL = ifh.read().splitlines()
+        self.assertGreater(len(lineL), 0)
+        self.assertTrue(any("_computeOp" in line and "_busyLoop" in line for line in lineL))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lineL))
+        with self.assertRaises(ValueError):
+            ServiceProfiler.configure(ROUTE, mode="perf")
+
+    def testRateRetention(self):
+        """Test the sampled fraction of requests and the number of profiles kept per route"""
+        ServiceProfiler.configure(ROUTE, rate=0.0)
+        self.__run()
+        self.assertEqual(self.__getProfileFiles(".pstats"), [])
+        ServiceProfiler.setProfileDirPath(self.__profileDirPath, maxFiles=2)
+        ServiceProfiler.configure(ROUTE, rate=1.0)
+        for _ in range(4):
+            self.__run()
+        self.assertEqual(len(self.__getProfileFiles(".pstats")), 2)
+        self.assertEqual(ServiceProfiler.getSummary()[ROUTE]["profiled"], 4)
+        ServiceProfiler.disable(ROUTE)
+        self.assertFalse(ServiceProfiler.enabled)
+
+    def testControlFile(self):
+        """Test routes are profiled and released as the control file changes"""
+        controlPath = os.path.join(self.__topPath, "profile-control.json")
+        os.makedirs(self.__topPath)
+        with open(controlPath, "w") as ofh:
+            json.dump({"profileDirPath": self.__profileDirPath, "routes": {ROUTE: {"rate": 1.0}}}, ofh)
+        ServiceProfiler.setControlFile(controlPath, checkSeconds=0.0)
+        self.__run()
+        self.assertEqual(len(self.__getProfileFiles(".pstats")), 1)
+        time.sleep(0.01)
+        with open(controlPath, "w") as ofh:
+            json.dump({"routes": {}}, ofh)
+        self.__run()
+        self.assertEqual(len(self.__getProfileFiles(".pstats")), 1)
+        self.assertTrue(ServiceProfiler.enabled)
+
+    def testOverhead(self):
+        """Test the cost of the profiling check when profiling is disabled"""
+        num = 200000
+        tD = timeit.timeit(lambda: ServiceProfiler.profile(ROUTE), number=num) / num
+        ServiceProfiler.configure("/service/v1/other")
+        tE = timeit.timeit(lambda: ServiceProfiler.profile(ROUTE), number=num) / num
+        logger.info("Profile check disabled %.3f us other route configured %.3f us", tD * 1.0e6, tE * 1.0e6)
+        self.assertLess(tD, 1.0e-5)
+
+
+def suiteServiceProfiler():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceProfilerTests("testCProfile"))
+    suite.addTest(ServiceProfilerTests("testSample"))
+    suite.addTest(ServiceProfilerTests("testRateRetention"))
+    suite.addTest(ServiceProfilerTests("testControlFile"))
+    suite.addTest(ServiceProfilerTests("testOverhead"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceProfiler())
@@ -0,0 +1,221 @@
+##
+# File: ServiceRequestTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceRequest parameter access --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import logging
+import os
+import platform
+import shutil
+import timeit
+import unittest
+
+from webob import Request
+
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+def _getParamDict():
+    return {
+        "request_path": ["/service/v1/status "],
+        "session_id": [" abc123"],
+        "service_user_id": ["user1"],
+        "top_session_path": ["/tmp/sessions"],
+        "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"],
+        "return_format": ["json"],
+        "count": ["42"],
+        "ratio": ["0.5"],
+    }
+
+
+class ServiceRequestTests(unittest.TestCase):
+    def testValueCache(self):
+        """Test memoized values are normalized and invalidated by the setters"""
+        req = ServiceRequest(_getParamDict())
+        self.assertEqual(req.getRequestPath(), "/service/v1/status")
+        self.assertEqual(req.getSessionId(), "abc123")
+        self.assertEqual(req._getIntegerValue("count"), 42)  # pylint: disable=protected-access
+        self.assertEqual(req._getDoubleValue("ratio"), 0.5)  # pylint: disable=protected-access
+        self.assertEqual(req.getValue("missing"), "")
+        self.assertIsNone(req._getIntegerValue("session_id"))  # pylint: disable=protected-access
+        req.setValue("session_id", "def456")
+        self.assertEqual(req.getSessionId(), "def456")
+        req.setValue("missing", "now")
+        self.assertEqual(req.getValue("missing"), "now")
+        req.setValueList("count", ["7", "8"])
+        self.assertEqual(req._getIntegerValue("count"), 7)  # pylint: disable=protected-access
+        req.setDictionary({"count": 9}, overWrite=True)
+        self.assertEqual(req._getIntegerValue("count"), 9)  # pylint: disable=protected-access
+        req.getDictionary()["session_id"] = ["ghi789"]
+        self.assertEqual(req.getSessionId(), "ghi789")
+        req.setJSON('{"session_id": ["jkl"]}')
+        self.assertEqual(req.getSessionId(), "jkl")
+        # value lists are copies of the stored lists
+        req.getValueList("session_id").insert(0, "mno")
+        self.assertEqual(req.getValueList("session_id"), ["jkl"])
+        self.assertEqual(req.getSessionId(), "jkl")
+        self.assertEqual(req.getServiceUserId(), "")
+
+    def testValueCacheSharedStore(self):
+        """Test memoized values follow changes made through the shared parameter dictionary"""
+        pD = {"a": ["1"]}
+        req = ServiceRequest(pD)
+        self.assertEqual(req.getValue("a"), "1")
+        self.assertEqual(req.getValue("b"), "")
+        self.assertIsNone(req._getIntegerValue("b"))  # pylint: disable=protected-access
+        pD["a"] = ["2"]
+        pD["b"] = ["3"]
+        self.assertTrue(req.exists("b"))
+        self.assertEqual(req.getValue("a"), "2")
+        self.assertEqual(req.getValue("b"), "3")
+        self.assertEqual(req._getIntegerValue("b"), 3)  # pylint: disable=protected-access
+        self.assertEqual(req.getValue("c"), "")
+        rD = req.getDictionary()
+        rD["c"] = ["4"]
+        self.assertEqual(req.getValue("c"), "4")
+        rD["c"][0] = "5"
+        self.assertEqual(req.getValue("c"), "5")
+        self.assertEqual(req._getDoubleValue("c"), 5.0)  # pylint: disable=protected-access
+        del rD["c"]
+        self.assertEqual(req.getValue("c"), "")
+        self.assertIsNone(req._getDoubleValue("c"))  # pylint: disable=protected-access
+
+    def testFromEnviron(self):
+        """Test construction from a WSGI environment with deferred body parsing"""
+        payload = b"data_model\n" * 500
+        wReq = Request.blank(
+            "/service/v1/upload?session_id=abc123&tag=q",
+            POST={"tag": "b", "note": "hello", "file": ("model.cif", payload)},
+        )
+        environ = wReq.environ
+        req = ServiceRequest.fromEnviron(environ, paramDict={"top_session_path": ["/tmp/sessions"]})
+        self.assertEqual(req.getSessionId(), "abc123")
+        self.assertEqual(req.getRequestPath(), "/service/v1/upload")
+        self.assertEqual(req.getTopSessionPath(), "/tmp/sessions")
+        self.assertNotIn("webob._parsed_post_vars", environ)
+        # first access to a body parameter parses the body
+        self.assertEqual(req.getValue("note"), "hello")
+        self.assertIn("webob._parsed_post_vars", environ)
+        self.assertEqual(req.getValueList("tag"), ["q", "b"])
+        fs = req.getRawValue("file")
+        self.assertEqual(fs.filename, "model.cif")
+        self.assertEqual(fs.file.read(), payload)
+        self.assertEqual(req.getValue("missing"), "")
+
+    def testFromEnvironQueryOnly(self):
+        """Test a request without a body and body keys shadowed by explicit settings"""
+        req = ServiceRequest.fromWebObRequest(Request.blank("/status?session_id=s1"))
+        self.assertFalse(req.exists("file"))
+        self.assertEqual(req.getSessionId(), "s1")
+        wReq = Request.blank("/status", POST={"session_id": "body"})
+        req = ServiceRequest.fromWebObRequest(wReq)
+        req.setValue("session_id", "explicit")
+        self.assertTrue(req.exists("session_id"))
+        self.assertIn("session_id", req.getDictionary())
+        self.assertEqual(req.getSessionId(), "explicit")
+
+    def testSessionObjCache(self):
+        """Test the session object is reused until the session parameters change"""
+        topPath = os.path.join(TESTOUTPUT, "requestsession")
+        if os.path.exists(topPath):
+            shutil.rmtree(topPath)
+        req = ServiceRequest({"top_session_path": [topPath], "service_user_id": ["user1"]})
+        sObj = req.getSessionObj(new=True)
+        pth = sObj.getPath()
+        self.assertTrue(os.path.isdir(pth))
+        self.assertIs(req.getSessionObj(), sObj)
+        self.assertIsNot(req.getSessionObj(new=True), sObj)
+        sObj2 = req.getSessionObj()
+        self.assertNotEqual(sObj2.getId(), sObj.getId())
+        req.setValue("session_id", sObj.getId())
+        sObj3 = req.getSessionObj()
+        self.assertIsNot(sObj3, sObj2)
+        self.assertEqual(sObj3.getPath(), pth)
+        self.assertIs(req.getSessionObj(), sObj3)
+        req.setServiceUserId("user2")
+        self.assertIsNone(req.getSessionObj().getPath())
+        req.setServiceUserId("user1")
+        req.setSessionFanOut()
+        sObj4 = req.getSessionObj()
+        self.assertIsNot(sObj4, sObj3)
+        self.assertEqual(sObj4.getPath(), pth)
+        # the existence check is made once
+        sObj4.getPath()
+        os.rename(pth, pth + ".moved")
+        self.assertEqual(sObj4.getPath(), pth)
+        self.assertEqual(sObj4.remakeSessionPath(), pth)
+        self.assertTrue(os.path.isdir(pth))
+
+    def testAccessorBenchmark(self):
+        """Microbenchmark of per-request parameter accessor overhead"""
+        nReq = 20000
+        nAccess = 5
+        pD = _getParamDict()
+
+        def _request(clear):
+            req = ServiceRequest(dict(pD))
+            for _ in range(nAccess):
+                if clear:
+                    req._clearValueCache()  # pylint: disable=protected-access
+                req.getRequestPath()
+                req.getSessionId()
+                req.getServiceUserId()
+                req.getTopSessionPath()
+                req.getSiteId()
+                req.getReturnFormat()
+
+        tMemo = min(timeit.repeat(lambda: _request(False), number=nReq, repeat=3))
+        tClear = min(timeit.repeat(lambda: _request(True), number=nReq, repeat=3))
+        logger.info(
+            "Per request (%d accesses of 6 parameters) memoized %.2f us re-converted each access %.2f us",
+            nAccess,
+            1.0e6 * tMemo / nReq,
+            1.0e6 * tClear / nReq,
+        )
+
+
+def suiteServiceRequest():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceRequestTests("testValueCache"))
+    suite.addTest(ServiceRequestTests("testValueCacheSharedStore"))
+    suite.addTest(ServiceRequestTests("testFromEnviron"))
+    suite.addTest(ServiceRequestTests("testFromEnvironQueryOnly"))
+    suite.addTest(ServiceRequestTests("testSessionObjCache"))
+    suite.addTest(ServiceRequestTests("testAccessorBenchmark"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceRequest())
@@ -3,6 +3,7 @@
 # Date:  26-Dec-2019  E. Peisach
 #
 # Updates:
+#   19-Oct-2026  add streamed binary file tests
 ##
 """
 Test cases for ServiceResponseTests class --
@@ -24,12 +25,16 @@ __license__ = "Creative Commons Attribution 3.0 Unported"
 __version__ = "V0.07"
 
 
+import gzip
 import logging
 import os
 import platform
+import subprocess
 import sys
 import unittest
 
+from webob import Request
+
 from wwpdb.utils.ws_utils.ServiceResponse import ServiceResponse
 
 HERE = os.path.abspath(os.path.dirname(__file__))
@@ -40,6 +45,37 @@ if not os.path.exists(TESTOUTPUT):  # pragma: no cover
 
 logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
 logging.getLogger().setLevel(logging.DEBUG)
+logger = logging.getLogger()
+
+_SERVE_FILE = """
+import resource, sys
+from webob import Request
+from wwpdb.utils.ws_utils.ServiceResponse import ServiceResponse
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+sr = ServiceResponse(returnFormat="binary")
+sr.setBinaryFile(sys.argv[1], stream=sys.argv[2] == "1")
+nBytes = 0
+for chunk in sr.getResponse()(Request.blank("/").environ, lambda status, headerList: None):
+    nBytes += len(chunk)
+print(nBytes, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss)
+"""
+
+
+class _FileWrapper:
+    """Stand-in for a WSGI server wsgi.file_wrapper."""
+
+    instances = []  # noqa: RUF012
+
+    def __init__(self, fh, blockSize):
+        self.fh = fh
+        self.blockSize = blockSize
+        _FileWrapper.instances.append(self)
+
+    def __iter__(self):
+        return iter(lambda: self.fh.read(self.blockSize), b"")
+
+    def close(self):
+        self.fh.close()
 
 
 class ServiceResponseTests(unittest.TestCase):
@@ -109,6 +145,77 @@ class ServiceResponseTests(unittest.TestCase):
         self.__sr.setReturnFormat("html")
         resp = self.__sr.getResponse()  # noqa: F841 pylint: disable=unused-variable
 
+    def __serve(self, resp, **kwargs):
+        environ = Request.blank("/", **kwargs).environ
+        headerD = {}
+
+        def _startResponse(status, headerList):
+            headerD["status"] = status
+            headerD.update(headerList)
+
+        appIter = resp(environ, _startResponse)
+        try:
+            return b"".join(appIter), headerD
+        finally:
+            if hasattr(appIter, "close"):
+                appIter.close()
+
+    def testBinaryStream(self):
+        """Test binary files streamed from chunked reads"""
+        filePath = os.path.join(TESTOUTPUT, "stream-test.cif")
+        data = b"".join(b"ATOM %8d\n" % ii for ii in range(100000))
+        with open(filePath, "wb") as ofh:
+            ofh.write(data)
+        with gzip.open(filePath + ".gz", "wb") as ofh:
+            ofh.write(data)
+        sr = ServiceResponse(returnFormat="binary")
+        self.assertTrue(sr.setBinaryFile(filePath, attachmentFlag=True, md5Digest="abc", stream=True))
+        resp = sr.getResponse()
+        body, headerD = self.__serve(resp)
+        self.assertEqual(body, data)
+        self.assertEqual(headerD["Content-Length"], str(len(data)))
+        self.assertEqual(headerD["Content-Disposition"], "attachment; filename=stream-test.cif")
+        self.assertEqual(headerD["CHECKSUM_MD5"], "abc")
+        # server file wrapper
+        body, headerD = self.__serve(sr.getResponse(), environ={"wsgi.file_wrapper": _FileWrapper})
+        self.assertEqual(body, data)
+        self.assertEqual(headerD["Content-Length"], str(len(data)))
+        self.assertEqual(len(_FileWrapper.instances), 1)
+        self.assertTrue(_FileWrapper.instances[0].fh.closed)
+        body, headerD = self.__serve(sr.getResponse(), method="HEAD")
+        self.assertEqual(body, b"")
+        self.assertEqual(headerD["Content-Length"], str(len(data)))
+        # decompressed stream
+        self.assertTrue(sr.setBinaryFile(filePath + ".gz", serveCompressed=False, stream=True))
+        body, headerD = self.__serve(sr.getResponse())
+        self.assertEqual(body, data)
+        self.assertNotIn("Content-Length", headerD)
+        # small files are held in memory by default
+        self.assertTrue(sr.setBinaryFile(filePath))
+        self.assertEqual(sr.getResponse().body, data)
+
+    def testBinaryStreamMemory(self):
+        """Test peak memory serving a large file does not depend on the file size"""
+        filePath = os.path.join(TESTOUTPUT, "stream-large.bin")
+        nBytes = 256 * 1024 * 1024
+        with open(filePath, "wb") as ofh:
+            ofh.truncate(nBytes)
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(HERE))
+        rssD = {}
+        try:
+            for stream in ("1", "0"):
+                out = subprocess.check_output([sys.executable, "-c", _SERVE_FILE, filePath, stream], env=env)  # noqa: S603
+                nServed, rssKb = [int(v) for v in out.split()]
+                self.assertEqual(nServed, nBytes)
+                rssD[stream] = rssKb
+        finally:
+            os.remove(filePath)
+        logger.info(
+            "Serving %d MB - peak RSS growth streamed %d kB in memory %d kB", nBytes >> 20, rssD["1"], rssD["0"]
+        )
+        self.assertLess(rssD["1"] * 1024, 32 * 1024 * 1024)
+        self.assertGreater(rssD["0"] * 1024, nBytes // 2)
+
 
 def suiteServiceResponse():  # pragma: no cover
     suite = unittest.TestSuite()
@@ -116,6 +223,8 @@ def suiteServiceResponse():  # pragma: no cover
     suite.addTest(ServiceResponseTests("testSetData"))
     suite.addTest(ServiceResponseTests("testHtml"))
     suite.addTest(ServiceResponseTests("testSet"))
+    suite.addTest(ServiceResponseTests("testBinaryStream"))
+    suite.addTest(ServiceResponseTests("testBinaryStreamMemory"))
     return suite
 
 
@@ -0,0 +1,231 @@
+##
+# File: ServiceResultCacheTests.py
+# Date:  19-Oct-2026
+# Updates:
+##
+"""
+Test cases for ServiceResultCache repeated request result caching --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import io
+import logging
+import os
+import platform
+import shutil
+import sqlite3
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceResultCache import ServiceResultCache
+from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+from wwpdb.utils.ws_utils.ServiceTimingMetrics import ServiceTimingMetrics
+from wwpdb.utils.ws_utils.ServiceWorkerBase import ServiceWorkerBase
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class _Upload:
+    """Stand-in for an uploaded file form field."""
+
+    def __init__(self, filename, content):
+        self.filename = filename
+        self.file = io.BytesIO(content)
+
+
+class _TestWorker(ServiceWorkerBase):
+    callCount = 0
+
+    def __init__(self, reqObj):
+        super(_TestWorker, self).__init__(reqObj)
+        self.addServices(
+            {
+                "/service/v1/compute/{entry_id}": {"opName": "_computeOp", "cacheable": True},
+                "/service/v1/status": "_computeOp",
+            }
+        )
+
+    def _computeOp(self):
+        _TestWorker.callCount += 1
+        time.sleep(0.02)
+        sst = ServiceSessionState()
+        entryId = self._reqObj.getValue("entry_id")
+        if entryId == "D_0":
+            sst.setServiceError(msg="Entry not found")
+        else:
+            sst.setAppDataDict({"entry_id": entryId, "count": _TestWorker.callCount})
+        return sst
+
+
+class ServiceResultCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "resultcache")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        os.makedirs(self.__topPath)
+        self.__cacheDirPath = os.path.join(self.__topPath, "result-cache")
+        ServiceResultCache.reset()
+        _TestWorker.callCount = 0
+
+    def testKey(self):
+        """Test cache keys ignore per-request parameters and include uploaded file digests"""
+        rc = ServiceResultCache(self.__cacheDirPath)
+        k1 = rc.getKey("/v1/a", ServiceRequest({"x": ["1"], "y": ["2"], "session_id": ["s1"]}))
+        k2 = rc.getKey("/v1/a", ServiceRequest({"y": ["2"], "x": ["1"], "session_id": ["s2"]}))
+        self.assertEqual(k1, k2)
+        self.assertNotEqual(k1, rc.getKey("/v1/b", ServiceRequest({"x": ["1"], "y": ["2"]})))
+        self.assertNotEqual(k1, rc.getKey("/v1/a", ServiceRequest({"x": ["1"], "y": ["3"]})))
+        kf1 = rc.getKey("/v1/a", ServiceRequest({"file": [_Upload("a.cif", b"data_1")]}))
+        kf2 = rc.getKey("/v1/a", ServiceRequest({"file": [_Upload("a.cif", b"data_1")]}))
+        kf3 = rc.getKey("/v1/a", ServiceRequest({"file": [_Upload("a.cif", b"data_2")]}))
+        self.assertEqual(kf1, kf2)
+        self.assertNotEqual(kf1, kf3)
+        self.assertIsNone(rc.getKey("/v1/a", ServiceRequest({"x": [object()]})))
+
+    def testStore(self):
+        """Test results round trip and results referencing modified files are discarded"""
+        rc = ServiceResultCache(self.__cacheDirPath)
+        filePath = os.path.join(self.__topPath, "report.txt")
+        with open(filePath, "w") as ofh:
+            ofh.write("report")
+        sst = ServiceSessionState()
+        sst.setAppDataDict({"a": [1, 2]})
+        sst.setDownload("report.txt", filePath, contentType="text/plain")
+        sst.setServiceWarning("partial", format="files")
+        self.assertTrue(rc.set("k1", "/v1/a", sst))
+        errSst = ServiceSessionState()
+        errSst.setServiceError(msg="failed")
+        self.assertFalse(rc.set("k2", "/v1/a", errSst))
+        cSst = rc.get("k1", "/v1/a")
+        self.assertEqual(cSst.getAppDataDict(), {"a": [1, 2]})
+        self.assertEqual(cSst.getDownloadList(), [("report.txt", filePath, "text/plain", None)])
+        self.assertEqual(cSst.getResponseFormat(), "files")
+        self.assertEqual(cSst.getServiceWarningMessage(), "partial")
+        self.assertIsNone(rc.get("k2", "/v1/a"))
+        with open(filePath, "a") as ofh:
+            ofh.write(" changed")
+        self.assertIsNone(rc.get("k1", "/v1/a"))
+        self.assertEqual(rc.getUsage()["entries"], 0)
+        self.assertEqual(
+            ServiceResultCache.getSummary()["/v1/a"], {"hits": 1, "misses": 2, "stores": 1, "evictions": 1}
+        )
+
+    def testEviction(self):
+        """Test the least recently used entries are evicted beyond the entry and size bounds"""
+        rc = ServiceResultCache(self.__cacheDirPath, maxEntries=3)
+        for ii in range(3):
+            sst = ServiceSessionState()
+            sst.setAppDataDict({"ii": ii})
+            rc.set("k%d" % ii, "/v1/a", sst)
+            time.sleep(0.01)
+        self.assertIsNotNone(rc.get("k0", "/v1/a"))
+        rc.set("k3", "/v1/a", sst)
+        self.assertIsNone(rc.get("k1", "/v1/a"))
+        self.assertIsNotNone(rc.get("k0", "/v1/a"))
+        self.assertEqual(rc.getUsage()["entries"], 3)
+        rc.clear()
+        rc = ServiceResultCache(self.__cacheDirPath, maxBytes=4096)
+        for ii in range(20):
+            sst = ServiceSessionState()
+            sst.setAppDataDict({"ii": ii, "data": "x" * 1000})
+            rc.set("k%d" % ii, "/v1/a", sst)
+        uD = rc.getUsage()
+        self.assertLessEqual(uD["bytes"], 4096)
+        self.assertGreater(uD["entries"], 0)
+        self.assertIsNotNone(rc.get("k19", "/v1/a"))
+        sst.setAppDataDict({"data": "x" * 8192})
+        self.assertFalse(rc.set("big", "/v1/a", sst))
+
+    def testRecover(self):
+        """Test a corrupt cache database is rebuilt and a locked one is left in place"""
+        rc = ServiceResultCache(self.__cacheDirPath, timeoutSeconds=0.05)
+        sst = ServiceSessionState()
+        sst.setAppDataDict({"a": 1})
+        self.assertTrue(rc.set("k1", "/v1/a", sst))
+        with open(rc.getFilePath(), "wb") as ofh:
+            ofh.write(b"not a database" * 512)
+        self.assertIsNone(rc.get("k1", "/v1/a"))
+        self.assertFalse(os.path.exists(rc.getFilePath()))
+        self.assertTrue(rc.set("k1", "/v1/a", sst))
+        self.assertEqual(rc.get("k1", "/v1/a").getAppDataDict(), {"a": 1})
+        conn = sqlite3.connect(rc.getFilePath())
+        try:
+            conn.execute("BEGIN EXCLUSIVE")
+            self.assertFalse(rc.set("k2", "/v1/a", sst))
+        finally:
+            conn.close()
+        self.assertEqual(rc.get("k1", "/v1/a").getAppDataDict(), {"a": 1})
+
+    def testWorker(self):
+        """Test repeated requests to cacheable routes skip the operation"""
+        ServiceTimingMetrics.reset()
+        ServiceTimingMetrics.enable()
+        try:
+            rc = ServiceResultCache(self.__cacheDirPath)
+            dtL = []
+            for entryId in ["D_1", "D_1", "D_2", "D_1", "D_0", "D_0"]:
+                req = ServiceRequest({"top_session_path": [self.__topPath], "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"]})
+                worker = _TestWorker(req)
+                worker.setResultCache(rc)
+                tBegin = time.perf_counter()
+                sst = worker._run("/service/v1/compute/%s" % entryId)  # pylint: disable=protected-access
+                dtL.append(time.perf_counter() - tBegin)
+                if entryId == "D_1":
+                    self.assertEqual(sst.getAppDataDict(), {"entry_id": "D_1", "count": 1})
+            # D_1 computed once, D_2 once and the failing D_0 twice
+            self.assertEqual(_TestWorker.callCount, 4)
+            sD = ServiceResultCache.getSummary()["/service/v1/compute/{entry_id}"]
+            self.assertEqual(sD["hits"], 2)
+            self.assertEqual(sD["stores"], 2)
+            self.assertEqual(
+                ServiceTimingMetrics.getSummary()["/service/v1/compute/{entry_id}"]["cached"]["total"]["count"], 2
+            )
+            logger.info("Computed %.6f s cached %.6f s", dtL[0], dtL[1])
+            self.assertLess(dtL[1], dtL[0])
+            req = ServiceRequest({"top_session_path": [self.__topPath], "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"]})
+            worker = _TestWorker(req)
+            worker.setResultCache(maxBytes=1024 * 1024)
+            worker._run("/service/v1/status")  # pylint: disable=protected-access
+            worker._run("/service/v1/status")  # pylint: disable=protected-access
+            self.assertEqual(_TestWorker.callCount, 6)
+        finally:
+            ServiceTimingMetrics.disable()
+
+
+def suiteServiceResultCache():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceResultCacheTests("testKey"))
+    suite.addTest(ServiceResultCacheTests("testStore"))
+    suite.addTest(ServiceResultCacheTests("testEviction"))
+    suite.addTest(ServiceResultCacheTests("testRecover"))
+    suite.addTest(ServiceResultCacheTests("testWorker"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceResultCache())
@@ -0,0 +1,167 @@
+##
+# File: ServiceRouterTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceRouter and ServiceWorkerBase request routing --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import logging
+import os
+import platform
+import re
+import timeit
+import unittest
+
+from webob import Request
+
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceRouter import ServiceRouter
+from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+from wwpdb.utils.ws_utils.ServiceWorkerBase import ServiceWorkerBase
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class _TestWorker(ServiceWorkerBase):
+    def __init__(self, reqObj):
+        super(_TestWorker, self).__init__(reqObj)
+        self.addServices(
+            {
+                "/service/v1/status": "_statusOp",
+                "/service/v1/entry/{entry_id}": ("_entryOp", ["GET"]),
+                "/service/v1/entry/{entry_id}/files/{file_path:path}": "_fileOp",
+            }
+        )
+
+    def __state(self, **kwargs):
+        sst = ServiceSessionState()
+        sst.setAppDataDict(kwargs)
+        return sst
+
+    def _statusOp(self):
+        return self.__state(op="status")
+
+    def _entryOp(self):
+        return self.__state(op="entry", entry_id=self._reqObj.getValue("entry_id"))
+
+    def _fileOp(self):
+        return self.__state(
+            op="file", entry_id=self._reqObj.getValue("entry_id"), path=self._reqObj.getValue("file_path")
+        )
+
+
+class ServiceRouterTests(unittest.TestCase):
+    def testMatch(self):
+        """Test exact, parameter and rest-of-path routes with method matching"""
+        router = ServiceRouter()
+        router.add("/v1/status", "status")
+        router.add("/v1/entry/{entry_id}", "getEntry", methods=["GET"])
+        router.add("/v1/entry/{entry_id}", "putEntry", methods=["put"])
+        router.add("/v1/entry/latest", "latest")
+        router.add("/v1/entry/{entry_id}/files/{path:path}", "file")
+        router.add("/v1/user/{user_id}/session/{session_id}", "session")
+        self.assertEqual(len(router), 6)
+        self.assertEqual(router.match("/v1/status"), ("status", {}))
+        self.assertEqual(router.match("/v1/status", "POST"), ("status", {}))
+        self.assertEqual(router.match("/v1/entry/D_1", "GET"), ("getEntry", {"entry_id": "D_1"}))
+        self.assertEqual(router.match("/v1/entry/D_1", "PUT"), ("putEntry", {"entry_id": "D_1"}))
+        self.assertEqual(router.match("/v1/entry/D_1", "DELETE"), (None, None))
+        self.assertEqual(router.getAllowedMethods("/v1/entry/D_1"), ["GET", "PUT"])
+        self.assertEqual(router.match("/v1/entry/D_1")[0], "getEntry")
+        self.assertEqual(router.match("/v1/entry/latest", "GET"), ("latest", {}))
+        self.assertEqual(router.match("/v1/entry/D_1/files/a/b.cif"), ("file", {"entry_id": "D_1", "path": "a/b.cif"}))
+        self.assertEqual(router.match("/v1/user/u1/session/s1")[1], {"user_id": "u1", "session_id": "s1"})
+        self.assertEqual(router.match("/v1/entry/"), (None, None))
+        self.assertEqual(router.match("/v1/status/"), (None, None))
+        self.assertEqual(router.match("/v2/status"), (None, None))
+        self.assertEqual(router.getAllowedMethods("/v2/status"), [])
+        self.assertRaises(ValueError, router.add, "/v1/{rest:path}/x", "bad")
+        self.assertRaises(ValueError, router.add, "/v1/{id:int}", "bad")
+
+    def testWorkerRun(self):
+        """Test dispatch of worker operations with captured path parameters"""
+        wReq = Request.blank("/service/v1/entry/D_1000000001/files/model/x.cif?wwpdb_site_id=WWPDB_DEPLOY_TEST")
+        sst = _TestWorker(ServiceRequest.fromWebObRequest(wReq))._run()
+        self.assertEqual(sst.getAppDataDict(), {"op": "file", "entry_id": "D_1000000001", "path": "model/x.cif"})
+        wReq = Request.blank("/service/v1/entry/D_1?wwpdb_site_id=WWPDB_DEPLOY_TEST", POST={"a": "b"})
+        sst = _TestWorker(ServiceRequest.fromWebObRequest(wReq))._run()
+        self.assertEqual(sst.getServiceErrorMessage(), "Method not allowed")
+        reqObj = ServiceRequest({"wwpdb_site_id": ["WWPDB_DEPLOY_TEST"]})
+        worker = _TestWorker(reqObj)
+        self.assertEqual(worker._run("/service/v1/entry/D_2").getAppDataDict()["entry_id"], "D_2")  # pylint: disable=protected-access
+        self.assertEqual(worker._run("/service/v1/status").getAppDataDict(), {"op": "status"})  # pylint: disable=protected-access
+        self.assertEqual(worker._run("/service/v1/unknown").getServiceErrorMessage(), "Unknown operation")  # pylint: disable=protected-access
+
+    def testRoutingBenchmark(self):
+        """Compare routing time of the compiled table with a linear scan of route expressions"""
+        nLoop = 20000
+        for nRoutes in (10, 100, 1000):
+            router = ServiceRouter()
+            regexL = []
+            for ii in range(nRoutes):
+                if ii % 2:
+                    pattern = "/service/v1/op%d/{entry_id}/files/{file_id}" % ii
+                    regex = "/service/v1/op%d/(?P<entry_id>[^/]+)/files/(?P<file_id>[^/]+)" % ii
+                else:
+                    pattern = regex = "/service/v1/op%d/status" % ii
+                router.add(pattern, ii)
+                regexL.append((re.compile(regex + "$"), ii))
+            pathL = ["/service/v1/op%d/D_1/files/F_2" % (nRoutes - 1), "/service/v1/op%d/status" % (nRoutes - 2)]
+
+            def _scan(path, regexL=regexL):
+                for rx, target in regexL:
+                    mt = rx.match(path)
+                    if mt:
+                        return target, mt.groupdict()
+                return None, None
+
+            for path in pathL:
+                self.assertEqual(router.match(path), _scan(path))
+            tRouter = min(timeit.repeat(lambda: [router.match(p) for p in pathL], number=nLoop, repeat=3))  # noqa: B023
+            tScan = min(timeit.repeat(lambda: [_scan(p) for p in pathL], number=nLoop // 10, repeat=3))  # noqa: B023
+            logger.info(
+                "Routes %4d compiled table %.2f us linear scan %.2f us per lookup",
+                nRoutes,
+                1.0e6 * tRouter / (nLoop * len(pathL)),
+                1.0e6 * tScan / (nLoop // 10 * len(pathL)),
+            )
+
+
+def suiteServiceRouter():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceRouterTests("testMatch"))
+    suite.addTest(ServiceRouterTests("testWorkerRun"))
+    suite.addTest(ServiceRouterTests("testRoutingBenchmark"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceRouter())
@@ -1,9 +1,53 @@
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import time
 import unittest
 
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
 from wwpdb.utils.ws_utils.ServiceSessionFactory import ServiceSessionFactory
 
+HERE = os.path.abspath(os.path.dirname(__file__))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.INFO, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logger = logging.getLogger()
+
+# Number of sessions for the layout benchmark (e.g. 100000 or 1000000 for a full run)
+BENCH_SESSION_COUNT = int(os.environ.get("WS_UTILS_BENCH_SESSION_COUNT", "2000"))
+
+
+def _assignIds(count, queue):
+    ssf = ServiceSessionFactory()
+    queue.put([ssf.assignId() for _ in range(count)])
+
+
+class _CollidingSessionFactory(ServiceSessionFactory):
+    """Returns a fixed identifier for the first assignments."""
+
+    def __init__(self, uidL, **kwargs):
+        super().__init__(**kwargs)
+        self.__uidL = list(uidL)
+
+    def assignId(self):
+        if self.__uidL:
+            self.setId(self.__uidL.pop(0))
+            return self.getId()
+        return super().assignId()
+
 
 class ServiceSessionFactoryTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "session-factory", self._testMethodName)
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        os.makedirs(self.__topPath)
+
     def test_assignid(self):
         ssf = ServiceSessionFactory()
         ret = ssf.getId()
@@ -11,6 +55,100 @@ class ServiceSessionFactoryTests(unittest.TestCase):
         ret = ssf.assignId()
         self.assertIsNotNone(ret)
 
+    def test_assignid_unique_multiprocess(self):
+        """Create a million identifiers in several processes with zero collisions"""
+        numProc = 4
+        perProc = 250000
+        ctx = multiprocessing.get_context("fork")
+        queue = ctx.Queue()
+        pL = [ctx.Process(target=_assignIds, args=(perProc, queue)) for _ in range(numProc)]
+        for pr in pL:
+            pr.start()
+        uidS = set()
+        for _ in pL:
+            uidS.update(queue.get(timeout=120))
+        for pr in pL:
+            pr.join()
+        self.assertEqual(len(uidS), numProc * perProc)
+        self.assertTrue(all(len(uid) == 40 for uid in list(uidS)[:100]))
+
+    def test_new_session_claim(self):
+        """A colliding identifier is detected by the atomic directory claim and replaced"""
+        ssf = ServiceSessionFactory(topPath=self.__topPath, serviceUserId="USER1", fanOut=True)
+        pth = ssf.makeNewSessionPath()
+        uid = ssf.getId()
+        self.assertTrue(os.path.isdir(pth))
+        ssf2 = _CollidingSessionFactory([uid], topPath=self.__topPath, serviceUserId="USER1", fanOut=True)
+        pth2 = ssf2.makeNewSessionPath()
+        self.assertNotEqual(ssf2.getId(), uid)
+        self.assertNotEqual(pth2, pth)
+        self.assertTrue(os.path.isdir(pth2))
+        ssf3 = _CollidingSessionFactory([uid] * 3, topPath=self.__topPath, serviceUserId="USER1", fanOut=True)
+        self.assertIsNone(ssf3.makeNewSessionPath(maxTries=3))
+
+    def test_fanout(self):
+        ssf = ServiceSessionFactory(topPath=self.__topPath, serviceUserId="USER1", fanOut=True)
+        uid = ssf.assignId()
+        self.assertIsNone(ssf.getPath())
+        pth = ssf.makeSessionPath()
+        self.assertEqual(pth, os.path.join(self.__topPath, "sessions", "USER1", uid[0:2], uid[2:4], uid))
+        self.assertEqual(ssf.getPath(), pth)
+        self.assertEqual(ssf.getRelativePath(), os.path.join("/sessions", "USER1", uid[0:2], uid[2:4], uid))
+
+    def test_fanout_legacy(self):
+        # Session created in the flat layout is found after fan-out is enabled
+        ssf = ServiceSessionFactory(topPath=self.__topPath, serviceUserId="USER1")
+        uid = ssf.assignId()
+        flatPth = ssf.makeSessionPath()
+        self.assertEqual(flatPth, os.path.join(self.__topPath, "sessions", "USER1", uid))
+        ssf2 = ServiceSessionFactory(topPath=self.__topPath, serviceUserId="USER1", fanOut=True)
+        ssf2.setId(uid)
+        self.assertEqual(ssf2.getPath(), flatPth)
+        self.assertEqual(ssf2.getRelativePath(), os.path.join("/sessions", "USER1", uid))
+        self.assertEqual(ssf2.makeSessionPath(), flatPth)
+        self.assertEqual(ssf2.remakeSessionPath(), flatPth)
+
+    def test_request_fanout(self):
+        reqObj = ServiceRequest({})
+        reqObj.setTopSessionPath(self.__topPath)
+        reqObj.setServiceUserId("USER2")
+        reqObj.setSessionFanOut(True)
+        sObj = reqObj.getSessionObj(new=True)
+        uid = sObj.getId()
+        self.assertEqual(sObj.getPath(), os.path.join(self.__topPath, "sessions", "USER2", uid[0:2], uid[2:4], uid))
+        sObj2 = reqObj.getSessionObj()
+        self.assertEqual(sObj2.getPath(), sObj.getPath())
+
+    def test_layout_benchmark(self):
+        """Compare session create and lookup times for the flat and fan-out layouts"""
+        logLevel = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            uidL = ["%040x" % random.getrandbits(160) for _ in range(BENCH_SESSION_COUNT)]
+            lookupL = random.sample(uidL, min(1000, len(uidL)))
+            for fanOut in (False, True):
+                ssf = ServiceSessionFactory(topPath=self.__topPath, serviceUserId="BENCH%d" % fanOut, fanOut=fanOut)
+                tBegin = time.perf_counter()
+                for uid in uidL:
+                    ssf.setId(uid)
+                    ssf.makeSessionPath()
+                tCreate = time.perf_counter() - tBegin
+                tBegin = time.perf_counter()
+                for uid in lookupL:
+                    ssf.setId(uid)
+                    self.assertIsNotNone(ssf.getPath())
+                tLookup = time.perf_counter() - tBegin
+                logger.info(
+                    "fanOut %-5r sessions %d create %.2f us/session lookup %.2f us/session",
+                    fanOut,
+                    len(uidL),
+                    1.0e6 * tCreate / len(uidL),
+                    1.0e6 * tLookup / len(lookupL),
+                )
+        finally:
+            logger.setLevel(logLevel)
+            shutil.rmtree(self.__topPath)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,148 @@
+##
+# File: ServiceSessionIndexTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceSessionIndex per-user session listing --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import logging
+import os
+import platform
+import shutil
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceHistory import ServiceHistory
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceSessionIndex import ServiceSessionIndex
+from wwpdb.utils.ws_utils.ServiceSessionSweeper import ServiceSessionSweeper
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class ServiceSessionIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "sessionindex")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        self.__userId = "indexuser"
+        self.__userPath = os.path.join(self.__topPath, "sessions", self.__userId)
+
+    def __newSession(self):
+        req = ServiceRequest({"top_session_path": [self.__topPath], "service_user_id": [self.__userId]})
+        req.setSessionIndexing()
+        return req.getSessionObj(new=True)
+
+    def testQuery(self):
+        """Test filters, ordering and pagination"""
+        index = ServiceSessionIndex(self.__userPath)
+        self.assertEqual(index.getSessions(), [])
+        for ii in range(10):
+            index.add("s%02d" % ii, created=1000.0 + ii)
+        index.setStatus("s03", "completed")
+        index.setStatus("s04", "failed")
+        index.touch("s05", size=123)
+        self.assertEqual(index.getCount(), 10)
+        self.assertEqual(index.getCount(status=["completed", "failed"]), 2)
+        self.assertEqual(index.getSessions()[0]["sid"], "s05")
+        self.assertEqual(index.getSessions()[0]["size"], 123)
+        pageL = index.getSessions(orderBy="created", descending=False, limit=4, offset=4)
+        self.assertEqual([row["sid"] for row in pageL], ["s04", "s05", "s06", "s07"])
+        self.assertEqual(len(index.getSessions(createdAfter=1005.0, createdBefore=1008.0)), 3)
+        self.assertEqual(index.getSessions(status="completed")[0]["sid"], "s03")
+        self.assertRaises(ValueError, index.getSessions, orderBy="sid; DROP TABLE sessions")
+        self.assertTrue(index.remove(["s00", "s01"]))
+        self.assertEqual(index.getCount(), 8)
+
+    def testMaintenance(self):
+        """Test the index is maintained by session creation and the sweeper"""
+        sidL = [self.__newSession().getId() for _ in range(3)]
+        index = ServiceSessionIndex(self.__userPath)
+        self.assertEqual(sorted(row["sid"] for row in index.getSessions()), sorted(sidL))
+        ServiceHistory(historyPath=self.__userPath).add(sidL[0], "completed")
+        rD = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=3600, rebuildIndex=True).sweep()
+        self.assertEqual(rD["removed"], 0)
+        self.assertEqual(index.getSessions(status="completed")[0]["sid"], sidL[0])
+        ServiceSessionSweeper(self.__topPath, maxAgeSeconds=0, statusList=["completed"]).sweep()
+        self.assertEqual(index.getCount(), 2)
+
+    def testTouch(self):
+        """Test index updates after the schema is set up and after the index file is removed"""
+        index = ServiceSessionIndex(self.__userPath)
+        self.assertTrue(index.touch("s1", size=10))
+        num = 200
+        tBegin = time.perf_counter()
+        for _ in range(num):
+            self.assertTrue(ServiceSessionIndex(self.__userPath).touch("s1"))
+        logger.info("Session index touch %.3f ms", (time.perf_counter() - tBegin) / num * 1e3)
+        os.remove(index.getFilePath())
+        self.assertTrue(ServiceSessionIndex(self.__userPath).touch("s2"))
+        self.assertEqual([row["sid"] for row in index.getSessions()], ["s2"])
+
+    def testListingBenchmark(self):
+        """Compare a page from the index with a listing and stat of the user directory"""
+        nSess = int(os.environ.get("WS_UTILS_BENCH_SESSION_COUNT", "500"))
+        index = ServiceSessionIndex(self.__userPath)
+        rowL = [
+            {"sid": "%040x" % ii, "created": float(ii), "last_access": float(ii), "status": "created", "size": 0}
+            for ii in range(nSess)
+        ]
+        index.rebuild(rowL)
+        for row in rowL:
+            os.makedirs(os.path.join(self.__userPath, row["sid"]))
+        tBegin = time.perf_counter()
+        pageL = index.getSessions(limit=20, offset=40)
+        tIndex = time.perf_counter() - tBegin
+        tBegin = time.perf_counter()
+        scanL = sorted(
+            (os.stat(os.path.join(self.__userPath, sid)).st_mtime, sid)
+            for sid in os.listdir(self.__userPath)
+            if not sid.endswith(".sqlite")
+        )
+        tScan = time.perf_counter() - tBegin
+        self.assertEqual(len(pageL), 20)
+        self.assertEqual(len(scanL), nSess)
+        logger.info(
+            "Listing one page of %d sessions index %.2f ms directory scan %.2f ms", nSess, tIndex * 1e3, tScan * 1e3
+        )
+
+
+def suiteServiceSessionIndex():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceSessionIndexTests("testQuery"))
+    suite.addTest(ServiceSessionIndexTests("testMaintenance"))
+    suite.addTest(ServiceSessionIndexTests("testTouch"))
+    suite.addTest(ServiceSessionIndexTests("testListingBenchmark"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceSessionIndex())
@@ -0,0 +1,164 @@
+##
+# File: ServiceSessionPoolTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceSessionPool pre-created session directories --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import logging
+import os
+import platform
+import shutil
+import threading
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceSessionFactory import ServiceSessionFactory
+from wwpdb.utils.ws_utils.ServiceSessionPool import ServiceSessionPool
+from wwpdb.utils.ws_utils.ServiceSessionSweeper import ServiceSessionSweeper
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class ServiceSessionPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "sessionpool")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        self.__userId = "pooluser"
+        self.__userPath = os.path.join(self.__topPath, "sessions", self.__userId)
+
+    def tearDown(self):
+        ServiceSessionPool.stopAll()
+
+    def testClaim(self):
+        """Test refill, claim by rename and hit/miss metrics"""
+        pool = ServiceSessionPool(self.__userPath, size=4)
+        self.assertEqual(pool.refill(), 4)
+        self.assertEqual(pool.refill(), 0)
+        uidS = set()
+        for _ in range(4):
+            uid, pth = pool.claim(pathFn=lambda uid: os.path.join(self.__userPath, uid))
+            self.assertIsNotNone(uid)
+            self.assertTrue(os.path.isdir(pth))
+            uidS.add(uid)
+        self.assertEqual(len(uidS), 4)
+        self.assertEqual(pool.claim(targetPath=os.path.join(self.__userPath, "x")), (None, None))
+        mD = pool.getMetrics()
+        self.assertEqual(mD["hits"], 4)
+        self.assertEqual(mD["misses"], 1)
+        self.assertEqual(mD["refilled"], 4)
+        self.assertEqual(mD["refill_latency"]["count"], 1)
+        self.assertEqual(os.listdir(pool.getPoolPath()), [])
+
+    def testConcurrentClaim(self):
+        """Test concurrent claims from a pool shared by two pool objects never hand out the same directory"""
+        poolA = ServiceSessionPool(self.__userPath, size=64)
+        poolB = ServiceSessionPool(self.__userPath, size=64)
+        poolA.refill()
+        resultL = []
+
+        def worker(pool):
+            while True:
+                uid, _ = pool.claim(pathFn=lambda uid: os.path.join(self.__userPath, uid))
+                if uid is None:
+                    break
+                resultL.append(uid)
+
+        thL = [threading.Thread(target=worker, args=(pool,)) for pool in [poolA, poolB, poolA, poolB]]
+        for th in thL:
+            th.start()
+        for th in thL:
+            th.join()
+        self.assertEqual(len(resultL), 64)
+        self.assertEqual(len(set(resultL)), 64)
+
+    def testFactoryPool(self):
+        """Test new sessions from the pool in flat and fan-out layouts"""
+        for fanOut in [False, True]:
+            sObj = ServiceSessionFactory(topPath=self.__topPath, serviceUserId=self.__userId, fanOut=fanOut, poolSize=4)
+            pool = ServiceSessionPool.getPool(self.__userPath, size=4, fanOut=fanOut)
+            for _ in range(50):
+                if os.access(pool.getPoolPath(), os.F_OK) and len(os.listdir(pool.getPoolPath())) >= 4:
+                    break
+                time.sleep(0.02)
+            pth = sObj.makeNewSessionPath()
+            self.assertEqual(pth, sObj.getPath())
+            self.assertEqual(os.path.basename(pth), sObj.getId())
+            self.assertEqual(pool.getMetrics()["hits"], 1)
+            sObj.setId(("b" if fanOut else "a") * 40)
+            self.assertEqual(sObj.makeSessionPath(), sObj.getPath())
+            self.assertEqual(pool.getMetrics()["hits"], 2)
+        rD = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=0).sweep()
+        self.assertEqual(rD["removed"], 4)
+        self.assertTrue(os.path.isdir(pool.getPoolPath()))
+
+    def testRequestPool(self):
+        """Test pooled session creation through ServiceRequest"""
+        req = ServiceRequest({"top_session_path": [self.__topPath], "service_user_id": [self.__userId]})
+        req.setSessionPoolSize(2)
+        sObj = req.getSessionObj(new=True)
+        self.assertTrue(os.path.isdir(sObj.getPath()))
+        self.assertEqual(req.getSessionPoolSize(), 2)
+
+    def testPoolLatency(self):
+        """Compare new session latency with and without a refilled pool"""
+        nSess = 200
+        sObj = ServiceSessionFactory(topPath=self.__topPath, serviceUserId=self.__userId, fanOut=True)
+        tBegin = time.perf_counter()
+        for _ in range(nSess):
+            sObj.makeNewSessionPath()
+        tDirect = time.perf_counter() - tBegin
+        pool = ServiceSessionPool(self.__userPath, size=nSess, fanOut=True)
+        pool.refill()
+        sObj.setPoolSize(nSess)
+        tBegin = time.perf_counter()
+        for _ in range(nSess):
+            uid, _ = pool.claim(pathFn=lambda uid: os.path.join(self.__userPath, pool.getUidPath(uid)))
+            self.assertIsNotNone(uid)
+        tPool = time.perf_counter() - tBegin
+        logger.info("New session latency direct %.1f us pooled %.1f us", 1.0e6 * tDirect / nSess, 1.0e6 * tPool / nSess)
+        logger.info("Pool metrics %r", pool.getMetrics())
+
+
+def suiteServiceSessionPool():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceSessionPoolTests("testClaim"))
+    suite.addTest(ServiceSessionPoolTests("testConcurrentClaim"))
+    suite.addTest(ServiceSessionPoolTests("testFactoryPool"))
+    suite.addTest(ServiceSessionPoolTests("testRequestPool"))
+    suite.addTest(ServiceSessionPoolTests("testPoolLatency"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceSessionPool())
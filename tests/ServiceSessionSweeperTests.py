@@ -0,0 +1,204 @@
+##
+# File: ServiceSessionSweeperTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceSessionSweeper session expiry --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import logging
+import os
+import platform
+import shutil
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceHistory import ServiceHistory
+from wwpdb.utils.ws_utils.ServiceSessionFactory import ServiceSessionFactory
+from wwpdb.utils.ws_utils.ServiceSessionSweeper import (
+    TRASH_DIR_NAME,
+    ServiceSessionSweeper,
+    main,
+    moveToTrash,
+    waitForTrash,
+)
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class ServiceSessionSweeperTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "sweeper")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        self.__userId = "sweepuser"
+        self.__userPath = os.path.join(self.__topPath, "sessions", self.__userId)
+
+    def __makeSession(self, ageSeconds, fanOut=False, status=None):
+        sObj = ServiceSessionFactory(topPath=self.__topPath, serviceUserId=self.__userId, fanOut=fanOut)
+        pth = sObj.makeNewSessionPath()
+        sid = sObj.getId()
+        with open(os.path.join(pth, "data.txt"), "w") as ofh:
+            ofh.write("x")
+        if status:
+            sH = ServiceHistory(historyPath=self.__userPath)
+            sH.add(sid, "created")
+            for op in status if isinstance(status, (list, tuple)) else [status]:
+                sH.add(sid, op)
+        tOld = time.time() - ageSeconds
+        for fn in os.listdir(pth):
+            os.utime(os.path.join(pth, fn), (tOld, tOld))
+        os.utime(pth, (tOld, tOld))
+        return sid, pth
+
+    def testSweep(self):
+        """Test selection by age and history status in flat and fan-out layouts"""
+        _, pthOld = self.__makeSession(3600)
+        _, pthOldFan = self.__makeSession(3600, fanOut=True, status="completed")
+        _, pthNew = self.__makeSession(0)
+        _, pthRunning = self.__makeSession(3600, status="submitted")
+
+        sw = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=600, dryRun=True)
+        rD = sw.sweep()
+        self.assertEqual(rD["selected"], 2)
+        self.assertEqual(rD["removed"], 0)
+        self.assertTrue(os.path.exists(pthOld))
+
+        sw = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=600, statusList=["completed"])
+        rD = sw.sweep([self.__userId])
+        self.assertEqual(rD["removed"], 1)
+        self.assertFalse(os.path.exists(pthOldFan))
+        self.assertTrue(os.path.exists(pthOld))
+
+        sw = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=600, maxWorkers=2)
+        rD = sw.sweep()
+        self.assertEqual(rD["removed"], 1)
+        self.assertEqual(rD["errors"], 0)
+        self.assertFalse(os.path.exists(pthOld))
+        self.assertTrue(os.path.exists(pthNew))
+        self.assertTrue(os.path.exists(pthRunning))
+
+    def testSweepRunningJob(self):
+        """Test a session running a new job after an earlier completed job is kept"""
+        _, pthRunning = self.__makeSession(3600, status=("submitted", "running", "completed", "submitted", "running"))
+        _, pthDone = self.__makeSession(3600, status=("submitted", "running", "failed", "submitted", "completed"))
+        sw = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=600)
+        self.assertEqual(sorted(tup[2] for tup in sw.select(self.__userId)), ["completed"])
+        rD = sw.sweep()
+        self.assertEqual(rD["removed"], 1)
+        self.assertTrue(os.path.exists(pthRunning))
+        self.assertFalse(os.path.exists(pthDone))
+
+    def testSweepJobRecords(self):
+        """Test a session is kept while any of its background jobs is in progress"""
+        sidRunning, pthRunning = self.__makeSession(3600, status="created")
+        sidDone, pthDone = self.__makeSession(3600, status="created")
+        sH = ServiceHistory(historyPath=self.__userPath)
+        for sid, jobStatusList in ((sidRunning, ("running", "completed")), (sidDone, ("failed", "completed"))):
+            for ii, final in enumerate(jobStatusList):
+                for op in ("submitted", "running", final):
+                    sH.add("%s-job%d" % (sid, ii), op, session_id=sid)
+        sw = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=600)
+        statusD = sw.getStatusDict(sH.getHistory())
+        self.assertEqual(statusD[sidRunning], "running")
+        self.assertEqual(statusD[sidDone], "completed")
+        rD = sw.sweep()
+        self.assertEqual(rD["removed"], 1)
+        self.assertTrue(os.path.exists(pthRunning))
+        self.assertFalse(os.path.exists(pthDone))
+
+    def testSweepRecentActivity(self):
+        """Test a file touched inside an old session directory keeps the session"""
+        _, pth = self.__makeSession(3600)
+        os.utime(os.path.join(pth, "data.txt"), None)
+        rD = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=600).sweep()
+        self.assertEqual(rD["selected"], 0)
+        self.assertTrue(os.path.exists(pth))
+
+    def testSweepRateLimit(self):
+        """Test the removal rate limit"""
+        for _ in range(5):
+            self.__makeSession(3600)
+        tBegin = time.time()
+        rD = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=600, maxDeletesPerSecond=20).sweep()
+        self.assertEqual(rD["removed"], 5)
+        self.assertGreaterEqual(time.time() - tBegin, 0.15)
+
+    def testRemakeSessionPath(self):
+        """Test remaking a large session moves it to trash and removes it in the background"""
+        sObj = ServiceSessionFactory(topPath=self.__topPath, serviceUserId=self.__userId, fanOut=True)
+        pth = sObj.makeNewSessionPath()
+        for ii in range(2000):
+            with open(os.path.join(pth, "f%d.txt" % ii), "w") as ofh:
+                ofh.write("x")
+        tBegin = time.perf_counter()
+        self.assertEqual(sObj.remakeSessionPath(), pth)
+        tRemake = time.perf_counter() - tBegin
+        logger.info("Remake of session with 2000 files took %.2f ms", tRemake * 1000.0)
+        self.assertEqual(os.listdir(pth), [])
+        waitForTrash()
+        self.assertEqual(os.listdir(os.path.join(self.__userPath, TRASH_DIR_NAME)), [])
+
+    def testPurgeTrash(self):
+        """Test the sweeper removes trash left without background deletion"""
+        _, pth = self.__makeSession(0)
+        trashPth = moveToTrash(pth, self.__userPath, background=False)
+        self.assertFalse(os.path.exists(pth))
+        self.assertTrue(os.path.exists(trashPth))
+        rD = ServiceSessionSweeper(self.__topPath, maxAgeSeconds=600).sweep()
+        self.assertEqual(rD["trash"], 1)
+        self.assertEqual(rD["selected"], 0)
+        self.assertFalse(os.path.exists(trashPth))
+        self.assertIsNone(moveToTrash(pth, self.__userPath))
+
+    def testMain(self):
+        """Test the command line entry point"""
+        _, pth = self.__makeSession(3 * 86400)
+        self.assertEqual(main(["--top_path", self.__topPath, "--max_age_days", "1", "--dry_run"]), 0)
+        self.assertTrue(os.path.exists(pth))
+        self.assertEqual(main(["--top_path", self.__topPath, "--max_age_days", "1"]), 0)
+        self.assertFalse(os.path.exists(pth))
+
+
+def suiteServiceSessionSweeper():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceSessionSweeperTests("testSweep"))
+    suite.addTest(ServiceSessionSweeperTests("testSweepRunningJob"))
+    suite.addTest(ServiceSessionSweeperTests("testSweepJobRecords"))
+    suite.addTest(ServiceSessionSweeperTests("testSweepRecentActivity"))
+    suite.addTest(ServiceSessionSweeperTests("testSweepRateLimit"))
+    suite.addTest(ServiceSessionSweeperTests("testRemakeSessionPath"))
+    suite.addTest(ServiceSessionSweeperTests("testPurgeTrash"))
+    suite.addTest(ServiceSessionSweeperTests("testMain"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceSessionSweeper())
@@ -0,0 +1,157 @@
+##
+# File: ServiceSessionUsageTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceSessionUsage disk usage accounting and quotas --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import gzip
+import io
+import logging
+import os
+import platform
+import shutil
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceDataStore import ServiceDataStore
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceSessionSweeper import ServiceSessionSweeper
+from wwpdb.utils.ws_utils.ServiceSessionUsage import ServiceSessionUsage
+from wwpdb.utils.ws_utils.ServiceUploadUtils import ServiceUploadUtils
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class _UploadField:
+    """Minimal stand-in for an uploaded form field."""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.file = io.BytesIO(data)
+
+
+class ServiceSessionUsageTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "sessionusage")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        self.__userId = "usageuser"
+        self.__userPath = os.path.join(self.__topPath, "sessions", self.__userId)
+
+    def __getRequest(self, **kwargs):
+        req = ServiceRequest({"top_session_path": [self.__topPath], "service_user_id": [self.__userId]})
+        req.setSessionUsageTracking(**kwargs)
+        return req
+
+    def testCounters(self):
+        """Test incremental counters and quota checks"""
+        usage = ServiceSessionUsage(self.__userPath, sessionId="s1", quotaBytes=1000, sessionQuotaBytes=600)
+        self.assertTrue(usage.add(500))
+        self.assertTrue(usage.add(300, sessionId="s2"))
+        self.assertEqual(usage.getUsage(), 500)
+        self.assertEqual(usage.getUserUsage(), 800)
+        self.assertTrue(usage.checkQuota(100))
+        self.assertFalse(usage.checkQuota(150))
+        self.assertFalse(usage.checkQuota(250, sessionId="s2"))
+        self.assertTrue(usage.add(-200))
+        self.assertEqual(usage.getUserUsage(), 600)
+        self.assertTrue(usage.remove(["s2"]))
+        self.assertEqual(usage.getUserUsage(), 300)
+        self.assertEqual(usage.getUsage("s2"), 0)
+
+    def testDataStoreQuota(self):
+        """Test data store writes are counted and rejected past the session quota"""
+        sObj = self.__getRequest(sessionQuotaBytes=400).getSessionObj(new=True)
+        usage = sObj.getUsage()
+        sds = ServiceDataStore(sObj.getPath(), usage=usage)
+        self.assertTrue(sds.set("k1", "x" * 100))
+        self.assertEqual(usage.getUsage(), os.path.getsize(sds.getFilePath()))
+        self.assertFalse(sds.set("k2", "y" * 1000))
+        self.assertEqual(sds.get("k2"), "")
+        self.assertTrue(sds.set("k1", "z"))
+        self.assertEqual(usage.getUsage(), os.path.getsize(sds.getFilePath()))
+
+    def testUploadQuota(self):
+        """Test uploads are counted and rejected early past the user quota"""
+        req = self.__getRequest(quotaBytes=1500)
+        sObj = req.getSessionObj(new=True)
+        req.setValue("file", _UploadField("model.cif", b"a" * 1000))
+        uu = ServiceUploadUtils(req)
+        self.assertEqual(uu.getUploadFileSize(), 1000)
+        self.assertEqual(uu.copyToSession(), "model.cif")
+        self.assertEqual(sObj.getUsage().getUserUsage(), 1000)
+        req.setValue("file", _UploadField("model2.cif", b"b" * 1000))
+        self.assertIsNone(uu.copyToSession())
+        self.assertFalse(os.path.exists(os.path.join(sObj.getPath(), "model2.cif")))
+        # replacing a file counts the size change only
+        req.setValue("file", _UploadField("model.cif", b"c" * 400))
+        self.assertEqual(uu.copyToSession(), "model.cif")
+        self.assertEqual(sObj.getUsage().getUserUsage(), 400)
+        # uncompressed uploads are checked with their uncompressed size
+        req.setValue("file", _UploadField("big.cif.gz", gzip.compress(b"d" * 5000)))
+        self.assertLess(uu.getUploadFileSize(), 1000)
+        self.assertIsNone(uu.copyToSession())
+        self.assertFalse(os.path.exists(os.path.join(sObj.getPath(), "big.cif")))
+        self.assertFalse(os.path.exists(os.path.join(sObj.getPath(), "big.cif.gz")))
+        self.assertEqual(sObj.getUsage().getUserUsage(), 400)
+        req.setValue("file", _UploadField("small.cif.gz", gzip.compress(b"e" * 500)))
+        self.assertEqual(uu.copyToSession(), "small.cif")
+        self.assertEqual(sObj.getUsage().getUserUsage(), ServiceSessionUsage.getTreeSize(sObj.getPath()))
+        # remake drops the session counter
+        sObj.remakeSessionPath()
+        self.assertEqual(sObj.getUsage().getUserUsage(), 0)
+
+    def testReconcile(self):
+        """Test the sweeper reconciles counters and drops removed sessions"""
+        sObj = self.__getRequest().getSessionObj(new=True)
+        with open(os.path.join(sObj.getPath(), "untracked.dat"), "wb") as ofh:
+            ofh.write(b"d" * 2048)
+        sObj.getUsage().add(10)
+        ServiceSessionSweeper(self.__topPath, maxAgeSeconds=3600, reconcileUsage=True).sweep()
+        usage = sObj.getUsage()
+        self.assertEqual(usage.getUsage(), 2048)
+        self.assertIsNotNone(usage.getDictionary()["reconciled"])
+        ServiceSessionSweeper(self.__topPath, maxAgeSeconds=0).sweep()
+        self.assertEqual(usage.getUserUsage(), 0)
+        self.assertEqual(usage.getDictionary()["sessions"], {})
+
+
+def suiteServiceSessionUsage():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceSessionUsageTests("testCounters"))
+    suite.addTest(ServiceSessionUsageTests("testDataStoreQuota"))
+    suite.addTest(ServiceSessionUsageTests("testUploadQuota"))
+    suite.addTest(ServiceSessionUsageTests("testReconcile"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceSessionUsage())
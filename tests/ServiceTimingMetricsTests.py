@@ -0,0 +1,157 @@
+##
+# File: ServiceTimingMetricsTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceTimingMetrics request phase timing --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import json
+import logging
+import os
+import platform
+import shutil
+import timeit
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceResponse import ServiceResponse
+from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+from wwpdb.utils.ws_utils.ServiceTimingMetrics import ServiceTimingMetrics
+from wwpdb.utils.ws_utils.ServiceWorkerBase import ServiceWorkerBase
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class _TestWorker(ServiceWorkerBase):
+    def __init__(self, reqObj):
+        super(_TestWorker, self).__init__(reqObj)
+        self.addServices({"/service/v1/new": "_newSessionOp", "/service/v1/entry/{entry_id}": "_entryOp"})
+
+    def _newSessionOp(self):
+        sst = ServiceSessionState()
+        if self._getSession(new=True):
+            self._setSessionStoreValue("entry_id", "D_1")
+            self._trackServiceStatus("completed")
+            sst.setAppDataDict(self._getSessionStoreDict())
+        else:
+            sst.setServiceError(msg="No session")
+        return sst
+
+    def _entryOp(self):
+        sst = ServiceSessionState()
+        sst.setServiceError(msg="Entry %s not found" % self._reqObj.getValue("entry_id"))
+        return sst
+
+
+class ServiceTimingMetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "timingmetrics")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+        ServiceTimingMetrics.reset()
+        ServiceTimingMetrics.enable()
+
+    def tearDown(self):
+        ServiceTimingMetrics.disable()
+        ServiceTimingMetrics.reset()
+
+    def __getWorker(self):
+        req = ServiceRequest(
+            {
+                "top_session_path": [self.__topPath],
+                "service_user_id": ["timinguser"],
+                "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"],
+            }
+        )
+        return _TestWorker(req)
+
+    def testWorkerTiming(self):
+        """Test phases are aggregated by route and result and attached to the session state"""
+        for _ in range(3):
+            sst = self.__getWorker()._run("/service/v1/new")  # pylint: disable=protected-access
+        self.assertEqual(sst.getAppDataDict()["entry_id"], "D_1")
+        tD = sst.getTimingDict()
+        self.assertEqual(sorted(tD), ["history", "operation", "session", "store_read", "total"])
+        self.assertGreaterEqual(tD["total"], tD["operation"])
+        self.assertGreaterEqual(tD["operation"], tD["session"])
+        self.__getWorker()._run("/service/v1/entry/D_2")  # pylint: disable=protected-access
+        self.__getWorker()._run("/service/v1/none")  # pylint: disable=protected-access
+        sD = ServiceTimingMetrics.getSummary()
+        self.assertEqual(sD["/service/v1/new"]["ok"]["session"]["count"], 3)
+        self.assertEqual(sD["/service/v1/entry/{entry_id}"]["error"]["operation"]["count"], 1)
+        self.assertEqual(list(sD["unmatched"]["error"]), ["total"])
+        # Server-Timing header
+        sr = ServiceResponse()
+        sr.setServerTiming(sst.getServerTiming())
+        header = sr.getResponse().headers["Server-Timing"]
+        self.assertIn("session;dur=", header)
+        self.assertIn("total;dur=", header)
+        # dump
+        fp = os.path.join(TESTOUTPUT, "timing-metrics.json")
+        ServiceTimingMetrics.dump(fp)
+        with open(fp, "r") as ifh:
+            self.assertIn("/service/v1/new", json.load(ifh)["routes"])
+
+    def testDisabled(self):
+        """Test nothing is recorded when collection is disabled"""
+        ServiceTimingMetrics.disable()
+        sst = self.__getWorker()._run("/service/v1/new")  # pylint: disable=protected-access
+        self.assertEqual(sst.getTimingDict(), {})
+        self.assertEqual(sst.getServerTiming(), "")
+        self.assertEqual(ServiceTimingMetrics.getSummary(), {})
+
+    def testOverhead(self):
+        """Measure the cost of a timed phase with collection enabled and disabled"""
+        worker = self.__getWorker()
+        nLoop = 100000
+
+        def _phase():
+            with worker._timePhase("operation"):  # pylint: disable=protected-access
+                pass
+
+        tEnabled = min(timeit.repeat(_phase, number=nLoop, repeat=3))
+        ServiceTimingMetrics.disable()
+        tDisabled = min(timeit.repeat(_phase, number=nLoop, repeat=3))
+        logger.info(
+            "Timed phase overhead enabled %.3f us disabled %.3f us", 1.0e6 * tEnabled / nLoop, 1.0e6 * tDisabled / nLoop
+        )
+
+
+def suiteServiceTimingMetrics():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceTimingMetricsTests("testWorkerTiming"))
+    suite.addTest(ServiceTimingMetricsTests("testDisabled"))
+    suite.addTest(ServiceTimingMetricsTests("testOverhead"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceTimingMetrics())
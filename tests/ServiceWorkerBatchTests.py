@@ -0,0 +1,293 @@
+##
+# File: ServiceWorkerBatchTests.py
+# Date:  19-Oct-2026
+#
+# Updates:
+##
+"""
+Test cases for ServiceWorkerBase batch dispatch of sub-operations --
+
+This software was developed as part of the World Wide Protein Data Bank
+Common Deposition and Annotation System Project
+
+Copyright (c) wwPDB
+
+This software is provided under a Creative Commons Attribution 3.0 Unported
+License described at http://creativecommons.org/licenses/by/3.0/.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "Ezra Peisach"
+__email__ = "peisach@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+
+import json
+import logging
+import os
+import platform
+import shutil
+import time
+import unittest
+
+from wwpdb.utils.ws_utils.ServiceHistory import ServiceHistory
+from wwpdb.utils.ws_utils.ServiceJobManager import ServiceJobManager
+from wwpdb.utils.ws_utils.ServiceRequest import ServiceRequest
+from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+from wwpdb.utils.ws_utils.ServiceTimingMetrics import ServiceTimingMetrics
+from wwpdb.utils.ws_utils.ServiceWorkerBase import ServiceWorkerBase
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TOPDIR = os.path.dirname(os.path.dirname(os.path.dirname(HERE)))
+TESTOUTPUT = os.path.join(HERE, "test-output", platform.python_version())
+if not os.path.exists(TESTOUTPUT):  # pragma: no cover
+    os.makedirs(TESTOUTPUT)
+
+logging.basicConfig(level=logging.DEBUG, format="\n[%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+logging.getLogger().setLevel(logging.INFO)
+logger = logging.getLogger()
+
+
+class _TestWorker(ServiceWorkerBase):
+    def __init__(self, reqObj):
+        super(_TestWorker, self).__init__(reqObj)
+        self.addServices(
+            {
+                "/service/v1/new": "_newOp",
+                "/service/v1/status": ("_statusOp", ["GET"]),
+                "/service/v1/summary": "_summaryOp",
+                "/service/v1/files": "_fileListOp",
+                "/service/v1/set": "_setOp",
+                "/service/v1/batch": "_batchOp",
+                "/service/v1/echo": {"opName": "_echoOp", "asynchronous": True},
+                "/service/v1/job/{job_id}": "_jobStatusOp",
+            }
+        )
+
+    def _newOp(self):
+        sst = ServiceSessionState()
+        if not self._getSession(new=True):
+            sst.setServiceError(msg="No session")
+            return sst
+        self._appendSessionStore({"entry_id": "D_1000000001", "status": "created"})
+        with open(os.path.join(self._sessionPath, "model.cif"), "w") as ofh:
+            ofh.write("data_1\n")
+        sst.setAppDataDict({"session_id": self._sessionId})
+        return sst
+
+    def _statusOp(self):
+        sst = ServiceSessionState()
+        if not self._getSession(useContext=True):
+            sst.setServiceError(msg="No session")
+            return sst
+        sst.setAppDataDict({"status": self._reqObj.getValue("status")})
+        return sst
+
+    def _summaryOp(self):
+        sst = ServiceSessionState()
+        if not self._getSession():
+            sst.setServiceError(msg="No session")
+            return sst
+        dd = self._getSessionStoreDict()
+        sst.setAppDataDict({"entry_id": dd.get("entry_id"), "history_length": len(dd.get("session_history", []))})
+        return sst
+
+    def _fileListOp(self):
+        sst = ServiceSessionState()
+        if not self._getSession():
+            sst.setServiceError(msg="No session")
+            return sst
+        sst.setAppDataDict({"files": sorted(fn for fn in os.listdir(self._sessionPath) if fn.endswith(".cif"))})
+        return sst
+
+    def _setOp(self):
+        sst = ServiceSessionState()
+        if not self._getSession():
+            sst.setServiceError(msg="No session")
+            return sst
+        self._setSessionStoreValue("status", self._reqObj.getValue("status"))
+        self._trackServiceStatus("updated")
+        return sst
+
+    def _echoOp(self):
+        sst = ServiceSessionState()
+        time.sleep(0.1)
+        sst.setAppDataDict({"x": self._reqObj.getValue("x")})
+        return sst
+
+
+class ServiceWorkerBatchTests(unittest.TestCase):
+    def setUp(self):
+        self.__topPath = os.path.join(TESTOUTPUT, "workerbatch")
+        if os.path.exists(self.__topPath):
+            shutil.rmtree(self.__topPath)
+
+    def __run(self, path, **params):
+        pD = {
+            "top_session_path": [self.__topPath],
+            "service_user_id": ["batchuser"],
+            "wwpdb_site_id": ["WWPDB_DEPLOY_TEST"],
+            "request_method": ["POST"],
+        }
+        for k, v in params.items():
+            pD[k] = [v]
+        return _TestWorker(ServiceRequest(pD))._run(path)  # pylint: disable=protected-access
+
+    def __batch(self, opL, **params):
+        return self.__run("/service/v1/batch", batch=json.dumps(opL), **params)
+
+    def testBatch(self):
+        """Test sub-operations run in order against the request session"""
+        sessionId = self.__run("/service/v1/new").getAppDataDict()["session_id"]
+        opL = [
+            {"path": "/service/v1/status", "method": "GET"},
+            ["/service/v1/summary"],
+            {"path": "/service/v1/files"},
+            ["/service/v1/set", {"status": "processed"}],
+            {"path": "/service/v1/status", "method": "GET"},
+        ]
+        sst = self.__batch(opL, session_id=sessionId)
+        self.assertFalse(sst.getServiceErrorFlag())
+        self.assertFalse(sst.getServiceWarningFlag())
+        rD = sst.getAppDataDict()
+        self.assertEqual(rD["session_id"], sessionId)
+        rL = rD["results"]
+        self.assertEqual([r["path"] for r in rL], [op["path"] if isinstance(op, dict) else op[0] for op in opL])
+        self.assertEqual(rL[0]["appdata"], {"status": "created"})
+        # 'begins' history records of the creating request and of the batch only
+        self.assertEqual(rL[1]["appdata"], {"entry_id": "D_1000000001", "history_length": 2})
+        self.assertEqual(rL[2]["appdata"], {"files": ["model.cif"]})
+        self.assertEqual(rL[4]["appdata"], {"status": "processed"})
+        self.assertTrue(all(r["statuscode"] == 200 for r in rL))
+
+    def testBatchNewSession(self):
+        """Test a session created by a sub-operation is used by the following sub-operations"""
+        sst = self.__batch([{"path": "/service/v1/new"}, {"path": "/service/v1/summary"}])
+        rD = sst.getAppDataDict()
+        self.assertEqual(rD["session_id"], rD["results"][0]["appdata"]["session_id"])
+        self.assertEqual(rD["results"][1]["appdata"]["entry_id"], "D_1000000001")
+
+    def testBatchErrors(self):
+        """Test invalid batch requests and failing sub-operations"""
+        for batch in ["[", "[]", json.dumps([{"args": {}}]), json.dumps([["/service/v1/new", "x"]])]:
+            sst = self.__run("/service/v1/batch", batch=batch)
+            self.assertTrue(sst.getServiceErrorFlag())
+        sst = self.__batch([{"path": "/service/v1/new"}] * (ServiceWorkerBase.BATCH_MAX_OPERATIONS + 1))
+        self.assertEqual(sst.getServiceErrorMessage(), "Too many batch operations")
+        opL = [
+            {"path": "/service/v1/new"},
+            {"path": "/service/v1/nosuchop"},
+            {"path": "/service/v1/status", "method": "POST"},
+            {"path": "/service/v1/batch"},
+            {"path": "/service/v1/summary"},
+        ]
+        sst = self.__batch(opL)
+        self.assertFalse(sst.getServiceErrorFlag())
+        self.assertEqual(sst.getServiceWarningMessage(), "3 of 5 batch operations failed")
+        rL = sst.getAppDataDict()["results"]
+        self.assertEqual(
+            [r["errormessage"] for r in rL],
+            ["", "Unknown operation", "Method not allowed", "Nested batch request", ""],
+        )
+        sst = self.__batch(opL, batch_stop_on_error="true")
+        self.assertEqual(len(sst.getAppDataDict()["results"]), 2)
+
+    def testBatchReservedArgs(self):
+        """Test sub-operation args cannot change the service user, session or session paths"""
+        otherPath = os.path.join(self.__topPath, "other")
+        sessionId = self.__run("/service/v1/new").getAppDataDict()["session_id"]
+        for argD in (
+            {"service_user_id": "bob"},
+            {"top_session_path": otherPath},
+            {"session_user_path": otherPath},
+            {"session_id": "othersession"},
+            {"wwpdb_site_id": "OTHER_SITE"},
+        ):
+            sst = self.__batch([["/service/v1/summary"], ["/service/v1/new", argD]], session_id=sessionId)
+            self.assertTrue(sst.getServiceErrorFlag())
+            self.assertEqual(sst.getServiceErrorMessage(), "Reserved batch argument")
+        self.assertFalse(os.path.exists(otherPath))
+        self.assertEqual(os.listdir(os.path.join(self.__topPath, "sessions")), ["batchuser"])
+        sst = self.__batch([["/service/v1/summary"], ["/service/v1/set", {"status": "s"}]], session_id=sessionId)
+        self.assertFalse(sst.getServiceWarningFlag())
+        self.assertEqual(sst.getAppDataDict()["session_id"], sessionId)
+
+    def testBatchJob(self):
+        """Test an asynchronous route in a batch runs as a job with its own sub-operation args"""
+        sessionId = self.__run("/service/v1/new").getAppDataDict()["session_id"]
+        opL = [
+            ["/service/v1/echo", {"x": "fromsub"}],
+            ["/service/v1/summary", {}],
+            ["/service/v1/set", {"status": "s"}],
+        ]
+        sst = self.__batch(opL, session_id=sessionId)
+        self.assertFalse(sst.getServiceWarningFlag())
+        rL = sst.getAppDataDict()["results"]
+        self.assertEqual(rL[0]["appdata"]["session_id"], sessionId)
+        jobId = rL[0]["appdata"]["job_id"]
+        self.assertEqual(rL[1]["appdata"]["entry_id"], "D_1000000001")
+        self.assertTrue(ServiceJobManager.wait(jobId, timeout=30))
+        rD = self.__run("/service/v1/job/%s" % jobId).getAppDataDict()
+        self.assertEqual(rD["status"], "completed")
+        self.assertEqual(rD["result"], {"x": "fromsub"})
+        # status records of the job and of the following sub-operations are in the service user history
+        self.assertFalse(os.path.exists("history-session-store.pic"))
+        hD = ServiceHistory(historyPath=os.path.join(self.__topPath, "sessions", "batchuser")).getHistory()
+        self.assertEqual(sorted(hD[jobId]), ["completed", "running", "submitted"])
+        self.assertEqual(hD[jobId]["completed"]["session_id"], sessionId)
+        self.assertEqual(sorted(hD[sessionId]), ["updated"])
+
+    def testBatchTiming(self):
+        """Test the phase times of the batch request and of its sub-operations are kept apart"""
+        sessionId = self.__run("/service/v1/new").getAppDataDict()["session_id"]
+        ServiceTimingMetrics.reset()
+        ServiceTimingMetrics.enable()
+        try:
+            sst = self.__batch([["/service/v1/summary"], ["/service/v1/files"]], session_id=sessionId)
+        finally:
+            ServiceTimingMetrics.disable()
+        tD = sst.getTimingDict()
+        self.assertEqual(sorted(tD), ["operation", "total"])
+        self.assertGreaterEqual(tD["total"], tD["operation"])
+        self.assertEqual([v.split(";")[0] for v in sst.getServerTiming().split(", ")], list(tD))
+        sD = ServiceTimingMetrics.getSummary()
+        self.assertEqual(sD["/service/v1/batch"]["ok"]["total"]["count"], 1)
+        self.assertEqual(sorted(sD["/service/v1/summary"]["ok"]), ["operation", "session", "store_read", "total"])
+        self.assertEqual(sorted(sD["/service/v1/files"]["ok"]), ["operation", "total"])
+
+    def testBatchBenchmark(self):
+        """Compare a batch of three sub-operations with three individual requests"""
+        sessionId = self.__run("/service/v1/new").getAppDataDict()["session_id"]
+        pathL = ["/service/v1/status", "/service/v1/summary", "/service/v1/files"]
+        opL = [{"path": pth, "method": "GET"} for pth in pathL]
+        num = 20
+        tBegin = time.perf_counter()
+        for _ in range(num):
+            for pth in pathL:
+                self.assertFalse(self.__run(pth, session_id=sessionId, request_method="GET").getServiceErrorFlag())
+        tIndividual = (time.perf_counter() - tBegin) / num
+        tBegin = time.perf_counter()
+        for _ in range(num):
+            self.assertFalse(self.__batch(opL, session_id=sessionId).getServiceWarningFlag())
+        tBatch = (time.perf_counter() - tBegin) / num
+        logger.info("Three operations individually %.3f ms batched %.3f ms", tIndividual * 1e3, tBatch * 1e3)
+        self.assertLess(tBatch, tIndividual)
+
+
+def suiteServiceWorkerBatch():  # pragma: no cover
+    suite = unittest.TestSuite()
+    suite.addTest(ServiceWorkerBatchTests("testBatch"))
+    suite.addTest(ServiceWorkerBatchTests("testBatchNewSession"))
+    suite.addTest(ServiceWorkerBatchTests("testBatchErrors"))
+    suite.addTest(ServiceWorkerBatchTests("testBatchReservedArgs"))
+    suite.addTest(ServiceWorkerBatchTests("testBatchJob"))
+    suite.addTest(ServiceWorkerBatchTests("testBatchTiming"))
+    suite.addTest(ServiceWorkerBatchTests("testBatchBenchmark"))
+    return suite
+
+
+if __name__ == "__main__":  # pragma: no cover
+    runner = unittest.TextTestRunner(failfast=True)
+    runner.run(suiteServiceWorkerBatch())
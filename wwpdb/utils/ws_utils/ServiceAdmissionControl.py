@@ -0,0 +1,177 @@
+##
+# File: ServiceAdmissionControl.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Per service user and route limits on in-flight requests.
+
+Each (service user, route) pair has maxInFlight slot files in the admission
+directory.  A request is admitted by taking an exclusive flock() on a free
+slot and releasing it when the request completes.  The limit therefore holds
+across all worker processes and threads sharing the directory, and slots held
+by a process that exits are released by the kernel -- there are no counters to
+repair.
+
+A request finding no free slot waits up to timeoutSeconds for one and is
+otherwise rejected.  ServiceWorkerBase reports rejections as service errors
+with status code 429.
+
+    ac = ServiceAdmissionControl(lockDirPath, maxInFlight=4, timeoutSeconds=2.0, routeLimitD={"/v1/upload": 1})
+    workerObj.setAdmissionControl(ac)
+    ...
+    ServiceAdmissionControl.getSummary()
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import contextlib
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger()
+
+
+class ServiceAdmissionControl:
+    """Cross-process limit on concurrent requests per service user and route."""
+
+    __guard = threading.Lock()
+    __statsD = {}  # noqa: RUF012
+
+    def __init__(self, lockDirPath, maxInFlight=4, timeoutSeconds=0.0, retrySeconds=0.02, routeLimitD=None):
+        """
+        :param string lockDirPath: directory shared by all worker processes holding the slot files
+        :param int maxInFlight: default number of concurrent requests per service user and route
+        :param float timeoutSeconds: time to wait for a free slot before rejecting a request (0 rejects at once)
+        :param float retrySeconds: mean delay between slot scans while waiting
+        :param dict routeLimitD: optional route pattern -> maxInFlight overrides
+        """
+        if fcntl is None:  # pragma: no cover
+            raise NotImplementedError("ServiceAdmissionControl requires fcntl (POSIX)")
+        self.__lockDirPath = lockDirPath
+        self.__maxInFlight = maxInFlight
+        self.__timeoutSeconds = timeoutSeconds
+        self.__retrySeconds = retrySeconds
+        self.__routeLimitD = routeLimitD or {}
+
+    def getLimit(self, route):
+        return self.__routeLimitD.get(route, self.__maxInFlight)
+
+    def __getSlotPathList(self, serviceUserId, route):
+        dirPath = os.path.join(self.__lockDirPath, serviceUserId or "ANONYMOUS")
+        if not os.access(dirPath, os.F_OK):
+            os.makedirs(dirPath, exist_ok=True)
+        routeKey = hashlib.sha1(route.encode("utf-8")).hexdigest()[:16]  # noqa: S324
+        return [os.path.join(dirPath, "%s.%d.slot" % (routeKey, ii)) for ii in range(self.getLimit(route))]
+
+    def __tryAcquire(self, slotPathList):
+        # start at a random slot to spread contention
+        offset = random.randrange(len(slotPathList))  # noqa: S311
+        for ii in range(len(slotPathList)):
+            fd = os.open(slotPathList[(offset + ii) % len(slotPathList)], os.O_RDWR | os.O_CREAT, 0o664)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except OSError:
+                os.close(fd)
+        return None
+
+    @classmethod
+    def __count(cls, serviceUserId, route, **kwargs):
+        with cls.__guard:
+            sD = cls.__statsD.setdefault(
+                (serviceUserId, route), {"in_flight": 0, "admitted": 0, "queued": 0, "rejected": 0}
+            )
+            for k, v in kwargs.items():
+                sD[k] += v
+
+    def acquire(self, serviceUserId, route):
+        """Take a slot for a request.  Returns a slot handle for release() or None if the request is rejected."""
+        serviceUserId = serviceUserId or "ANONYMOUS"
+        slotPathList = self.__getSlotPathList(serviceUserId, route)
+        if not slotPathList:
+            self.__count(serviceUserId, route, rejected=1)
+            return None
+        fd = self.__tryAcquire(slotPathList)
+        if fd is None and self.__timeoutSeconds > 0:
+            self.__count(serviceUserId, route, queued=1)
+            tEnd = time.monotonic() + self.__timeoutSeconds
+            while fd is None and time.monotonic() < tEnd:
+                time.sleep(min(random.uniform(0.5, 1.5) * self.__retrySeconds, max(0.0, tEnd - time.monotonic())))  # noqa: S311
+                fd = self.__tryAcquire(slotPathList)
+        if fd is None:
+            self.__count(serviceUserId, route, rejected=1)
+            return None
+        self.__count(serviceUserId, route, in_flight=1, admitted=1)
+        return (fd, serviceUserId, route)
+
+    def release(self, slot):
+        if slot is None:
+            return
+        fd, serviceUserId, route = slot
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+            self.__count(serviceUserId, route, in_flight=-1)
+
+    @contextlib.contextmanager
+    def admit(self, serviceUserId, route):
+        """Context manager yielding True if the request is admitted (the slot is released on exit)."""
+        slot = self.acquire(serviceUserId, route)
+        try:
+            yield slot is not None
+        finally:
+            self.release(slot)
+
+    def getInFlight(self, serviceUserId, route):
+        """Return the number of requests of the service user and route in flight in all processes.
+
+        Slots are probed with a non-blocking shared lock, so a request arriving during the probe
+        may find that slot busy and take another.
+        """
+        nBusy = 0
+        for pth in self.__getSlotPathList(serviceUserId, route):
+            if not os.access(pth, os.F_OK):
+                continue
+            fd = os.open(pth, os.O_RDONLY)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            except OSError:
+                nBusy += 1
+            finally:
+                os.close(fd)
+        return nBusy
+
+    @classmethod
+    def getSummary(cls):
+        """Return the counts of this process as a dictionary service user -> route -> counts
+        (in_flight, admitted, queued and rejected).
+        """
+        rD = {}
+        with cls.__guard:
+            for (serviceUserId, route), sD in cls.__statsD.items():
+                rD.setdefault(serviceUserId, {})[route] = dict(sD)
+        return rD
+
+    @classmethod
+    def reset(cls):
+        with cls.__guard:
+            cls.__statsD = {}
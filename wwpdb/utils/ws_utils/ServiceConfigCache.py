@@ -0,0 +1,100 @@
+##
+# File: ServiceConfigCache.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Process-wide cache of site configuration.
+
+ConfigInfo objects are built once per site id and shared by ServiceWorkerBase,
+TokenUtilsBase and JwtTokenReader, and individual configuration values are
+memoized, so per-request configuration access is a dictionary lookup.
+
+Cached sites are rebuilt after an optional time to live or on an explicit
+reload() --
+
+    cI = ServiceConfigCache.getConfigInfo(siteId)
+    key = ServiceConfigCache.get(siteId, "SITE_SERVICE_REGISTRATION_KEY")
+    ServiceConfigCache.setTtl(300)
+    ServiceConfigCache.reload()
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import logging
+import os
+import threading
+import time
+
+from wwpdb.utils.config.ConfigInfo import ConfigInfo
+
+logger = logging.getLogger()
+
+_MISSING = object()
+
+
+class ServiceConfigCache:
+    """Thread-safe registry of ConfigInfo objects and configuration values keyed by site id."""
+
+    __guard = threading.Lock()
+    __cacheD = {}  # noqa: RUF012
+    __ttlSeconds = None
+
+    @classmethod
+    def setTtl(cls, ttlSeconds=None):
+        """Rebuild cached site configuration older than ttlSeconds (None to keep it until reload())."""
+        cls.__ttlSeconds = ttlSeconds
+
+    @classmethod
+    def getTtl(cls):
+        return cls.__ttlSeconds
+
+    @classmethod
+    def reload(cls, siteId=None):
+        """Discard the cached configuration of siteId or of all sites if siteId is None."""
+        with cls.__guard:
+            if siteId is None:
+                cls.__cacheD = {}
+            else:
+                cls.__cacheD.pop(cls.__getKey(siteId), None)
+
+    @staticmethod
+    def __getKey(siteId):
+        # site id resolution as in ConfigInfo
+        return siteId or str(os.getenv("WWPDB_SITE_ID", None)).upper()
+
+    @classmethod
+    def __getEntry(cls, siteId):
+        key = cls.__getKey(siteId)
+        entry = cls.__cacheD.get(key)
+        if entry is not None and (cls.__ttlSeconds is None or time.monotonic() - entry["time"] < cls.__ttlSeconds):
+            return entry
+        with cls.__guard:
+            entry = cls.__cacheD.get(key)
+            if entry is None or (cls.__ttlSeconds is not None and time.monotonic() - entry["time"] >= cls.__ttlSeconds):
+                logger.debug("Loading site configuration for %s", key)
+                entry = {"cI": ConfigInfo(key), "time": time.monotonic(), "values": {}}
+                cls.__cacheD[key] = entry
+        return entry
+
+    @classmethod
+    def getConfigInfo(cls, siteId=None):
+        """Return the shared ConfigInfo object for siteId (default the site id in the environment)."""
+        return cls.__getEntry(siteId)["cI"]
+
+    @classmethod
+    def get(cls, siteId, keyWord, default=None):
+        """Return the memoized configuration value of keyWord for siteId or default if it is not set."""
+        entry = cls.__getEntry(siteId)
+        try:
+            val = entry["values"][keyWord]
+        except KeyError:
+            val = entry["values"][keyWord] = entry["cI"].get(keyWord, _MISSING)
+        return default if val is _MISSING else val
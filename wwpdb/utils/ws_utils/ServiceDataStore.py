@@ -9,6 +9,8 @@
 #         23-Sep-2016  jdw adjust logging
 #         15-Mar-2017  jdw increase lock timeout -
 #         15-Mar-2017  jdw gut the concurrency handling wrap internal io methods
+#         19-Oct-2026      record lock contention in ServiceLockMetrics
+#         19-Oct-2026      optional disk usage accounting and quota check on writes
 ##
 """
 Provide a storage interface for miscellaneous key,value data.
@@ -27,15 +29,23 @@ import pickle  # noqa: S403
 
 from oslo_concurrency import lockutils
 
+from wwpdb.utils.ws_utils.ServiceLockMetrics import synchronized
+
 logger = logging.getLogger()
 
 
 class ServiceDataStore:
     """Provide a storage interface for miscellaneous key,value data."""
 
-    def __init__(self, sessionPath, prefix=None):
+    def __init__(self, sessionPath, prefix=None, usage=None):
+        """
+        :param string sessionPath: session directory
+        :param string prefix: data store file name prefix
+        :param object usage: optional ServiceSessionUsage object updated and quota checked on writes
+        """
         self.__filePrefix = prefix if prefix is not None else "general"
         self.__sessionPath = sessionPath
+        self.__usage = usage
         self.__filePath = None
         lockutils.set_defaults(self.__sessionPath)
         self.__setup()
@@ -52,8 +62,16 @@ class ServiceDataStore:
 
     def __serialize(self, iD):
         try:
+            data = pickle.dumps(iD, self.__pickleProtocol)
+            if self.__usage is not None:
+                delta = len(data) - (os.path.getsize(self.__filePath) if os.access(self.__filePath, os.F_OK) else 0)
+                if delta > 0 and not self.__usage.checkQuota(delta):
+                    logger.warning("Session %s - data store write rejected by quota", self.__sessionPath)
+                    return False
             with open(self.__filePath, "wb") as fb:
-                pickle.dump(iD, fb, self.__pickleProtocol)
+                fb.write(data)
+            if self.__usage is not None:
+                self.__usage.add(delta)
             if "status" in iD:
                 logger.debug("Session %s - wrote status value %r", self.__sessionPath, iD["status"])
             return True
@@ -100,7 +118,7 @@ class ServiceDataStore:
     #
     #  Getters()  reread before any access -
     #
-    @lockutils.synchronized("sessiondatastore.lock", external=True)
+    @synchronized("sessiondatastore.lock", external=True)
     def __outputList(self):
         rD = self.__deserialize()
         sL = []
@@ -110,7 +128,7 @@ class ServiceDataStore:
             sL.append("     - Key: %-35s  value(s): %r" % (k, v))
         return sL
 
-    @lockutils.synchronized("sessiondatastore.lock", external=True)
+    @synchronized("sessiondatastore.lock", external=True)
     def get(self, key):
         try:
             rD = self.__deserialize()
@@ -118,7 +136,7 @@ class ServiceDataStore:
         except:  # noqa: E722 pylint: disable=bare-except
             return ""
 
-    @lockutils.synchronized("sessiondatastore.lock", external=True)
+    @synchronized("sessiondatastore.lock", external=True)
     def getDictionary(self):
         rD = self.__deserialize()
         return rD
@@ -126,7 +144,7 @@ class ServiceDataStore:
     #
     #  Setters ()
     #
-    @lockutils.synchronized("sessiondatastore.lock", external=True)
+    @synchronized("sessiondatastore.lock", external=True)
     def set(self, key, value, overWrite=True):
         try:
             rD = self.__deserialize()
@@ -142,7 +160,7 @@ class ServiceDataStore:
             logger.exception("Failure of set for key %r value %r error %r", key, value, str(e))
             return False
 
-    @lockutils.synchronized("sessiondatastore.lock", external=True)
+    @synchronized("sessiondatastore.lock", external=True)
     def update(self, uDict):
         """Update (without overwrite) objects in the first level dictionary store."""
         try:
@@ -167,7 +185,7 @@ class ServiceDataStore:
             logger.exception("Failure for uDict %r %r", uDict, str(e))
             return False
 
-    @lockutils.synchronized("sessiondatastore.lock", external=True)
+    @synchronized("sessiondatastore.lock", external=True)
     def updateAll(self, uDict):
         """Update with overwrite values first level dictionary store."""
         try:
@@ -181,7 +199,7 @@ class ServiceDataStore:
             logger.exception("Failure for uDict %r %r", uDict, str(e))
             return False
 
-    @lockutils.synchronized("sessiondatastore.lock", external=True)
+    @synchronized("sessiondatastore.lock", external=True)
     def append(self, key, value):
         try:
             rD = self.__deserialize()
@@ -193,7 +211,7 @@ class ServiceDataStore:
             logger.exception("Failure for key %r value %r %r", key, value, str(e))
             return False
 
-    @lockutils.synchronized("sessiondatastore.lock", external=True)
+    @synchronized("sessiondatastore.lock", external=True)
     def extend(self, key, valueList):
         try:
             rD = self.__deserialize()
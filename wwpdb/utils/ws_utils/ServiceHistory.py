@@ -4,6 +4,9 @@
 #
 # Updated:
 #        25-Sep-2016  jdw add activity summary method -
+#        19-Oct-2026      break stale history locks left by killed workers
+#        19-Oct-2026      wake lock waiters on release (inotify) with jittered backoff
+#        19-Oct-2026      lock through ServiceLockManager (reentrant, per process coordination)
 ##
 """
 Methods to manage service session history tracking  --
@@ -27,7 +30,7 @@ from operator import itemgetter
 
 import dateutil.parser
 
-from wwpdb.utils.ws_utils.ServiceLockFile import ServiceLockFile
+from wwpdb.utils.ws_utils.ServiceLockFile import ServiceLockManager
 
 logger = logging.getLogger()
 
@@ -42,6 +45,7 @@ class ServiceHistory:
         self.__filePath = None
         self.__timeOutSeconds = 2.0
         self.__retrySeconds = 0.1
+        self.__leaseSeconds = 60.0  # history locks older than this are considered abandoned
         self.__unlocked_maxretry = 5  # Unlocked status history retrieval return for pickle erro
         self.__unlocked_retrySeconds = 3  # Unlocked status history return sleep
         self.__setup()
@@ -58,8 +62,12 @@ class ServiceHistory:
 
     def __serialize(self, iD, mode="wb"):
         """Internal method to write session history data to persistent store."""
-        with ServiceLockFile(
-            self.__filePath, timeoutSeconds=self.__timeOutSeconds, retrySeconds=self.__retrySeconds
+        with ServiceLockManager.lock(
+            self.__filePath,
+            timeoutSeconds=self.__timeOutSeconds,
+            retrySeconds=self.__retrySeconds,
+            leaseSeconds=self.__leaseSeconds,
+            waitStrategy="inotify",
         ) as lock:  # noqa: F841 pylint: disable=unused-variable
             try:
                 with open(self.__filePath, mode) as fb:
@@ -72,8 +80,12 @@ class ServiceHistory:
     def __deserialize(self):
         """Internal method to recover session history data from persistent store. Locks file"""
         rD = {}
-        with ServiceLockFile(
-            self.__filePath, timeoutSeconds=self.__timeOutSeconds, retrySeconds=self.__retrySeconds
+        with ServiceLockManager.lock(
+            self.__filePath,
+            timeoutSeconds=self.__timeOutSeconds,
+            retrySeconds=self.__retrySeconds,
+            leaseSeconds=self.__leaseSeconds,
+            waitStrategy="inotify",
         ) as lock:  # noqa: F841 pylint: disable=unused-variable
             return self.__deserialize_data()
         return rD
@@ -0,0 +1,170 @@
+##
+# File: ServiceJobManager.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Background execution of long-running service operations.
+
+Operations of routes registered with asynchronous=True (see
+ServiceWorkerBase.addService()) are run on a process-wide pool of worker
+threads.  The request returns at once with a new job identifier and the
+identifier of the session the job runs in.  The job status transitions are
+recorded in the service history of the service user under the job identifier
+(with the session identifier in each record):
+
+    submitted -> running -> completed | failed
+
+The operation result (application data or error message) is kept in a data
+store of the job in the session directory (see getResultStore()).
+getJobStatus() and getJobResult() read both and are used by the standard job
+status operation ServiceWorkerBase._jobStatusOp().  A session may run several
+jobs.
+
+No broker is needed.  A job whose worker process has exited before the job
+finished is reported as failed.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import concurrent.futures
+import logging
+import os
+import secrets
+import socket
+import threading
+
+from wwpdb.utils.ws_utils.ServiceDataStore import ServiceDataStore
+from wwpdb.utils.ws_utils.ServiceHistory import ServiceHistory
+
+logger = logging.getLogger()
+
+
+class ServiceJobManager:
+    """Process-wide executor and status reader for background service jobs."""
+
+    JOB_STATUS_LIST = ("submitted", "running", "completed", "failed")
+    JOB_STORE_PREFIX = "job"
+
+    __guard = threading.Lock()
+    __executor = None
+    __maxWorkers = 4
+    __futureD = {}  # noqa: RUF012
+
+    @classmethod
+    def setMaxWorkers(cls, maxWorkers):
+        """Set the number of job worker threads (takes effect when the executor is next created)."""
+        cls.__maxWorkers = maxWorkers
+
+    @classmethod
+    def __getExecutor(cls):
+        with cls.__guard:
+            if cls.__executor is None:
+                cls.__executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=cls.__maxWorkers, thread_name_prefix="ServiceJob"
+                )
+            return cls.__executor
+
+    @classmethod
+    def submit(cls, jobId, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the job executor and return its future."""
+        future = cls.__getExecutor().submit(fn, *args, **kwargs)
+        with cls.__guard:
+            cls.__futureD[jobId] = future
+        future.add_done_callback(lambda ft: cls.__discard(jobId, ft))
+        return future
+
+    @classmethod
+    def __discard(cls, jobId, future):
+        with cls.__guard:
+            if cls.__futureD.get(jobId) is future:
+                del cls.__futureD[jobId]
+
+    @classmethod
+    def wait(cls, jobId, timeout=None):
+        """Wait for a job submitted by this process.  Returns False if it is still running after timeout."""
+        with cls.__guard:
+            future = cls.__futureD.get(jobId)
+        if future is None:
+            return True
+        done, _ = concurrent.futures.wait([future], timeout=timeout)
+        return bool(done)
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        with cls.__guard:
+            executor = cls.__executor
+            cls.__executor = None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    @staticmethod
+    def newJobId():
+        """Return a new unique job identifier."""
+        return secrets.token_hex(20)
+
+    @classmethod
+    def getResultStore(cls, sessionPath, jobId, usage=None):
+        """Return the data store holding the result of job jobId in its session directory."""
+        return ServiceDataStore(sessionPath, prefix="%s-%s" % (cls.JOB_STORE_PREFIX, jobId), usage=usage)
+
+    @staticmethod
+    def getOwner():
+        """Return the history record fields identifying the process running a job."""
+        return {"host": socket.gethostname(), "pid": os.getpid()}
+
+    @staticmethod
+    def __isOwnerAlive(dataD):
+        if dataD.get("host") != socket.gethostname() or "pid" not in dataD:
+            return True
+        try:
+            os.kill(dataD["pid"], 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass
+        return True
+
+    @classmethod
+    def getJobStatus(cls, sessionUserPath, jobId, sessionPath=None):
+        """Return a dictionary describing job jobId of the service user.
+
+        Keys are job_id, status (none if there is no such job), session_id, the time of each recorded
+        status transition and, for finished jobs with the sessionPath of session_id, result or errormessage.
+        """
+        rD = {"job_id": jobId, "status": "none"}
+        jobD = {}
+        if os.access(os.path.join(sessionUserPath, "history-session-store.pic"), os.F_OK):
+            jobD = ServiceHistory(historyPath=sessionUserPath).getHistory().get(jobId, {})
+        opL = [(jobD[op]["tiso"], ii, op) for ii, op in enumerate(cls.JOB_STATUS_LIST) if op in jobD]
+        if not opL:
+            return rD
+        _, _, status = max(opL)
+        for tiso, _, op in opL:
+            rD[op] = tiso
+        rD["session_id"] = jobD[status].get("session_id")
+        if status in ("submitted", "running") and not cls.__isOwnerAlive(jobD[status]):
+            rD["status"] = "failed"
+            rD["errormessage"] = "Job interrupted"
+            return rD
+        rD["status"] = status
+        if sessionPath is not None:
+            rD.update(cls.getJobResult(sessionPath, jobId, status))
+        return rD
+
+    @classmethod
+    def getJobResult(cls, sessionPath, jobId, status):
+        """Return a dictionary with the result (completed) or errormessage (failed) of job jobId."""
+        if status not in ("completed", "failed"):
+            return {}
+        sds = cls.getResultStore(sessionPath, jobId)
+        if status == "completed":
+            return {"result": sds.get("result")}
+        return {"errormessage": sds.get("errormessage")}
@@ -0,0 +1,119 @@
+##
+# File: ServiceJson.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+JSON serialization with an optional fast engine.
+
+orjson or ujson are used when importable and the standard library json module
+otherwise.  The engine may be forced with the environment variable
+WS_UTILS_JSON_ENGINE (orjson, ujson or json) or setEngine().
+
+All engines produce JSON that decodes to the same value for the types used in
+service payloads (dict, list, tuple, str, int, float, bool and None, including
+non-string dictionary keys).  The text differs only in white space and escaping.
+Objects an engine cannot encode (e.g. integers beyond 64 bits) are passed to the
+standard library encoder.  NaN and infinite floats are encoded as null by orjson
+and as the non-standard NaN/Infinity tokens by the other engines.
+
+    from wwpdb.utils.ws_utils.ServiceJson import dumpb, dumps, loads
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import json
+import logging
+import os
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover
+    ujson = None
+
+logger = logging.getLogger()
+
+ENGINE_LIST = ["orjson", "ujson", "json"]
+
+
+def _json_dumpb(obj):
+    return json.dumps(obj).encode("utf-8")
+
+
+def _orjson_dumpb(obj):
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return _json_dumpb(obj)
+
+
+def _ujson_dumpb(obj):
+    try:
+        return ujson.dumps(obj, ensure_ascii=False).encode("utf-8")
+    except (TypeError, OverflowError):
+        return _json_dumpb(obj)
+
+
+_ENGINE_D = {
+    "orjson": (orjson, _orjson_dumpb, orjson.loads if orjson else None),
+    "ujson": (ujson, _ujson_dumpb, ujson.loads if ujson else None),
+    "json": (json, _json_dumpb, json.loads),
+}
+
+_engine = None
+_dumpb = _json_dumpb
+_loads = json.loads
+
+
+def setEngine(name=None):
+    """Select the JSON engine by name or the fastest importable engine if name is None.
+
+    Returns the name of the selected engine (falls back to json if the requested one is not importable).
+    """
+    global _engine, _dumpb, _loads  # pylint: disable=global-statement
+    for eng in [name] if name else ENGINE_LIST:
+        if eng in _ENGINE_D and _ENGINE_D[eng][0] is not None:
+            _engine = eng
+            _, _dumpb, _loads = _ENGINE_D[eng]
+            return _engine
+        if name:
+            logger.warning("JSON engine %r is not available", eng)
+    _engine = "json"
+    _, _dumpb, _loads = _ENGINE_D["json"]
+    return _engine
+
+
+def getEngine():
+    return _engine
+
+
+def dumpb(obj):
+    """Serialize obj to UTF-8 encoded JSON bytes."""
+    return _dumpb(obj)
+
+
+def dumps(obj):
+    """Serialize obj to a JSON string."""
+    if _engine == "json":
+        return json.dumps(obj)
+    return _dumpb(obj).decode("utf-8")
+
+
+def loads(data):
+    """Deserialize JSON from a string or bytes."""
+    return _loads(data)
+
+
+setEngine(os.environ.get("WS_UTILS_JSON_ENGINE") or None)
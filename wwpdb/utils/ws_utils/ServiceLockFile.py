@@ -5,17 +5,40 @@
 # Update:
 #      02-Aug-2016  jdw adapt for service application -  add logging -
 #      14-Mar02017  jdw log aquire timeout
+#      19-Oct-2026      add ServiceKernelLockFile - advisory flock() strategy with blocking kernel waits
+#      19-Oct-2026      record owner details in lock file and break stale locks
+#      19-Oct-2026      add jittered exponential backoff and inotify wake-up wait strategies
+#      19-Oct-2026      record contention statistics in ServiceLockMetrics
+#      19-Oct-2026      add ServiceLockManager - process-local reentrant coordination of file locks
 #
 ##
 """
-Class implementing a cross-platform file locking strategy using an auxiliary lock file.
+Classes implementing file locking strategies using an auxiliary lock file.
 
 """
 
+import contextlib
+import ctypes
+import ctypes.util
 import errno
+import json
 import logging
 import os
+import random
+import select
+import socket
+import struct
+import sys
+import threading
 import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+from wwpdb.utils.ws_utils.ServiceLockMetrics import ServiceLockMetrics
 
 logger = logging.getLogger()
 
@@ -24,6 +47,71 @@ class LockFileTimeoutException(Exception):  # noqa: N818
     pass
 
 
+def _loadInotify():
+    """Return the C library handle if inotify is available (Linux) or None."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):  # pragma: no cover
+        return None
+
+
+_LIBC_INOTIFY = _loadInotify()
+
+
+class _InotifyWatch:
+    """Watch a directory for the removal (unlink or rename) of a single file."""
+
+    IN_MOVED_FROM = 0x00000040
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct("iIII")
+
+    def __init__(self, filePath):
+        self.__fd = None
+        self.__name = os.fsencode(os.path.basename(filePath))
+        if _LIBC_INOTIFY is None:
+            raise OSError(errno.ENOSYS, "inotify not available")
+        fd = _LIBC_INOTIFY.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.__fd = fd
+        dirPath = os.path.dirname(os.path.abspath(filePath))
+        if _LIBC_INOTIFY.inotify_add_watch(fd, os.fsencode(dirPath), self.IN_DELETE | self.IN_MOVED_FROM) < 0:
+            err = ctypes.get_errno()
+            self.close()
+            raise OSError(err, "inotify_add_watch failed for %s" % dirPath)
+
+    def wait(self, timeoutSeconds):
+        """Wait up to timeoutSeconds for the file to be removed.  Returns True if removal was seen."""
+        rL, _, _ = select.select([self.__fd], [], [], timeoutSeconds)
+        if not rL:
+            return False
+        try:
+            buf = os.read(self.__fd, 4096)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(buf):
+            _wd, _mask, _cookie, nameLen = self.EVENT_HEADER.unpack_from(buf, offset)
+            offset += self.EVENT_HEADER.size
+            name = buf[offset : offset + nameLen].rstrip(b"\0")
+            offset += nameLen
+            if name == self.__name:
+                return True
+        return False
+
+    def close(self):
+        if self.__fd is not None:
+            os.close(self.__fd)
+            self.__fd = None
+
+
 class ServiceLockFile:
     """A simple cross-platform file locking utilitiy class using an auxiliary
     lock file.
@@ -36,12 +124,40 @@ class ServiceLockFile:
 
     # - At the end of this 'with' clause the lock is automatically removed.
 
+    The lock file records the owner (pid, hostname and acquire time).  Waiters
+    break a lock whose owner process no longer exists on the same host, or whose
+    age exceeds leaseSeconds (if set).
+
+    Wait strategies between attempts to lock:
+
+        fixed    -  sleep retrySeconds
+        backoff  -  randomized exponential backoff from minRetrySeconds up to retrySeconds
+        inotify  -  wake when the lock file is removed (Linux), bounded by the backoff interval.
+                    Falls back to backoff if inotify is not available.
+
     """
 
-    def __init__(self, filePath, timeoutSeconds=15, retrySeconds=0.2):
+    def __init__(
+        self,
+        filePath,
+        timeoutSeconds=15,
+        retrySeconds=0.2,
+        leaseSeconds=None,
+        breakStale=True,
+        waitStrategy="fixed",
+        minRetrySeconds=0.005,
+        lockName=None,
+    ):
         """Prepare the file locker. Specify the file to lock and optionally
         the maximum timeoutSeconds and the retrySeconds between each attempt to lock.
 
+        If breakStale is True waiters remove locks left by dead processes on this host
+        and locks older than leaseSeconds (None for no age limit).
+
+        waitStrategy is one of 'fixed', 'backoff' or 'inotify'.
+
+        lockName is the key for contention statistics (default: base name of filePath).
+
         It is assumed that the locking file will be created within the
         path of the target file.
         """
@@ -50,6 +166,14 @@ class ServiceLockFile:
         self.__filePath = filePath
         self.__timeoutSeconds = timeoutSeconds
         self.__retrySeconds = retrySeconds
+        self.__leaseSeconds = leaseSeconds
+        self.__breakStale = breakStale
+        self.__waitStrategy = waitStrategy
+        self.__minRetrySeconds = min(minRetrySeconds, retrySeconds)
+        self.__retryCount = 0
+        self.__staleCheckSeconds = 0.5
+        self.__lockName = lockName or os.path.basename(filePath)
+        self.__tAcquired = None
         self.__debug = True
         self.__fd = None
 
@@ -62,36 +186,182 @@ class ServiceLockFile:
 
         """
         timeBegin = time.time()
-        while True:
-            try:
-                self.__fd = os.open(self.__lockFilePath, os.O_CREAT | os.O_EXCL | os.O_RDWR)
-                if self.__debug:
-                    logger.debug("Lock file created %s", self.__lockFilePath)
-                break
-            except OSError as myErr:
-                if myErr.errno != errno.EEXIST:
-                    # pass on some unanticipated problem ---
-                    raise
-                # handle timeout and retry -
-                if (time.time() - timeBegin) >= self.__timeoutSeconds:
-                    logger.debug(
-                        "ServiceLockfile(acquire) Failed to acquire lock within timeout %r", self.__timeoutSeconds
-                    )
-                    raise LockFileTimeoutException(
-                        "ServiceLockFile(acquire) Internal timeout of %d (seconds) exceeded for %s"
-                        % (self.__timeoutSeconds, self.__filePath)
-                    ) from None
-                if self.__debug:
-                    logger.debug("Lock file retry for file %s", self.__lockFilePath)
-                time.sleep(self.__retrySeconds)
+        self.__retryCount = 0
+        tStaleCheck = None
+        watch = None
+        try:
+            while True:
+                try:
+                    self.__fd = os.open(self.__lockFilePath, os.O_CREAT | os.O_EXCL | os.O_RDWR)
+                    self.__writeOwner()
+                    if self.__debug:
+                        logger.debug("Lock file created %s", self.__lockFilePath)
+                    break
+                except OSError as myErr:
+                    if myErr.errno != errno.EEXIST:
+                        # pass on some unanticipated problem ---
+                        raise
+                    # check for a stale lock on the first failure and then at intervals
+                    if self.__breakStale and (
+                        tStaleCheck is None or time.time() - tStaleCheck >= self.__staleCheckSeconds
+                    ):
+                        tStaleCheck = time.time()
+                        if self.__breakStaleLock():
+                            continue
+                    # handle timeout and retry -
+                    tElapsed = time.time() - timeBegin
+                    if tElapsed >= self.__timeoutSeconds:
+                        logger.debug(
+                            "ServiceLockfile(acquire) Failed to acquire lock within timeout %r", self.__timeoutSeconds
+                        )
+                        if ServiceLockMetrics.enabled:
+                            ServiceLockMetrics.recordTimeout(self.__lockName, tElapsed, self.__retryCount)
+                        raise LockFileTimeoutException(
+                            "ServiceLockFile(acquire) Internal timeout of %d (seconds) exceeded for %s"
+                            % (self.__timeoutSeconds, self.__filePath)
+                        ) from None
+                    if self.__debug:
+                        logger.debug("Lock file retry for file %s", self.__lockFilePath)
+                    if self.__waitStrategy == "inotify" and watch is None and self.__retryCount == 0:
+                        # Start watching, then retry at once so that a release in between is not missed
+                        watch = self.__getWatch()
+                        if watch is not None:
+                            self.__retryCount += 1
+                            continue
+                    delay = min(self.__getRetryDelay(), self.__timeoutSeconds - tElapsed)
+                    self.__retryCount += 1
+                    if watch is not None:
+                        watch.wait(delay)
+                    else:
+                        time.sleep(delay)
+        finally:
+            if watch is not None:
+                watch.close()
         self.__isLocked = True
+        if ServiceLockMetrics.enabled:
+            self.__tAcquired = time.time()
+            ServiceLockMetrics.recordAcquire(self.__lockName, self.__tAcquired - timeBegin, self.__retryCount)
+
+    def getRetryCount(self):
+        """Return the number of failed attempts to lock in the latest call to acquire()."""
+        return self.__retryCount
+
+    def __getRetryDelay(self):
+        """Return the interval to wait before the next attempt to lock."""
+        if self.__waitStrategy == "fixed":
+            return self.__retrySeconds
+        if self.__waitStrategy == "inotify":
+            # Woken by the release event - the timed retry only covers removals not seen by inotify (e.g. NFS)
+            return self.__retrySeconds / 2.0 + random.uniform(0, self.__retrySeconds / 2.0)  # noqa: S311
+        # Exponential backoff with equal jitter - waiters spread out rather than retrying in lockstep
+        cap = min(self.__retrySeconds, self.__minRetrySeconds * (2 ** min(self.__retryCount, 32)))
+        return cap / 2.0 + random.uniform(0, cap / 2.0)  # noqa: S311
+
+    def __getWatch(self):
+        try:
+            return _InotifyWatch(self.__lockFilePath)
+        except OSError as e:
+            logger.debug("inotify wait unavailable for %s - %r", self.__lockFilePath, str(e))
+            self.__waitStrategy = "backoff"
+        return None
+
+    def __writeOwner(self):
+        """Record the owner details in the newly created lock file."""
+        oD = {"pid": os.getpid(), "host": socket.gethostname(), "time": time.time()}
+        os.write(self.__fd, json.dumps(oD).encode("utf-8"))
+
+    def __readOwner(self, lockFilePath):
+        """Return (raw content, owner dictionary) for the input lock file or None if it does not exist."""
+        try:
+            with open(lockFilePath, "rb") as fin:
+                content = fin.read()
+                mtime = os.fstat(fin.fileno()).st_mtime
+        except FileNotFoundError:
+            return None
+        try:
+            oD = json.loads(content.decode("utf-8"))
+        except ValueError:
+            # Empty or partially written -- only the file age is known
+            oD = {}
+        if "time" not in oD:
+            oD["time"] = mtime
+        return content, oD
+
+    def __getStaleReason(self, oD):
+        """Return a description of why the lock described by oD is stale or None if it may be live."""
+        if self.__leaseSeconds is not None and (time.time() - oD["time"]) > self.__leaseSeconds:
+            return "age exceeds lease of %r seconds" % self.__leaseSeconds
+        if "pid" in oD and oD.get("host") == socket.gethostname():
+            try:
+                os.kill(oD["pid"], 0)
+            except ProcessLookupError:
+                return "owner process %r no longer exists" % oD["pid"]
+            except OSError:
+                pass
+        return None
+
+    def __breakStaleLock(self):
+        """Remove the existing lock file if it is stale.
+
+        The lock file is renamed aside and checked to be the same lock that was judged
+        stale, so that a lock freshly created by another process is never removed.
+
+        :rtype bool: True if the lock is gone and acquisition should be retried immediately
+        """
+        tup = self.__readOwner(self.__lockFilePath)
+        if tup is None:
+            return True
+        content, oD = tup
+        reason = self.__getStaleReason(oD)
+        if reason is None:
+            return False
+        stalePath = "%s.stale-%s" % (self.__lockFilePath, uuid.uuid4().hex)
+        try:
+            os.rename(self.__lockFilePath, stalePath)
+        except FileNotFoundError:
+            return True
+        tup = self.__readOwner(stalePath)
+        if tup is not None and tup[0] != content:
+            # Lost a race with another waiter - restore the live lock unless it has been replaced
+            try:
+                os.link(stalePath, self.__lockFilePath)
+            except FileExistsError:
+                logger.error("Live lock file %s could not be restored", self.__lockFilePath)
+            os.unlink(stalePath)
+            return False
+        os.unlink(stalePath)
+        if ServiceLockMetrics.enabled:
+            ServiceLockMetrics.recordStaleBreak(self.__lockName)
+        logger.warning(
+            "ServiceLockFile broke stale lock %s owner %r (%s)",
+            self.__lockFilePath,
+            content.decode("utf-8", "replace"),
+            reason,
+        )
+        return True
+
+    def __ownsLockFile(self):
+        """Return True if the lock file on disk is still the one created by this instance."""
+        try:
+            st = os.stat(self.__lockFilePath)
+        except FileNotFoundError:
+            return False
+        fst = os.fstat(self.__fd)
+        return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
 
     def release(self):
         """Remove any existing lock file."""
         if self.__isLocked:
+            owned = self.__ownsLockFile()
             os.close(self.__fd)
-            os.unlink(self.__lockFilePath)
+            if owned:
+                os.unlink(self.__lockFilePath)
+            else:
+                logger.warning("LockFile(release) lock file %s was broken while held", self.__lockFilePath)
             self.__isLocked = False
+            if self.__tAcquired is not None:
+                ServiceLockMetrics.recordRelease(self.__lockName, time.time() - self.__tAcquired)
+                self.__tAcquired = None
             if self.__debug:
                 logger.debug("LockFile(release) removed lock file %s", self.__lockFilePath)
 
@@ -111,5 +381,301 @@ class ServiceLockFile:
         self.release()
 
 
+class ServiceKernelLockFile:
+    """A file locking utility class using an advisory kernel lock (flock) on an
+    auxiliary lock file (POSIX only).
+
+    Waiters block in the kernel and are woken as soon as the holder releases the
+    lock, rather than polling for the removal of the lock file.  The kernel drops
+    the lock if the holder exits, so a crashed worker never leaves a stale lock.
+
+    The lock file (<filePath>.flock) is left in place on release.  All processes
+    sharing a target file must use the same locking strategy -  this class does not
+    interoperate with ServiceLockFile.
+
+    with ServiceKernelLockFile("target-file.db", timeoutSeconds=2) as lock:
+        # - process/update the target-file.db.
+
+    """
+
+    def __init__(self, filePath, timeoutSeconds=15, retrySeconds=0.2, useHelperThread=True, lockName=None):
+        """Prepare the file locker. Specify the file to lock and optionally
+        the maximum timeoutSeconds (None to wait indefinitely).
+
+        If useHelperThread is True timed waits block in the kernel on a helper
+        thread, otherwise the lock is polled every retrySeconds.
+
+        lockName is the key for contention statistics (default: base name of filePath).
+        """
+        self.__isLocked = False
+        if fcntl is None:  # pragma: no cover
+            raise NotImplementedError("ServiceKernelLockFile requires fcntl (POSIX)")
+        self.__lockFilePath = os.path.join(filePath + ".flock")
+        self.__filePath = filePath
+        self.__timeoutSeconds = timeoutSeconds
+        self.__retrySeconds = retrySeconds
+        self.__useHelperThread = useHelperThread
+        self.__lockName = lockName or os.path.basename(filePath)
+        self.__retryCount = 0
+        self.__tAcquired = None
+        self.__debug = True
+        self.__fd = None
+
+    def acquire(self):
+        """Obtain an exclusive lock on the lock file, waiting up to 'timeoutSeconds'.
+
+        If the lock cannot be acquired within 'timeoutSeconds' then
+        throw an exception.
+        """
+        timeBegin = time.time()
+        self.__retryCount = 0
+        fd = os.open(self.__lockFilePath, os.O_CREAT | os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            acquired = True
+        except OSError as myErr:
+            if myErr.errno not in (errno.EAGAIN, errno.EACCES, errno.EWOULDBLOCK):
+                os.close(fd)
+                raise
+            acquired = False
+        if not acquired:
+            if self.__timeoutSeconds is None:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                except OSError:
+                    os.close(fd)
+                    raise
+            else:
+                try:
+                    if self.__useHelperThread:
+                        self.__waitOnHelperThread(fd)
+                    else:
+                        self.__waitPolling(fd)
+                except LockFileTimeoutException:
+                    if ServiceLockMetrics.enabled:
+                        ServiceLockMetrics.recordTimeout(self.__lockName, time.time() - timeBegin, self.__retryCount)
+                    raise
+        self.__fd = fd
+        self.__isLocked = True
+        if ServiceLockMetrics.enabled:
+            self.__tAcquired = time.time()
+            ServiceLockMetrics.recordAcquire(self.__lockName, self.__tAcquired - timeBegin, self.__retryCount)
+        if self.__debug:
+            logger.debug("Kernel lock acquired %s", self.__lockFilePath)
+
+    def getRetryCount(self):
+        """Return the number of failed polling attempts to lock in the latest call to acquire()."""
+        return self.__retryCount
+
+    def __timeout(self):
+        logger.debug("ServiceKernelLockFile(acquire) Failed to acquire lock within timeout %r", self.__timeoutSeconds)
+        return LockFileTimeoutException(
+            "ServiceKernelLockFile(acquire) Internal timeout of %d (seconds) exceeded for %s"
+            % (self.__timeoutSeconds, self.__filePath)
+        )
+
+    def __waitOnHelperThread(self, fd):
+        """Block in flock() on a helper thread and wait for it with a timeout.
+
+        On timeout the wait is abandoned and the lock file descriptor is replaced
+        by /dev/null, so a lock granted later to the helper belongs to an open file
+        without descriptors and is dropped by the kernel as flock() returns.  The
+        helper thread then closes the descriptor.
+        """
+        guard = threading.Lock()
+        done = threading.Event()
+        state = {"abandoned": False, "error": None}
+
+        def _blockingLock():
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except OSError as myErr:
+                state["error"] = myErr
+            with guard:
+                if state["abandoned"]:
+                    os.close(fd)
+                else:
+                    done.set()
+
+        th = threading.Thread(target=_blockingLock, name="ServiceKernelLockFile", daemon=True)
+        th.start()
+        done.wait(self.__timeoutSeconds)
+        with guard:
+            if not done.is_set():
+                state["abandoned"] = True
+                # keep the descriptor number reserved for the helper thread - closing it could
+                # hand the number to an unrelated file before the helper's flock() call is made
+                nullFd = os.open(os.devnull, os.O_RDONLY)
+                os.dup2(nullFd, fd)
+                os.close(nullFd)
+                raise self.__timeout()
+        if state["error"] is not None:
+            os.close(fd)
+            raise state["error"]
+
+    def __waitPolling(self, fd):
+        """Signal-free fallback - poll a non-blocking flock() every retrySeconds."""
+        timeBegin = time.time()
+        while True:
+            if (time.time() - timeBegin) >= self.__timeoutSeconds:
+                os.close(fd)
+                raise self.__timeout()
+            time.sleep(self.__retrySeconds)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return
+            except OSError as myErr:
+                if myErr.errno not in (errno.EAGAIN, errno.EACCES, errno.EWOULDBLOCK):
+                    os.close(fd)
+                    raise
+            self.__retryCount += 1
+            if self.__debug:
+                logger.debug("Kernel lock retry for file %s", self.__lockFilePath)
+
+    def release(self):
+        """Release the kernel lock.  The lock file itself is retained."""
+        if self.__isLocked:
+            fcntl.flock(self.__fd, fcntl.LOCK_UN)
+            os.close(self.__fd)
+            self.__fd = None
+            self.__isLocked = False
+            if self.__tAcquired is not None:
+                ServiceLockMetrics.recordRelease(self.__lockName, time.time() - self.__tAcquired)
+                self.__tAcquired = None
+            if self.__debug:
+                logger.debug("KernelLockFile(release) released lock file %s", self.__lockFilePath)
+
+    def __enter__(self):
+        """Internal method invoked at the beginning of a 'with' clause."""
+        if not self.__isLocked:
+            self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        """Internal method invoked at the end of a 'with' clause."""
+        if self.__isLocked:
+            self.release()
+
+    def __del__(self):
+        """Internal method to cleanup any lingering lock."""
+        self.release()
+
+
+class _ManagedLock:
+    """Process-local state for a managed file lock."""
+
+    def __init__(self):
+        self.threadLock = threading.Lock()
+        self.owner = None
+        self.depth = 0
+        self.refs = 0
+        self.fileLock = None
+
+
+class ServiceLockManager:
+    """Process-wide manager of file locks keyed by target file path.
+
+    Threads of this process first contend on a cheap threading.Lock, so only one
+    thread per process touches the file lock at a time.  A thread already holding
+    the lock may acquire it again (reentrant) without any filesystem access; the
+    file lock is released when the outermost hold is released.
+
+    with ServiceLockManager.lock("target-file.db", timeoutSeconds=2):
+        with ServiceLockManager.lock("target-file.db"):
+            # - nested use in the same thread does not deadlock
+
+    """
+
+    __guard = threading.Lock()
+    __lockD = {}  # noqa: RUF012
+
+    @classmethod
+    def acquire(cls, filePath, timeoutSeconds=15, lockClass=ServiceLockFile, **kwargs):
+        """Acquire the lock on filePath for the current thread.
+
+        Additional keyword arguments are passed to lockClass (ServiceLockFile or ServiceKernelLockFile).
+        """
+        key = os.path.abspath(filePath)
+        me = threading.get_ident()
+        with cls.__guard:
+            ml = cls.__lockD.get(key)
+            if ml is None:
+                ml = _ManagedLock()
+                cls.__lockD[key] = ml
+            if ml.owner == me:
+                ml.depth += 1
+                return
+            ml.refs += 1
+        timeBegin = time.time()
+        try:
+            if not ml.threadLock.acquire(timeout=-1 if timeoutSeconds is None else timeoutSeconds):
+                if ServiceLockMetrics.enabled:
+                    ServiceLockMetrics.recordTimeout(
+                        kwargs.get("lockName") or os.path.basename(filePath), time.time() - timeBegin
+                    )
+                raise LockFileTimeoutException(
+                    "ServiceLockManager(acquire) Internal timeout of %d (seconds) exceeded for %s"
+                    % (timeoutSeconds, filePath)
+                )
+            try:
+                if timeoutSeconds is not None:
+                    timeoutSeconds = max(0.0, timeoutSeconds - (time.time() - timeBegin))
+                fileLock = lockClass(filePath, timeoutSeconds=timeoutSeconds, **kwargs)
+                fileLock.acquire()
+            except BaseException:
+                ml.threadLock.release()
+                raise
+        except BaseException:
+            cls.__dropRef(key, ml)
+            raise
+        ml.fileLock = fileLock
+        ml.owner = me
+        ml.depth = 1
+
+    @classmethod
+    def release(cls, filePath):
+        """Release one hold of the current thread on filePath."""
+        key = os.path.abspath(filePath)
+        with cls.__guard:
+            ml = cls.__lockD.get(key)
+        if ml is None or ml.owner != threading.get_ident():
+            raise RuntimeError("ServiceLockManager(release) lock for %s is not held by this thread" % filePath)
+        ml.depth -= 1
+        if ml.depth > 0:
+            return
+        fileLock = ml.fileLock
+        ml.fileLock = None
+        ml.owner = None
+        try:
+            fileLock.release()
+        finally:
+            ml.threadLock.release()
+            cls.__dropRef(key, ml)
+
+    @classmethod
+    def __dropRef(cls, key, ml):
+        with cls.__guard:
+            ml.refs -= 1
+            if ml.refs == 0 and cls.__lockD.get(key) is ml:
+                del cls.__lockD[key]
+
+    @classmethod
+    def isHeld(cls, filePath):
+        """Return True if the current thread holds the lock on filePath."""
+        with cls.__guard:
+            ml = cls.__lockD.get(os.path.abspath(filePath))
+        return ml is not None and ml.owner == threading.get_ident()
+
+    @classmethod
+    @contextlib.contextmanager
+    def lock(cls, filePath, timeoutSeconds=15, lockClass=ServiceLockFile, **kwargs):
+        """Context manager form of acquire() and release()."""
+        cls.acquire(filePath, timeoutSeconds=timeoutSeconds, lockClass=lockClass, **kwargs)
+        try:
+            yield cls
+        finally:
+            cls.release(filePath)
+
+
 if __name__ == "__main__":
     pass
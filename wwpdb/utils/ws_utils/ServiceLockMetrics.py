@@ -0,0 +1,236 @@
+##
+# File: ServiceLockMetrics.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Process-wide lock contention instrumentation.
+
+Records per-lock-name acquire wait times, hold times, timeouts, retries and
+stale lock recoveries for ServiceLockFile/ServiceKernelLockFile and the oslo
+locks used by ServiceDataStore and TokenUtilsBase.
+
+Collection is disabled by default.  When disabled each instrumented lock
+operation costs a single class attribute test.
+
+    ServiceLockMetrics.enable()
+    ...
+    summary = ServiceLockMetrics.getSummary()
+    ServiceLockMetrics.startPeriodicDump("/tmp/lock-metrics.json", intervalSeconds=60)
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+from oslo_concurrency import lockutils
+
+logger = logging.getLogger()
+
+
+class LockHistogram:
+    """Histogram of durations in seconds using power of two buckets from 1 microsecond."""
+
+    MIN_SECONDS = 1.0e-6
+    NUM_BUCKETS = 28  # last bucket upper bound is ~134 seconds
+
+    def __init__(self):
+        self.__count = 0
+        self.__sum = 0.0
+        self.__max = 0.0
+        self.__buckets = [0] * self.NUM_BUCKETS
+
+    def add(self, seconds):
+        self.__count += 1
+        self.__sum += seconds
+        self.__max = max(self.__max, seconds)
+        ii = 0
+        bound = self.MIN_SECONDS
+        while seconds > bound and ii < self.NUM_BUCKETS - 1:
+            bound *= 2.0
+            ii += 1
+        self.__buckets[ii] += 1
+
+    def getCount(self):
+        return self.__count
+
+    def getQuantile(self, q):
+        """Return the upper bound of the bucket containing quantile q (0-1)."""
+        if self.__count == 0:
+            return 0.0
+        target = q * self.__count
+        cum = 0
+        for ii, cnt in enumerate(self.__buckets):
+            cum += cnt
+            if cnt and cum >= target:
+                return min(self.MIN_SECONDS * (2.0**ii), self.__max)
+        return self.__max
+
+    def getDict(self):
+        return {
+            "count": self.__count,
+            "sum": self.__sum,
+            "mean": self.__sum / self.__count if self.__count else 0.0,
+            "max": self.__max,
+            "p50": self.getQuantile(0.50),
+            "p90": self.getQuantile(0.90),
+            "p99": self.getQuantile(0.99),
+            "bucket_min_seconds": self.MIN_SECONDS,
+            "buckets": list(self.__buckets),
+        }
+
+
+class ServiceLockMetrics:
+    """Process-wide registry of lock contention statistics keyed by lock name."""
+
+    enabled = False
+    __guard = threading.Lock()
+    __statsD = {}  # noqa: RUF012
+    __dumpThread = None
+    __dumpStop = None
+
+    @classmethod
+    def enable(cls, flag=True):
+        cls.enabled = flag
+
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+
+    @classmethod
+    def reset(cls):
+        with cls.__guard:
+            cls.__statsD = {}
+
+    @classmethod
+    def __getStats(cls, name):
+        sD = cls.__statsD.get(name)
+        if sD is None:
+            sD = {"wait": LockHistogram(), "hold": LockHistogram(), "timeouts": 0, "retries": 0, "stale_breaks": 0}
+            cls.__statsD[name] = sD
+        return sD
+
+    @classmethod
+    def recordAcquire(cls, name, waitSeconds, retries=0):
+        with cls.__guard:
+            sD = cls.__getStats(name)
+            sD["wait"].add(waitSeconds)
+            sD["retries"] += retries
+
+    @classmethod
+    def recordRelease(cls, name, holdSeconds):
+        with cls.__guard:
+            cls.__getStats(name)["hold"].add(holdSeconds)
+
+    @classmethod
+    def recordTimeout(cls, name, waitSeconds, retries=0):
+        with cls.__guard:
+            sD = cls.__getStats(name)
+            sD["timeouts"] += 1
+            sD["retries"] += retries
+            sD["wait"].add(waitSeconds)
+
+    @classmethod
+    def recordStaleBreak(cls, name):
+        with cls.__guard:
+            cls.__getStats(name)["stale_breaks"] += 1
+
+    @classmethod
+    def getSummary(cls):
+        """Return a dictionary of statistics for each lock name."""
+        with cls.__guard:
+            return {
+                name: {
+                    "wait": sD["wait"].getDict(),
+                    "hold": sD["hold"].getDict(),
+                    "timeouts": sD["timeouts"],
+                    "retries": sD["retries"],
+                    "stale_breaks": sD["stale_breaks"],
+                }
+                for name, sD in cls.__statsD.items()
+            }
+
+    @classmethod
+    def dump(cls, filePath=None):
+        """Log a one line summary per lock and optionally write the full summary as JSON to filePath."""
+        rD = cls.getSummary()
+        for name, sD in sorted(rD.items()):
+            logger.info(
+                "Lock %s acquired %d wait p50 %.6f p99 %.6f max %.6f hold p50 %.6f max %.6f timeouts %d retries %d",
+                name,
+                sD["hold"]["count"],
+                sD["wait"]["p50"],
+                sD["wait"]["p99"],
+                sD["wait"]["max"],
+                sD["hold"]["p50"],
+                sD["hold"]["max"],
+                sD["timeouts"],
+                sD["retries"],
+            )
+        if filePath:
+            try:
+                tmpPath = "%s.%d.tmp" % (filePath, os.getpid())
+                with open(tmpPath, "w") as ofh:
+                    json.dump({"pid": os.getpid(), "time": time.time(), "locks": rD}, ofh, indent=2)
+                os.replace(tmpPath, filePath)
+            except:  # noqa: E722 pylint: disable=bare-except
+                logger.exception("Lock metrics dump failing for %s", filePath)
+        return rD
+
+    @classmethod
+    def startPeriodicDump(cls, filePath=None, intervalSeconds=60.0):
+        """Dump the summary every intervalSeconds on a daemon thread."""
+        cls.stopPeriodicDump()
+        stop = threading.Event()
+
+        def _run():
+            while not stop.wait(intervalSeconds):
+                cls.dump(filePath)
+
+        cls.__dumpStop = stop
+        cls.__dumpThread = threading.Thread(target=_run, name="ServiceLockMetrics", daemon=True)
+        cls.__dumpThread.start()
+
+    @classmethod
+    def stopPeriodicDump(cls):
+        if cls.__dumpThread is not None:
+            cls.__dumpStop.set()
+            cls.__dumpThread.join()
+            cls.__dumpThread = None
+            cls.__dumpStop = None
+
+
+def synchronized(name, external=False, lock_path=None):
+    """Drop-in replacement for lockutils.synchronized() recording contention in ServiceLockMetrics."""
+
+    def wrap(f):
+        plain = lockutils.synchronized(name, external=external, lock_path=lock_path)(f)
+
+        @functools.wraps(f)
+        def inner(*args, **kwargs):
+            if not ServiceLockMetrics.enabled:
+                return plain(*args, **kwargs)
+            tBegin = time.perf_counter()
+            with lockutils.lock(name, external=external, lock_path=lock_path, do_log=False):
+                tAcquired = time.perf_counter()
+                ServiceLockMetrics.recordAcquire(name, tAcquired - tBegin)
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    ServiceLockMetrics.recordRelease(name, time.perf_counter() - tAcquired)
+
+        return inner
+
+    return wrap
@@ -0,0 +1,332 @@
+##
+# File: ServiceProfiler.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+On-demand profiling of service operations by route.
+
+A fraction of the requests to selected route patterns is profiled as the
+operation runs in ServiceWorkerBase._run() (or in a background job) and the
+profile is written to the profiling directory as
+<route>.<time>.<pid>.<n>.<extension> --
+
+    cprofile   cProfile statistics (.pstats - read with pstats.Stats)
+    sample     stacks sampled by a thread every intervalSeconds (.collapsed - one
+               'frame;frame;... count' line per stack, as read by flame graph tools)
+
+With memory=True a tracemalloc snapshot of the operation is also written
+(.tracemalloc - read with tracemalloc.Snapshot.load()).  cProfile and
+tracemalloc are process-wide, so requests arriving while another profile is
+being taken are not profiled (counted as skipped).
+
+Profiling is configured with configure() or with a JSON control file, which is
+re-read when it changes so routes can be profiled in a running service --
+
+    {"profileDirPath": "/tmp/ws-profiles",
+     "routes": {"/service/v1/entry/{entry_id}": {"rate": 0.05, "mode": "sample", "memory": false}}}
+
+The control file path may be set with setControlFile() or the environment
+variable WS_UTILS_PROFILE_CONTROL.  When profiling is not configured the cost
+per request is a class method call testing a class attribute.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import contextlib
+import cProfile
+import glob
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger()
+
+_NULL_PROFILE = contextlib.nullcontext()
+
+PROFILE_MODE_LIST = ("cprofile", "sample")
+
+
+class _StackSampler:
+    """Thread sampling the stack of another thread into collapsed stack counts."""
+
+    def __init__(self, threadId, intervalSeconds):
+        self.__threadId = threadId
+        self.__intervalSeconds = intervalSeconds
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__countD = {}
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run, name="ServiceProfiler", daemon=True)
+        self.__thread.start()
+
+    def stop(self):
+        self.__stop.set()
+        self.__thread.join()
+
+    def __run(self):
+        while not self.__stop.wait(self.__intervalSeconds):
+            frame = sys._current_frames().get(self.__threadId)  # pylint: disable=protected-access
+            fL = []
+            while frame is not None:
+                code = frame.f_code
+                fL.append("%s (%s:%d)" % (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+                frame = frame.f_back
+            if fL:
+                stack = ";".join(reversed(fL))
+                self.__countD[stack] = self.__countD.get(stack, 0) + 1
+
+    def write(self, filePath):
+        with open(filePath, "w") as ofh:
+            ofh.writelines("%s %d\n" % (stack, count) for stack, count in sorted(self.__countD.items()))
+
+
+class _RouteProfile:
+    """Context manager profiling its block and writing the profile files on exit."""
+
+    def __init__(self, route, basePath, mode, memory, intervalSeconds):
+        self.__route = route
+        self.__basePath = basePath
+        self.__mode = mode
+        self.__memory = memory
+        self.__intervalSeconds = intervalSeconds
+        self.__profile = None
+        self.__sampler = None
+        self.__isTracing = False
+
+    def __enter__(self):
+        try:
+            if self.__memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.__isTracing = True
+            if self.__mode == "sample":
+                self.__sampler = _StackSampler(threading.get_ident(), self.__intervalSeconds)
+                self.__sampler.start()
+            else:
+                profile = cProfile.Profile()
+                profile.enable()
+                self.__profile = profile
+        except:  # noqa: E722 pylint: disable=bare-except
+            # e.g. another profiler is active - run the operation unprofiled
+            logger.exception("Profiler start failing for route %s", self.__route)
+            self.__memory = False
+            self.__exit__()
+        return self
+
+    def __exit__(self, *args):
+        if self.__route is None:
+            return False
+        fileL = []
+        try:
+            if self.__profile is not None:
+                self.__profile.disable()
+                self.__profile.dump_stats(self.__basePath + ".pstats")
+                fileL.append(self.__basePath + ".pstats")
+            if self.__sampler is not None:
+                self.__sampler.stop()
+                self.__sampler.write(self.__basePath + ".collapsed")
+                fileL.append(self.__basePath + ".collapsed")
+            if self.__memory:
+                tracemalloc.take_snapshot().dump(self.__basePath + ".tracemalloc")
+                fileL.append(self.__basePath + ".tracemalloc")
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Profile output failing for route %s", self.__route)
+        finally:
+            if self.__isTracing:
+                tracemalloc.stop()
+            ServiceProfiler._release(self.__route, fileL)  # pylint: disable=protected-access
+            self.__route = None
+        return False
+
+
+class ServiceProfiler:
+    """Process-wide registry of route profiling settings."""
+
+    enabled = False
+    __guard = threading.Lock()
+    __busy = threading.Lock()
+    __routeD = {}  # noqa: RUF012
+    __statsD = {}  # noqa: RUF012
+    __profileDirPath = None
+    __maxFiles = 100
+    __seq = itertools.count(1)
+    __controlPath = None
+    __controlMtime = None
+    __checkSeconds = 10.0
+    __nextCheck = 0.0
+
+    @classmethod
+    def configure(cls, route, rate=1.0, mode="cprofile", memory=False, intervalSeconds=0.005, profileDirPath=None):
+        """Profile the fraction rate of the requests to the route pattern.
+
+        :param string route: route pattern as registered with ServiceWorkerBase.addService()
+        :param float rate: fraction of requests profiled (0 to 1)
+        :param string mode: cprofile or sample
+        :param bool memory: also write a tracemalloc snapshot
+        :param float intervalSeconds: stack sampling interval (sample mode)
+        :param string profileDirPath: profiling directory (default <temporary directory>/ws-utils-profiles)
+        """
+        if mode not in PROFILE_MODE_LIST:
+            raise ValueError("Unsupported profile mode %r" % mode)
+        with cls.__guard:
+            if profileDirPath:
+                cls.__profileDirPath = profileDirPath
+            cls.__routeD[route] = {"rate": rate, "mode": mode, "memory": memory, "intervalSeconds": intervalSeconds}
+            cls.enabled = True
+
+    @classmethod
+    def disable(cls, route=None):
+        """Stop profiling the route pattern or all routes if route is None."""
+        with cls.__guard:
+            if route is None:
+                cls.__routeD = {}
+            else:
+                cls.__routeD.pop(route, None)
+            cls.enabled = bool(cls.__routeD) or cls.__controlPath is not None
+
+    @classmethod
+    def setProfileDirPath(cls, profileDirPath, maxFiles=100):
+        """Set the profiling directory and the number of profiles kept per route (None for no limit)."""
+        cls.__profileDirPath = profileDirPath
+        cls.__maxFiles = maxFiles
+
+    @classmethod
+    def getProfileDirPath(cls):
+        if cls.__profileDirPath is None:
+            cls.__profileDirPath = os.path.join(tempfile.gettempdir(), "ws-utils-profiles")
+        return cls.__profileDirPath
+
+    @classmethod
+    def setControlFile(cls, filePath, checkSeconds=10.0):
+        """Read the route settings from the JSON control file filePath, checked for changes every checkSeconds
+        (None to stop reading a control file).
+        """
+        with cls.__guard:
+            cls.__controlPath = filePath
+            cls.__controlMtime = None
+            cls.__checkSeconds = checkSeconds
+            cls.__nextCheck = 0.0
+            cls.enabled = bool(cls.__routeD) or filePath is not None
+
+    @classmethod
+    def __checkControlFile(cls):
+        with cls.__guard:
+            if time.monotonic() < cls.__nextCheck:
+                return
+            cls.__nextCheck = time.monotonic() + cls.__checkSeconds
+            try:
+                mtime = os.stat(cls.__controlPath).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == cls.__controlMtime:
+                return
+            cls.__controlMtime = mtime
+            cD = {}
+            if mtime is not None:
+                try:
+                    with open(cls.__controlPath, "r") as ifh:
+                        cD = json.load(ifh)
+                except:  # noqa: E722 pylint: disable=bare-except
+                    logger.exception("Profile control file %s cannot be read", cls.__controlPath)
+                    return
+            cls.__routeD = {}
+            if cD.get("profileDirPath"):
+                cls.__profileDirPath = cD["profileDirPath"]
+        for route, rD in cD.get("routes", {}).items():
+            try:
+                cls.configure(route, **rD)
+            except (TypeError, ValueError):
+                logger.exception("Invalid profile settings for route %s", route)
+        logger.info("Profiling routes %r", sorted(cls.__routeD))
+
+    @classmethod
+    def __count(cls, route, **kwargs):
+        with cls.__guard:
+            sD = cls.__statsD.setdefault(route, {"profiled": 0, "skipped": 0, "last": []})
+            for k, v in kwargs.items():
+                if k == "last":
+                    sD[k] = v
+                else:
+                    sD[k] += v
+
+    @classmethod
+    def profile(cls, route):
+        """Return a context manager profiling a request to route if it is selected for profiling (else a no-op)."""
+        if not cls.enabled:
+            return _NULL_PROFILE
+        if cls.__controlPath is not None:
+            cls.__checkControlFile()
+        rD = cls.__routeD.get(route)
+        if rD is None or random.random() >= rD["rate"]:  # noqa: S311
+            return _NULL_PROFILE
+        if not cls.__busy.acquire(blocking=False):  # pylint: disable=consider-using-with
+            cls.__count(route, skipped=1)
+            return _NULL_PROFILE
+        try:
+            dirPath = cls.getProfileDirPath()
+            if not os.access(dirPath, os.F_OK):
+                os.makedirs(dirPath, exist_ok=True)
+            basePath = os.path.join(
+                dirPath,
+                "%s.%s.%d.%d"
+                % (cls.__getRouteSlug(route), time.strftime("%Y%m%d-%H%M%S"), os.getpid(), next(cls.__seq)),
+            )
+            return _RouteProfile(route, basePath, rD["mode"], rD["memory"], rD["intervalSeconds"])
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Profiling failing for route %s", route)
+            cls.__busy.release()
+        return _NULL_PROFILE
+
+    @staticmethod
+    def __getRouteSlug(route):
+        return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+
+    @classmethod
+    def _release(cls, route, fileList):
+        cls.__busy.release()
+        if not fileList:
+            cls.__count(route, skipped=1)
+            return
+        cls.__count(route, profiled=1, last=fileList)
+        if cls.__maxFiles is not None:
+            pathL = glob.glob(os.path.join(cls.getProfileDirPath(), glob.escape(cls.__getRouteSlug(route)) + ".*"))
+            # base names are <route>.<time>.<pid>.<n>
+            profileL = sorted(
+                {pth.rsplit(".", 1)[0] for pth in pathL},
+                key=lambda pth: (os.path.basename(pth).split(".")[1], int(pth.rsplit(".", 1)[1])),
+            )
+            for basePath in profileL[: max(0, len(profileL) - cls.__maxFiles)]:
+                for pth in glob.glob(glob.escape(basePath) + ".*"):
+                    with contextlib.suppress(OSError):
+                        os.remove(pth)
+
+    @classmethod
+    def getSummary(cls):
+        """Return a dictionary route -> counts of profiled and skipped requests and the last profile files."""
+        with cls.__guard:
+            return {route: dict(sD) for route, sD in cls.__statsD.items()}
+
+    @classmethod
+    def reset(cls):
+        with cls.__guard:
+            cls.__statsD = {}
+
+
+if os.getenv("WS_UTILS_PROFILE_CONTROL"):  # pragma: no cover
+    ServiceProfiler.setControlFile(os.getenv("WS_UTILS_PROFILE_CONTROL"))
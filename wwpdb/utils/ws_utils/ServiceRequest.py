@@ -5,6 +5,17 @@
 # Updated:
 #       3-Aug-2016 jdw standardize case for wwpdb_site_id
 #      23-Sep-2016 jdw add getSessionUserPath()
+#      19-Oct-2026     add setSessionFanOut() for hashed session directory layout
+#      19-Oct-2026     create new sessions with an atomic directory claim
+#      19-Oct-2026     add setSessionPoolSize() for pre-created session directories
+#      19-Oct-2026     add setSessionUsageTracking() for session disk usage and quotas
+#      19-Oct-2026     add setSessionIndexing() for the per-user session index
+#      19-Oct-2026     memoize normalized string/integer/double parameter values
+#      19-Oct-2026     add fromEnviron()/fromWebObRequest() with deferred request body parsing
+#      19-Oct-2026     use the ServiceJson engine in getJSON()/setJSON()
+#      19-Oct-2026     reuse the session object across getSessionObj() calls
+#      19-Oct-2026     set request_method in fromWebObRequest() for method routing
+#      19-Oct-2026     add copy() for requests handed to background jobs
 ##
 """
 WebRequest provides containers and accessors for managing request parameter information.
@@ -21,20 +32,23 @@ __version__ = "V0.07"
 
 
 import contextlib
+import copy
 import logging
 import os
 import sys
 
-try:
-    import json
-except ImportError:
-    import simplejson as json  # type: ignore[no-redef,import-untyped]
+from webob import Request
 
+from wwpdb.utils.ws_utils.ServiceJson import dumps, loads
 from wwpdb.utils.ws_utils.ServiceSessionFactory import ServiceSessionFactory
 
 logger = logging.getLogger()
 
 
+def _toString(v):
+    return str(v).strip()
+
+
 class ServiceRequestBase:
     """Base container and accessors for input and output parameters and control information."""
 
@@ -46,8 +60,69 @@ class ServiceRequestBase:
         if paramDict is None:
             paramDict = {}
         self.__dict = paramDict
+        #
+        #  Memoized normalized values by accessor type - (value list, leading value, normalized value)
+        #  entries used only while the store still holds the same leading value, as the store is shared
+        #  with the caller (paramDict and getDictionary()).  Missing keys are not memoized.
+        #
+        self.__strCache = {}
+        self.__intCache = {}
+        self.__floatCache = {}
+        #
+        #  Optional deferred parameter source (e.g. a form or multipart request body) - a callable
+        #  returning (key, value) pairs loaded on the first access to a key not already present.
+        #
+        self.__lazyLoader = None
+        self.__lazyKeys = set()
+
+    def _setLazyParams(self, loader, appendKeys=None):
+        """Defer loading of additional parameters until a missing key is accessed.
+
+        :param callable loader: returns an iterable of (key, value) pairs
+        :param appendKeys: keys present at this point to which loaded values are appended
+                           (other keys already set are kept as they are)
+        """
+        self.__lazyLoader = loader
+        self.__lazyKeys = set(appendKeys or [])
+
+    def _isLazyPending(self):
+        return self.__lazyLoader is not None
+
+    def __loadLazy(self):
+        loader = self.__lazyLoader
+        if loader is None:
+            return False
+        self.__lazyLoader = None
+        try:
+            for k, v in loader():
+                if k not in self.__dict:
+                    self.__dict[k] = [v]
+                    self.__lazyKeys.add(k)
+                elif k in self.__lazyKeys:
+                    self.__dict[k].append(v)
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Deferred request parameter loading FAILING")
+        self._clearValueCache()
+        return True
+
+    def __lookup(self, myKey):
+        try:
+            return self.__dict[myKey]
+        except KeyError:
+            if not self.__loadLazy():
+                raise
+        return self.__dict[myKey]
+
+    def _clearValueCache(self, myKey=None):
+        """Discard memoized parameter values (for all keys or only myKey)."""
+        for cD in (self.__strCache, self.__intCache, self.__floatCache):
+            if myKey is None:
+                cD.clear()
+            else:
+                cD.pop(myKey, None)
 
     def __outputList(self):
+        self.__loadLazy()
         sL = []
         sL.append(" ++Service request contents:\n")
         for k, vL in self.__dict.items():
@@ -74,10 +149,13 @@ class ServiceRequestBase:
             pass
 
     def getJSON(self):
-        return json.dumps(self.__dict)
+        self.__loadLazy()
+        return dumps(self.__dict)
 
     def setJSON(self, JSONString):
-        self.__dict = json.loads(JSONString)
+        self.__dict = loads(JSONString)
+        self.__lazyLoader = None
+        self._clearValueCache()
 
     def getValue(self, myKey):
         return self._getStringValue(myKey)
@@ -97,18 +175,35 @@ class ServiceRequestBase:
         return self._getRawValue(myKey)
 
     def getDictionary(self):
+        # the caller may modify the store directly
+        self.__loadLazy()
         return self.__dict
 
     def setValue(self, myKey, aValue):
         try:
             self.__dict[myKey] = [aValue]
+            self._clearValueCache(myKey)
             return True
         except:  # noqa: E722 pylint: disable=bare-except
             return False
 
+    def copy(self):
+        """Return a copy of the request with its own parameter dictionary and value lists.
+
+        Deferred body parameters are loaded first.  Parameter values (e.g. uploaded files) are shared.
+        """
+        self.__loadLazy()
+        cObj = copy.copy(self)
+        cObj.__dict = {k: list(v) if isinstance(v, list) else v for k, v in self.__dict.items()}
+        cObj.__strCache = {}
+        cObj.__intCache = {}
+        cObj.__floatCache = {}
+        return cObj
+
     def setValueList(self, myKey, valueList):
         try:
             self.__dict[myKey] = valueList
+            self._clearValueCache(myKey)
             return True
         except:  # noqa: E722 pylint: disable=bare-except
             return False
@@ -121,37 +216,43 @@ class ServiceRequestBase:
 
     def exists(self, myKey):
         try:
-            return myKey in self.__dict
+            return myKey in self.__dict or (self.__loadLazy() and myKey in self.__dict)
         except:  # noqa: E722 pylint: disable=bare-except
             return False
 
     def _getRawValue(self, myKey):
         try:
-            return self.__dict[myKey][0]
+            return self.__lookup(myKey)[0]
         except:  # noqa: E722 pylint: disable=bare-except
             return None
 
-    def _getStringValue(self, myKey):
+    def __getConverted(self, cD, myKey, convert, default):
+        cT = cD.get(myKey)
+        if cT is not None:
+            vL = self.__dict.get(myKey)
+            if vL is cT[0] and len(vL) > 0 and vL[0] is cT[1]:
+                return cT[2]
         try:
-            return str(self.__dict[myKey][0]).strip()
+            vL = self.__lookup(myKey)
+            v = convert(vL[0])
         except:  # noqa: E722 pylint: disable=bare-except
-            return ""
+            return default
+        cD[myKey] = (vL, vL[0], v)
+        return v
+
+    def _getStringValue(self, myKey):
+        return self.__getConverted(self.__strCache, myKey, _toString, "")
 
     def _getIntegerValue(self, myKey):
-        try:
-            return int(self.__dict[myKey][0])
-        except:  # noqa: E722 pylint: disable=bare-except
-            return None
+        return self.__getConverted(self.__intCache, myKey, int, None)
 
     def _getDoubleValue(self, myKey):
-        try:
-            return float(self.__dict[myKey][0])
-        except:  # noqa: E722 pylint: disable=bare-except
-            return None
+        return self.__getConverted(self.__floatCache, myKey, float, None)
 
     def _getStringList(self, myKey):
+        # a copy of the stored list
         try:
-            return self.__dict[myKey]
+            return list(self.__lookup(myKey))
         except:  # noqa: E722 pylint: disable=bare-except
             return []
 
@@ -161,6 +262,52 @@ class ServiceRequest(ServiceRequestBase):
         super(ServiceRequest, self).__init__(paramDict)
         self.__returnFormatDefault = ""
         self.__requestPrefix = ""
+        self.__sessionFanOut = False
+        self.__sessionPoolSize = 0
+        self.__sessionUsageD = None
+        self.__sessionIndexing = False
+        #
+        #  Session object from the last getSessionObj() call and the (session_id, top_session_path,
+        #  service_user_id) values it was made for.
+        #
+        self.__sessionObj = None
+        self.__sessionKey = None
+
+    @classmethod
+    def fromWebObRequest(cls, request, paramDict=None):
+        """Create a service request from a WebOb request.
+
+        Query string parameters, 'request_path', 'remote_addr' and 'request_method' are set immediately.  Form and
+        multipart body parameters are parsed only when a key not otherwise present is first
+        accessed, so requests that need only query parameters (e.g. status polling) never read
+        the body.  Multipart file parts are spooled to temporary files by the parser.
+
+        :param request: webob.Request
+        :param dict paramDict: additional parameters (dictionary of lists) overriding request values
+        """
+        pD = {}
+        for k, v in request.GET.items():
+            pD.setdefault(k, []).append(v)
+        queryKeys = list(pD.keys())
+        pD.setdefault("request_path", [request.path])
+        pD.setdefault("remote_addr", [request.remote_addr])
+        pD.setdefault("request_method", [request.method])
+        if paramDict:
+            pD.update(paramDict)
+        reqObj = cls(pD)
+        if request.method in ("POST", "PUT", "PATCH") or request.content_length:
+
+            def _bodyParams():
+                # accessing request.POST parses the body
+                return request.POST.items()
+
+            reqObj._setLazyParams(_bodyParams, appendKeys=queryKeys)
+        return reqObj
+
+    @classmethod
+    def fromEnviron(cls, environ, paramDict=None):
+        """Create a service request from a WSGI environment (see fromWebObRequest())."""
+        return cls.fromWebObRequest(Request(environ), paramDict=paramDict)
 
     def setDefaultReturnFormat(self, return_format="html"):
         self.__returnFormatDefault = return_format
@@ -175,6 +322,35 @@ class ServiceRequest(ServiceRequestBase):
         """Get request path prefix."""
         return self.__requestPrefix
 
+    def setSessionFanOut(self, fanOut=True):
+        """Set the hashed fan-out layout for session directories (see ServiceSessionFactory)."""
+        self.__sessionFanOut = fanOut
+        self.__sessionObj = None
+
+    def getSessionFanOut(self):
+        return self.__sessionFanOut
+
+    def setSessionPoolSize(self, poolSize=8):
+        """Create new sessions from a pool of pre-created directories of this size (see ServiceSessionPool)."""
+        self.__sessionPoolSize = poolSize
+        self.__sessionObj = None
+
+    def getSessionPoolSize(self):
+        return self.__sessionPoolSize
+
+    def setSessionUsageTracking(self, track=True, quotaBytes=None, sessionQuotaBytes=None):
+        """Track session disk usage with optional per-user and per-session quotas (see ServiceSessionUsage)."""
+        self.__sessionUsageD = {"track": track, "quotaBytes": quotaBytes, "sessionQuotaBytes": sessionQuotaBytes}
+        self.__sessionObj = None
+
+    def setSessionIndexing(self, indexing=True):
+        """Maintain the per-user session index for fast session listing (see ServiceSessionIndex)."""
+        self.__sessionIndexing = indexing
+        self.__sessionObj = None
+
+    def getSessionIndexing(self):
+        return self.__sessionIndexing
+
     def getRequestPath(self):
         try:
             iRp = self._getStringValue("request_path")
@@ -238,24 +414,41 @@ class ServiceRequest(ServiceRequestBase):
     def getSemaphore(self):
         return self._getStringValue("semaphore")
 
+    def __getSessionKey(self):
+        return (
+            self._getStringValue("session_id"),
+            self._getStringValue("top_session_path"),
+            self._getStringValue("service_user_id"),
+        )
+
     def getSessionObj(self, new=False):
-        """Get or create new session -"""
+        """Get or create new session -
+
+        The session object (and the existence check of its directory) is reused by later calls
+        until session_id, top_session_path or service_user_id change or new=True.
+        """
+        if not new and self.__sessionObj is not None and self.__sessionKey == self.__getSessionKey():
+            return self.__sessionObj
         try:
             logger.debug("Starting")
-            sObj = ServiceSessionFactory()
+            sObj = ServiceSessionFactory(fanOut=self.__sessionFanOut, poolSize=self.__sessionPoolSize)
             if self.exists("top_session_path"):
                 sObj.setTopSessionPath(topSessionPath=self._getStringValue("top_session_path"))
             if self.exists("service_user_id"):
                 sObj.setServiceUserId(serviceUserId=self._getStringValue("service_user_id"))
+            if self.__sessionUsageD is not None:
+                sObj.setUsageTracking(**self.__sessionUsageD)
+            sObj.setIndexing(self.__sessionIndexing)
             if new:
-                sObj.assignId()
-                sObj.makeSessionPath()
+                sObj.makeNewSessionPath()
                 self.setValue("session_id", sObj.getId())
                 logger.debug("Creating new session %s ", sObj.getId())
             elif self.exists("session_id"):
                 logger.debug("Aquiring existing session %s ", self._getStringValue("session_id"))
                 sObj.setId(uid=self._getStringValue("session_id"))
             self.setValue("session_user_path", sObj.getSessionUserPath())
+            self.__sessionObj = sObj
+            self.__sessionKey = self.__getSessionKey()
             logger.debug("Completed")
         except:  # noqa: E722 pylint: disable=bare-except
             logging.exception("Session acquisition/creation FAILING")
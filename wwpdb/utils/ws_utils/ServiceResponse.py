@@ -3,7 +3,9 @@
 # Date:    9-July-2016  J. Westbrook
 #
 # Updated:
-#
+#      19-Oct-2026     serialize JSON responses to bytes with the ServiceJson engine
+#      19-Oct-2026     add setServerTiming()
+#      19-Oct-2026     stream large binary files from chunked reads (wsgi.file_wrapper when available)
 ##
 """
 Containers and accessors for managing responses to web service requests.
@@ -24,10 +26,7 @@ import os
 
 from webob import Response
 
-try:
-    import json
-except ImportError:  # pragma: no cover
-    import simplejson as json  # type: ignore[no-redef, import-untyped]
+from wwpdb.utils.ws_utils.ServiceJson import dumpb, dumps
 
 try:
     # Python 2
@@ -39,7 +38,57 @@ except NameError:
 logger = logging.getLogger()
 
 
+class _FileIter:
+    """Response body iterator over chunked reads of a file (opened on first iteration)."""
+
+    def __init__(self, filePath, chunkSize, compressed=False):
+        self.filePath = filePath
+        self.chunkSize = chunkSize
+        self.compressed = compressed
+        self.__fh = None
+
+    def open(self):
+        return gzip.open(self.filePath, "rb") if self.compressed else open(self.filePath, "rb")  # noqa: SIM115
+
+    def __iter__(self):
+        self.__fh = self.open()
+        try:
+            while True:
+                data = self.__fh.read(self.chunkSize)
+                if not data:
+                    return
+                yield data
+        finally:
+            self.close()
+
+    def close(self):
+        if self.__fh is not None:
+            self.__fh.close()
+            self.__fh = None
+
+
+class _FileResponse(Response):
+    """WebOb response streaming a file - uses the server wsgi.file_wrapper (e.g. sendfile) for uncompressed files."""
+
+    def __call__(self, environ, start_response):
+        fileIter = self.app_iter
+        if (
+            isinstance(fileIter, _FileIter)
+            and not fileIter.compressed
+            and "wsgi.file_wrapper" in environ
+            and environ.get("REQUEST_METHOD") != "HEAD"
+        ):
+            contentLength = self.content_length
+            self.app_iter = environ["wsgi.file_wrapper"](fileIter.open(), fileIter.chunkSize)
+            self.content_length = contentLength
+        return super(_FileResponse, self).__call__(environ, start_response)
+
+
 class ServiceResponse:
+    #  Binary files of at least this size are streamed by default (see setBinaryFile())
+    STREAM_MIN_BYTES = 4 * 1024 * 1024
+    STREAM_CHUNK_BYTES = 256 * 1024
+
     def __init__(self, returnFormat="json", injectStatus=True):
         """
         Manage content items to be transfered as part of the application response.
@@ -68,6 +117,11 @@ class ServiceResponse:
         cD["datafilename"] = None
         cD["datafilechecksum"] = None
         #
+        #  Path and size of a file streamed rather than held in datafilecontent
+        cD["datafilepath"] = None
+        cD["datafilesize"] = None
+        cD["datafilecompressed"] = False
+        #
         #  Data payload for all json objects -
         cD["datacontent"] = {}
 
@@ -75,6 +129,9 @@ class ServiceResponse:
         cD["errorflag"] = False
         cD["statustext"] = ""
         cD["statuscode"] = 200
+        #
+        #  Optional Server-Timing header value
+        cD["servertiming"] = None
         return cD
 
     def isError(self):
@@ -85,6 +142,10 @@ class ServiceResponse:
         self._cD["statustext"] = msg
         self._cD["statuscode"] = statusCode
 
+    def setServerTiming(self, serverTiming=None):
+        """Set the Server-Timing response header value (e.g. from ServiceSessionState.getServerTiming())."""
+        self._cD["servertiming"] = serverTiming
+
     def setData(self, dataObj=None):
         self._cD["datacontent"] = dataObj
 
@@ -148,18 +209,35 @@ class ServiceResponse:
             ret = (ftype, encoding)
         return ret
 
-    def setBinaryFile(self, filePath, attachmentFlag=False, serveCompressed=True, md5Digest=None):
+    def setBinaryFile(self, filePath, attachmentFlag=False, serveCompressed=True, md5Digest=None, stream=None):
+        """Set a file as the binary response content.
+
+        :param bool stream: send the file from chunked reads so that it is never held in memory
+                            (default True for files of STREAM_MIN_BYTES or more).  Streamed responses
+                            use the WSGI server wsgi.file_wrapper when available.
+        """
         try:
             if os.path.exists(filePath):
                 _dir, fn = os.path.split(filePath)
-                if not serveCompressed and fn.endswith(".gz"):
-                    with gzip.open(filePath, "rb") as fin:
-                        self._cD["datafilecontent"] = fin.read()
+                nBytes = os.path.getsize(filePath)
+                if stream is None:
+                    stream = nBytes >= self.STREAM_MIN_BYTES
+                decompress = not serveCompressed and fn.endswith(".gz")
+                self._cD["datafilecontent"] = None
+                self._cD["datafilepath"] = filePath if stream else None
+                # the size of a decompressed stream is not known in advance
+                self._cD["datafilesize"] = nBytes if stream and not decompress else None
+                self._cD["datafilecompressed"] = decompress
+                if decompress:
+                    if not stream:
+                        with gzip.open(filePath, "rb") as fin:
+                            self._cD["datafilecontent"] = fin.read()
                     self._cD["datafileName"] = fn[:-3]
                     contentType, encodingType = self.getMimetypeAndEncoding(filePath[:-3])
                 else:
-                    with open(filePath, "rb") as fin:
-                        self._cD["datafilecontent"] = fin.read()
+                    if not stream:
+                        with open(filePath, "rb") as fin:
+                            self._cD["datafilecontent"] = fin.read()
                     self._cD["datafileName"] = fn
                     contentType, encodingType = self.getMimetypeAndEncoding(filePath)
                 self._cD["contentmimetype"] = contentType
@@ -175,12 +253,13 @@ class ServiceResponse:
                 if md5Digest:
                     self._cD["datafilechecksum"] = md5Digest
                 logger.debug(
-                    "Serving %s as %s encoding %s att flag %r checksum %r\n",
+                    "Serving %s as %s encoding %s att flag %r checksum %r stream %r\n",
                     filePath,
                     contentType,
                     encodingType,
                     attachmentFlag,
                     md5Digest,
+                    stream,
                 )
                 return True
         except:  # noqa: E722 pylint: disable=bare-except
@@ -196,9 +275,10 @@ class ServiceResponse:
                 with open(filePath) as fin:
                     dd["data"] = fin.read()
                 if ext.lower() != ".json":
-                    self._cD["datafilecontent"] = callBack + "(" + json.dumps(dd) + ");"
+                    self._cD["datafilecontent"] = callBack + "(" + dumps(dd) + ");"
                 else:
                     self._cD["datafilecontent"] = callBack + "(" + dd["data"] + ");"
+                self._cD["datafilepath"] = None
                 self._cD["datafileName"] = fn
                 contentType = "application/x-javascript"
                 encodingType = None
@@ -241,11 +321,14 @@ class ServiceResponse:
         #
         #  Build the WebOb response -
         #
-        myResponse = Response()
+        myResponse = _FileResponse() if "FILE_ITER" in rspD else Response()
         myResponse.status = rspD["STATUS_CODE"]
         myResponse.content_type = rspD["CONTENT_TYPE"]
 
-        if isinstance(rspD["RETURN_STRING"], text_type):
+        if "FILE_ITER" in rspD:
+            myResponse.app_iter = rspD["FILE_ITER"]
+            myResponse.content_length = rspD["CONTENT_LENGTH"]
+        elif isinstance(rspD["RETURN_STRING"], text_type):
             myResponse.text = rspD["RETURN_STRING"]
         else:
             myResponse.body = rspD["RETURN_STRING"]
@@ -256,6 +339,8 @@ class ServiceResponse:
             myResponse.content_disposition = rspD["DISPOSITION"]
         if "CHECKSUM_MD5" in rspD:
             myResponse.headers.add("CHECKSUM_MD5", rspD["CHECKSUM_MD5"])
+        if self._cD["servertiming"]:
+            myResponse.headers["Server-Timing"] = self._cD["servertiming"]
         return myResponse
 
     def __getD(self):
@@ -312,6 +397,9 @@ class ServiceResponse:
         rspDict = {}
         rspDict["CONTENT_TYPE"] = myD["contentmimetype"]
         rspDict["RETURN_STRING"] = myD["datafilecontent"]
+        if myD.get("datafilepath"):
+            rspDict["FILE_ITER"] = _FileIter(myD["datafilepath"], self.STREAM_CHUNK_BYTES, myD["datafilecompressed"])
+            rspDict["CONTENT_LENGTH"] = myD["datafilesize"]
         try:  # noqa: E722 pylint: disable=bare-except
             rspDict["ENCODING"] = myD["encodingtype"]
             if myD["disposition"] is not None:
@@ -325,7 +413,7 @@ class ServiceResponse:
             myD = {}
         rspDict = {}
         rspDict["CONTENT_TYPE"] = "application/json"
-        rspDict["RETURN_STRING"] = json.dumps(myD)
+        rspDict["RETURN_STRING"] = dumpb(myD)
         return rspDict
 
     def __initJsonpResponse(self, myD=None):
@@ -341,7 +429,7 @@ class ServiceResponse:
             myD = {}
         rspDict = {}
         rspDict["CONTENT_TYPE"] = "text/html"
-        rspDict["RETURN_STRING"] = "<textarea>" + json.dumps(myD) + "</textarea>"
+        rspDict["RETURN_STRING"] = b"<textarea>" + dumpb(myD) + b"</textarea>"
         return rspDict
 
     def __initHtmlResponse(self, myHtml=""):
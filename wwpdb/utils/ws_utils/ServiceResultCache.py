@@ -0,0 +1,289 @@
+##
+# File: ServiceResultCache.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Disk cache of service operation results for repeated identical requests.
+
+Results of routes registered with cacheable=True (see
+ServiceWorkerBase.addService()) are keyed on the route pattern, the request
+parameters and the MD5 digests of any uploaded files.  Successful results --
+application data, download and upload file references, response format and
+warning -- are kept in a SQLite database in the cache directory
+(<cacheDirPath>/result-cache.sqlite) shared by all worker processes.  A
+repeated request is answered from the cache without running the operation.
+The database uses the default rollback journal, which relies on the file
+locking of the file system (network file systems may not provide it
+reliably - a local cacheDirPath is preferred).  A database found to be
+corrupt is removed and recreated empty.
+
+The cache is bounded by the total size of the stored results (and optionally
+the number of entries) and the least recently used entries are evicted first.
+File references are not copied: an entry whose referenced files have since
+been removed or modified is discarded on lookup.
+
+    rc = ServiceResultCache(cacheDirPath, maxBytes=64 * 1024 * 1024)
+    workerObj.setResultCache(rc)
+    ...
+    ServiceResultCache.getSummary()
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import pickle  # noqa: S403
+import sqlite3
+import threading
+import time
+
+from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+
+logger = logging.getLogger()
+
+
+class ServiceResultCache:
+    """Size bounded LRU cache of ServiceSessionState results keyed by route, parameters and uploaded file digests."""
+
+    CACHE_FILE_NAME = "result-cache.sqlite"
+    #  Request parameters that do not affect the operation result
+    EXCLUDE_KEYS = ("session_id", "remote_addr", "request_path", "request_method", "top_session_path")
+
+    __guard = threading.Lock()
+    __statsD = {}  # noqa: RUF012
+
+    def __init__(self, cacheDirPath, maxBytes=64 * 1024 * 1024, maxEntries=None, excludeKeys=None, timeoutSeconds=10.0):
+        """
+        :param string cacheDirPath: directory shared by all worker processes holding the cache database
+        :param int maxBytes: bound on the total size of the stored results
+        :param int maxEntries: optional bound on the number of entries
+        :param excludeKeys: request parameters ignored in the cache key (default EXCLUDE_KEYS)
+        :param float timeoutSeconds: time to wait for a database lock held by another writer
+        """
+        self.__cacheDirPath = cacheDirPath
+        self.__filePath = os.path.join(cacheDirPath, self.CACHE_FILE_NAME)
+        self.__maxBytes = maxBytes
+        self.__maxEntries = maxEntries
+        self.__excludeKeys = frozenset(self.EXCLUDE_KEYS if excludeKeys is None else excludeKeys)
+        self.__timeoutSeconds = timeoutSeconds
+        self.__isSetup = False
+
+    def getFilePath(self):
+        return self.__filePath
+
+    @contextlib.contextmanager
+    def __connect(self):
+        if not os.access(self.__filePath, os.F_OK):
+            os.makedirs(self.__cacheDirPath, exist_ok=True)
+            self.__isSetup = False
+        conn = sqlite3.connect(self.__filePath, timeout=self.__timeoutSeconds)
+        try:
+            if not self.__isSetup:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results "
+                    "(key TEXT PRIMARY KEY, route TEXT, size INTEGER, created REAL, last_access REAL, payload BLOB)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+                self.__isSetup = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def __isCorrupt(err):
+        # OperationalError (e.g. database is locked) is a DatabaseError that does not call for a rebuild
+        return isinstance(err, sqlite3.DatabaseError) and not isinstance(err, sqlite3.OperationalError)
+
+    def __recover(self, err):
+        """Remove a corrupt cache database (recreated by the next update) - returns True if removed."""
+        if not self.__isCorrupt(err):
+            return False
+        logger.error("Removing corrupt result cache %s (%s)", self.__filePath, err)
+        for pth in (self.__filePath, self.__filePath + "-journal", self.__filePath + "-wal", self.__filePath + "-shm"):
+            with contextlib.suppress(OSError):
+                os.remove(pth)
+        self.__isSetup = False
+        return True
+
+    @staticmethod
+    def __fileDigest(fh):
+        pos = fh.tell()
+        fh.seek(0)
+        md5 = hashlib.md5()  # noqa: S324
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            md5.update(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+        fh.seek(pos)
+        return md5.hexdigest()
+
+    def getKey(self, route, reqObj):
+        """Return the cache key of a request -- a digest of the route, the request parameters
+        and the MD5 digests of uploaded files.  Returns None if a parameter value cannot be keyed.
+        """
+        pL = []
+        for k, vL in sorted(reqObj.getDictionary().items()):
+            if k in self.__excludeKeys:
+                continue
+            kL = []
+            for v in vL if isinstance(vL, list) else [vL]:
+                if isinstance(v, (str, int, float, bool)) or v is None:
+                    kL.append(v)
+                elif isinstance(v, bytes):
+                    kL.append({"md5": hashlib.md5(v).hexdigest()})  # noqa: S324
+                elif hasattr(v, "file"):
+                    kL.append({"filename": getattr(v, "filename", None), "md5": self.__fileDigest(v.file)})
+                else:
+                    return None
+            pL.append([k, kL])
+        try:
+            text = json.dumps([route, pL], sort_keys=True, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def __count(cls, route, **kwargs):
+        with cls.__guard:
+            sD = cls.__statsD.setdefault(route, {"hits": 0, "misses": 0, "stores": 0, "evictions": 0})
+            for k, v in kwargs.items():
+                sD[k] += v
+
+    @staticmethod
+    def __fileStat(filePath):
+        try:
+            st = os.stat(filePath)
+            return (st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def get(self, key, route):
+        """Return the cached ServiceSessionState for key or None."""
+        if key is None or not os.access(self.__filePath, os.F_OK):
+            self.__count(route, misses=1)
+            return None
+        try:
+            with self.__connect() as conn:
+                row = conn.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.__count(route, misses=1)
+                    return None
+                rD = pickle.loads(row[0])  # noqa: S301
+                if any(self.__fileStat(fT[1]) != st for fT, st in rD["files"]):
+                    # referenced files removed or modified
+                    conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self.__count(route, misses=1, evictions=1)
+                    return None
+                conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+        except Exception as e:
+            if not self.__recover(e):
+                logger.exception("Result cache lookup failing for %s", self.__filePath)
+            self.__count(route, misses=1)
+            return None
+        self.__count(route, hits=1)
+        sst = ServiceSessionState()
+        sst.setAppDataDict(rD["appdata"])
+        for fT in rD["downloads"]:
+            sst.setDownload(*fT)
+        for fT in rD["uploads"]:
+            sst.setUpload(*fT)
+        sst.setResponseFormat(rD["responseformat"])
+        sst.setServiceStatusText(rD["statustext"])
+        if rD["warningflag"]:
+            sst.setServiceWarning(rD["warningmessage"], format=rD["responseformat"])
+        return sst
+
+    def set(self, key, route, sst):
+        """Store a successful result and evict the least recently used entries beyond the cache bounds."""
+        if key is None or sst is None or sst.getServiceErrorFlag():
+            return False
+        fileL = [fT for fT in sst.getDownloadList() + sst.getUploadList() if fT[1]]
+        rD = {
+            "appdata": sst.getAppDataDict(),
+            "downloads": sst.getDownloadList(),
+            "uploads": sst.getUploadList(),
+            "responseformat": sst.getResponseFormat(),
+            "statustext": sst.getServiceStatusText(),
+            "warningflag": sst.getServiceWarningFlag(),
+            "warningmessage": sst.getServiceWarningMessage(),
+            "files": [(fT, self.__fileStat(fT[1])) for fT in fileL],
+        }
+        try:
+            payload = pickle.dumps(rD, pickle.HIGHEST_PROTOCOL)
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Result of route %s cannot be cached", route)
+            return False
+        if len(payload) > self.__maxBytes:
+            return False
+        tS = time.time()
+        try:
+            with self.__connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, route, size, created, last_access, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, route, len(payload), tS, tS, sqlite3.Binary(payload)),
+                )
+                nEvict = self.__evict(conn)
+        except Exception as e:
+            if not self.__recover(e):
+                logger.exception("Result cache update failing for %s", self.__filePath)
+            return False
+        self.__count(route, stores=1, evictions=nEvict)
+        return True
+
+    def __evict(self, conn):
+        nEntries, nBytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if nBytes <= self.__maxBytes and (self.__maxEntries is None or nEntries <= self.__maxEntries):
+            return 0
+        keyL = []
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_access, created"):
+            if nBytes <= self.__maxBytes and (self.__maxEntries is None or nEntries <= self.__maxEntries):
+                break
+            keyL.append((key,))
+            nBytes -= size
+            nEntries -= 1
+        conn.executemany("DELETE FROM results WHERE key = ?", keyL)
+        return len(keyL)
+
+    def clear(self):
+        """Remove all cached results."""
+        if not os.access(self.__filePath, os.F_OK):
+            return True
+        try:
+            with self.__connect() as conn:
+                conn.execute("DELETE FROM results")
+            return True
+        except Exception as e:
+            if self.__recover(e):
+                return True
+            logger.exception("Result cache clear failing for %s", self.__filePath)
+        return False
+
+    def getUsage(self):
+        """Return the number of entries and total size of the stored results."""
+        if not os.access(self.__filePath, os.F_OK):
+            return {"entries": 0, "bytes": 0}
+        with self.__connect() as conn:
+            nEntries, nBytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return {"entries": nEntries, "bytes": nBytes}
+
+    @classmethod
+    def getSummary(cls):
+        """Return the counts of this process as a dictionary route -> counts (hits, misses, stores and evictions)."""
+        with cls.__guard:
+            return {route: dict(sD) for route, sD in cls.__statsD.items()}
+
+    @classmethod
+    def reset(cls):
+        with cls.__guard:
+            cls.__statsD = {}
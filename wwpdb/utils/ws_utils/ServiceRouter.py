@@ -0,0 +1,179 @@
+##
+# File: ServiceRouter.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Request path routing table with path parameters and method matching.
+
+Routes are URL path patterns made of literal segments and parameter segments --
+
+    /service/v1/status                       exact path
+    /service/v1/entry/{entry_id}             {name} captures one path segment
+    /service/v1/entry/{entry_id}/files/{name:path}
+                                             {name:path} captures the rest of the path (last segment only)
+
+Routes without parameters are held in a dictionary keyed by path.  Routes with
+parameters are compiled into a segment trie at registration time, so a lookup
+costs one dictionary probe per path segment independent of the number of
+routes.  Literal segments take precedence over parameter segments.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import logging
+
+logger = logging.getLogger()
+
+
+class _RouteNode:
+    __slots__ = ("leafD", "param", "rest", "static")
+
+    def __init__(self):
+        self.static = {}
+        self.param = None
+        self.rest = None
+        # method (None for any method) -> (target, parameter name list)
+        self.leafD = {}
+
+
+class ServiceRouter:
+    """Routing table mapping request paths and methods to targets."""
+
+    def __init__(self):
+        self.__exactD = {}
+        self.__root = _RouteNode()
+        self.__count = 0
+
+    def __len__(self):
+        return self.__count
+
+    def __parse(self, pattern):
+        """Return the segment list of pattern with parameters as (kind, name) tuples."""
+        segL = []
+        sL = pattern.split("/")
+        for ii, seg in enumerate(sL):
+            if seg.startswith("{") and seg.endswith("}"):
+                name, _, kind = seg[1:-1].partition(":")
+                kind = kind or "segment"
+                if not name or kind not in ("segment", "path"):
+                    raise ValueError("Bad path parameter %r in route %r" % (seg, pattern))
+                if kind == "path" and ii != len(sL) - 1:
+                    raise ValueError("Path parameter %r must be the last segment of route %r" % (seg, pattern))
+                segL.append((kind, name))
+            else:
+                segL.append(seg)
+        return segL
+
+    def add(self, pattern, target, methods=None):
+        """Add a route.
+
+        :param string pattern: request path pattern
+        :param target: object returned for matching requests (e.g. a bound method)
+        :param methods: optional list of HTTP methods accepted by this route (default any method)
+        """
+        segL = self.__parse(pattern)
+        nameL = [seg[1] for seg in segL if isinstance(seg, tuple)]
+        if not nameL:
+            leafD = self.__exactD.setdefault(pattern, {})
+        else:
+            node = self.__root
+            for seg in segL:
+                if not isinstance(seg, tuple):
+                    node = node.static.setdefault(seg, _RouteNode())
+                elif seg[0] == "segment":
+                    if node.param is None:
+                        node.param = _RouteNode()
+                    node = node.param
+                else:
+                    if node.rest is None:
+                        node.rest = _RouteNode()
+                    node = node.rest
+            leafD = node.leafD
+        for method in [m.upper() for m in methods] if methods else [None]:
+            if method in leafD:
+                logger.warning("Replacing route %r method %s", pattern, method or "any")
+            else:
+                self.__count += 1
+            leafD[method] = (target, nameL)
+
+    def __select(self, leafD, method):
+        if method is None:
+            # method not known - any route for the path
+            return leafD.get(None) or next(iter(leafD.values()), None)
+        return leafD.get(method.upper()) or leafD.get(None)
+
+    def __search(self, node, segL, ii, method, valL):
+        if ii == len(segL):
+            if node.leafD:
+                hit = self.__select(node.leafD, method)
+                if hit is not None:
+                    return hit, valL
+            if node.rest is not None:
+                hit = self.__select(node.rest.leafD, method)
+                if hit is not None:
+                    return hit, [*valL, ""]
+            return None
+        seg = segL[ii]
+        child = node.static.get(seg)
+        if child is not None:
+            ret = self.__search(child, segL, ii + 1, method, valL)
+            if ret is not None:
+                return ret
+        if node.param is not None and seg:
+            ret = self.__search(node.param, segL, ii + 1, method, [*valL, seg])
+            if ret is not None:
+                return ret
+        if node.rest is not None:
+            hit = self.__select(node.rest.leafD, method)
+            if hit is not None:
+                return hit, [*valL, "/".join(segL[ii:])]
+        return None
+
+    def match(self, path, method=None):
+        """Return (target, parameter dictionary) for the route matching path and method or (None, None).
+
+        :param string path: request path
+        :param string method: HTTP method of the request (None matches routes for any method)
+        """
+        leafD = self.__exactD.get(path)
+        if leafD is not None:
+            hit = self.__select(leafD, method)
+            if hit is not None:
+                return hit[0], {}
+        ret = self.__search(self.__root, path.split("/"), 0, method, [])
+        if ret is None:
+            return None, None
+        (target, nameL), valL = ret
+        return target, dict(zip(nameL, valL))
+
+    def getAllowedMethods(self, path):
+        """Return the sorted list of HTTP methods with a route for path (empty if none or any method)."""
+        mL = set()
+        for leafD in self.__iterLeaves(path):
+            mL.update(m for m in leafD if m is not None)
+        return sorted(mL)
+
+    def __iterLeaves(self, path):
+        if path in self.__exactD:
+            yield self.__exactD[path]
+        segL = path.split("/")
+        stack = [(self.__root, 0)]
+        while stack:
+            node, ii = stack.pop()
+            if node.rest is not None:
+                yield node.rest.leafD
+            if ii == len(segL):
+                yield node.leafD
+                continue
+            if segL[ii] in node.static:
+                stack.append((node.static[segL[ii]], ii + 1))
+            if node.param is not None and segL[ii]:
+                stack.append((node.param, ii + 1))
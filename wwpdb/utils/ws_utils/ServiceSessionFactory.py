@@ -3,6 +3,13 @@
 # Date:    6-Jul-2016 J. Westbrook
 #
 # Updates:
+#   19-Oct-2026  add optional hashed fan-out layout for session directories
+#   19-Oct-2026  random session identifiers and atomic claim of new session directories
+#   19-Oct-2026  optional pool of pre-created session directories
+#   19-Oct-2026  remakeSessionPath() moves the old directory to trash for background removal
+#   19-Oct-2026  optional session disk usage accounting and quotas
+#   19-Oct-2026  optional per-user session index
+#   19-Oct-2026  remember the resolved session path to avoid repeated existence checks
 ##
 """
 Utilities for service session directory management.
@@ -16,11 +23,15 @@ __license__ = "Creative Commons Attribution 3.0 Unported"
 __version__ = "V0.07"
 
 
-import hashlib
 import logging
 import os.path
+import secrets
 import shutil
-import time
+
+from wwpdb.utils.ws_utils.ServiceSessionIndex import ServiceSessionIndex
+from wwpdb.utils.ws_utils.ServiceSessionPool import ServiceSessionPool
+from wwpdb.utils.ws_utils.ServiceSessionSweeper import moveToTrash
+from wwpdb.utils.ws_utils.ServiceSessionUsage import ServiceSessionUsage
 
 logger = logging.getLogger()
 
@@ -31,20 +42,38 @@ class ServiceSessionFactory:
 
     """
 
-    def __init__(self, topPath=None, serviceUserId=None):
+    def __init__(self, topPath=None, serviceUserId=None, fanOut=False, poolSize=0):
         """
         Organization of the service session directory is --
 
-        <topPath>/<Service_id>/<sha-hash>/<session_files>
+        <topPath>/sessions/<Service_id>/<sha-hash>/<session_files>
+
+        or with fanOut=True --
+
+        <topPath>/sessions/<Service_id>/<sha-hash[0:2]>/<sha-hash[2:4]>/<sha-hash>/<session_files>
+
+        With fanOut=True existing sessions in the flat layout are still found.
 
         Parameters:
         :param string topPath: is the path to the directory containing the hash-id sub-directory.
         :param string serviceId: is the path to the directory containing the hash-id sub-directory.
+        :param bool fanOut: place new sessions in hashed sub-directories of the service user directory.
+        :param int poolSize: if > 0 create session directories by claiming from a pool of this size
+                             of pre-created directories (see ServiceSessionPool).
 
         """
         self.__topSessionPath = topPath or "."
         self.__serviceUserId = serviceUserId or "ANONYMOUS"
+        self.__fanOut = fanOut
+        self.__poolSize = poolSize
         self.__uid = None
+        self.__usageD = None
+        self.__indexing = False
+        #
+        #  Resolved path and layout of the current session once its directory is known to exist -
+        #  reset whenever the identifier, top path, service user or layout changes.
+        #
+        self.__pathD = None
 
     def __str__(self):
         return "Session top path: %s\nService user id: %s\nUnique identifier: %s\nSession path: %s\n" % (
@@ -59,34 +88,77 @@ class ServiceSessionFactory:
 
     def setId(self, uid):
         self.__uid = uid
+        self.__pathD = None
         return True
 
     def getId(self):
         return self.__uid
 
     def assignId(self):
-        self.__uid = hashlib.sha1(repr(time.time()).encode("utf-8")).hexdigest()  # noqa: S324
+        """Assign a random 160-bit session identifier (40 hex characters).
+
+        Identifiers are drawn from the system CSPRNG so concurrent workers never
+        need to coordinate.  Random (not time-ordered) leading characters keep
+        the fan-out sub-directories evenly filled.
+        """
+        self.__uid = secrets.token_hex(20)
+        self.__pathD = None
         return self.__uid
 
-    def __getPath(self, relative=False):
+    def __getUidPath(self, fanOut):
+        """Return the session path relative to the service user directory."""
+        if fanOut:
+            return os.path.join(self.__uid[0:2], self.__uid[2:4], self.__uid)
+        return self.__uid
+
+    def __getPath(self, relative=False, fanOut=None):
         pth = None
+        if fanOut is None:
+            fanOut = self.__resolveFanOut()
         try:
             if relative:
-                pth = os.path.join("/sessions", self.__serviceUserId, self.__uid)
+                pth = os.path.join("/sessions", self.__serviceUserId, self.__getUidPath(fanOut))
             else:
-                pth = os.path.join(self.__topSessionPath, "sessions", self.__serviceUserId, self.__uid)
+                pth = os.path.join(self.__topSessionPath, "sessions", self.__serviceUserId, self.__getUidPath(fanOut))
         except:  # noqa: E722 pylint: disable=bare-except
             logger.exception("FAILING")
             pth = None
 
         return pth
 
+    def __resolveFanOut(self):
+        """Return the layout of the current session -  the fan-out layout unless only a legacy flat
+        session directory exists.
+        """
+        if not self.__fanOut or self.__uid is None:
+            return False
+        if self.__pathD is not None:
+            return self.__pathD["fanOut"]
+        try:
+            if not os.access(self.__getPath(fanOut=True), os.F_OK) and os.access(self.__getPath(fanOut=False), os.F_OK):
+                return False
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("FAILING")
+        return True
+
+    def __setPath(self, pth, fanOut):
+        self.__pathD = {"path": pth, "fanOut": fanOut} if pth is not None else None
+        return pth
+
     def getPath(self):
+        """Return the path of the current session directory or None if it does not exist.
+
+        The existence check is made once - the resolved path is returned from then on.
+        """
+        if self.__pathD is not None:
+            return self.__pathD["path"]
         try:
-            pth = self.__getPath()
-            logger.debug("Session path %r", pth)
-            if os.access(pth, os.F_OK):
-                return pth
+            # with fan-out enabled fall back to any legacy flat session directory
+            for fanOut in [True, False] if self.__fanOut else [False]:
+                pth = self.__getPath(fanOut=fanOut)
+                logger.debug("Session path %r", pth)
+                if os.access(pth, os.F_OK):
+                    return self.__setPath(pth, fanOut)
             return None
         except:  # noqa: E722 pylint: disable=bare-except
             logger.exception("FAILING")
@@ -96,6 +168,48 @@ class ServiceSessionFactory:
     def getRelativePath(self):
         return self.__getPath(relative=True)
 
+    def setFanOut(self, fanOut):
+        self.__fanOut = fanOut
+        self.__pathD = None
+        return True
+
+    def getFanOut(self):
+        return self.__fanOut
+
+    def setPoolSize(self, poolSize):
+        self.__poolSize = poolSize
+        return True
+
+    def getPoolSize(self):
+        return self.__poolSize
+
+    def __getPool(self):
+        if self.__poolSize > 0:
+            return ServiceSessionPool.getPool(self.getSessionUserPath(), size=self.__poolSize, fanOut=self.__fanOut)
+        return None
+
+    def setUsageTracking(self, track=True, quotaBytes=None, sessionQuotaBytes=None):
+        """Maintain disk usage counters for sessions of the service user with optional quotas
+        (see ServiceSessionUsage).
+        """
+        self.__usageD = {"quotaBytes": quotaBytes, "sessionQuotaBytes": sessionQuotaBytes} if track else None
+        return True
+
+    def getUsage(self):
+        """Return a ServiceSessionUsage object for the current session or None if usage tracking is off."""
+        if self.__usageD is None:
+            return None
+        return ServiceSessionUsage(self.getSessionUserPath(), sessionId=self.__uid, **self.__usageD)
+
+    def setIndexing(self, indexing=True):
+        """Record new sessions in the per-user session index (see ServiceSessionIndex)."""
+        self.__indexing = indexing
+        return True
+
+    def getIndex(self):
+        """Return the ServiceSessionIndex of the service user or None if indexing is off."""
+        return ServiceSessionIndex(self.getSessionUserPath()) if self.__indexing else None
+
     def getTopPath(self):
         return self.__topSessionPath
 
@@ -104,6 +218,7 @@ class ServiceSessionFactory:
 
     def setTopPath(self, topSessionPath):
         self.__topSessionPath = topSessionPath
+        self.__pathD = None
         return True
 
     def getTopSessionPath(self):
@@ -111,10 +226,12 @@ class ServiceSessionFactory:
 
     def setTopSessionPath(self, topSessionPath):
         self.__topSessionPath = topSessionPath
+        self.__pathD = None
         return True
 
     def setServiceUserId(self, serviceUserId):
         self.__serviceUserId = serviceUserId
+        self.__pathD = None
         return True
 
     def makeSessionPath(self):
@@ -122,19 +239,74 @@ class ServiceSessionFactory:
         create it and return the session path.
         """
         try:
-            pth = self.__getPath()
-            if not os.access(pth, os.F_OK):
-                os.makedirs(pth)
+            pth = self.getPath()
+            if pth is None:
+                pth = self.__getPath(fanOut=self.__fanOut)
+                pool = self.__getPool()
+                if pool is None or pool.claim(targetPath=pth)[0] is None:
+                    os.makedirs(pth)
+                self.__setPath(pth, self.__fanOut)
             return pth
         except:  # noqa: E722 pylint: disable=bare-except
             return None
 
+    def makeNewSessionPath(self, maxTries=5):
+        """Assign a new session identifier and atomically claim its session directory.
+
+        The final directory is created with a single mkdir() which fails if it already
+        exists, so an identifier collision is detected and a new identifier is drawn.
+
+        With a session pool the identifier and directory of a pooled entry are claimed
+        with a single rename() instead.
+
+        Returns the session path or None on failure.
+        """
+        pth = self.__setPath(self.__claimNewSessionPath(maxTries), self.__fanOut)
+        index = self.getIndex()
+        if pth is not None and index is not None:
+            index.add(self.__uid)
+        return pth
+
+    def __claimNewSessionPath(self, maxTries):
+        pool = self.__getPool()
+        if pool is not None:
+            userPath = self.getSessionUserPath()
+            uid, pth = pool.claim(pathFn=lambda uid: os.path.join(userPath, pool.getUidPath(uid)))
+            if uid is not None:
+                self.__uid = uid
+                return pth
+        for _ in range(maxTries):
+            self.assignId()
+            pth = self.__getPath(fanOut=self.__fanOut)
+            try:
+                os.makedirs(os.path.dirname(pth), exist_ok=True)
+                os.mkdir(pth)
+                return pth
+            except FileExistsError:
+                logger.warning("Session identifier collision for %s - retrying", pth)
+            except:  # noqa: E722 pylint: disable=bare-except
+                logger.exception("FAILING to create session path %r", pth)
+                return None
+        return None
+
     def remakeSessionPath(self):
+        """Replace the current session directory with an empty one.
+
+        The old directory is renamed into the trash area of the service user directory
+        and removed on a background thread (or by the sweeper), so the time taken does
+        not depend on the size of the session.
+        """
         try:
-            pth = self.__getPath()
-            if os.access(pth, os.F_OK):
+            fanOut = self.__resolveFanOut()
+            pth = self.__getPath(fanOut=fanOut)
+            if moveToTrash(pth, self.getSessionUserPath()) is None and os.access(pth, os.F_OK):
                 shutil.rmtree(pth, True)
-            os.makedirs(pth)
-            return pth
+            usage = self.getUsage()
+            if usage is not None:
+                usage.remove()
+            pool = self.__getPool()
+            if pool is None or pool.claim(targetPath=pth)[0] is None:
+                os.makedirs(pth)
+            return self.__setPath(pth, fanOut)
         except:  # noqa: E722 pylint: disable=bare-except
             return None
@@ -0,0 +1,218 @@
+##
+# File: ServiceSessionIndex.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Per service user index of sessions for fast listing.
+
+Session id, creation time, last access time, status and size are kept in a
+small SQLite database in the service user directory
+(<topPath>/sessions/<service_user_id>/session-index.sqlite) with indexes on the
+sort and filter columns, so a page of sessions is read without listing the
+user directory or opening any session data store.
+
+The index is maintained by ServiceSessionFactory (creation), ServiceWorkerBase
+(access and status) and ServiceSessionSweeper (removal and rebuild).
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import contextlib
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger()
+
+
+class ServiceSessionIndex:
+    """Index of the sessions of a service user queryable with filters and pagination."""
+
+    INDEX_FILE_NAME = "session-index.sqlite"
+    ORDER_COLUMNS = ("created", "last_access", "status", "size", "sid")
+
+    #  Index files whose schema has been set up by this process - index objects are made per request
+    __setupPaths = set()  # noqa: RUF012
+
+    def __init__(self, sessionUserPath, timeoutSeconds=10.0):
+        """
+        :param string sessionUserPath: service user session directory (<topPath>/sessions/<service_user_id>)
+        :param float timeoutSeconds: time to wait for a database lock held by another writer
+        """
+        self.__sessionUserPath = sessionUserPath
+        self.__filePath = os.path.join(sessionUserPath, self.INDEX_FILE_NAME)
+        self.__timeoutSeconds = timeoutSeconds
+
+    def getFilePath(self):
+        return self.__filePath
+
+    def exists(self):
+        return os.access(self.__filePath, os.F_OK)
+
+    @contextlib.contextmanager
+    def __connect(self):
+        if not os.access(self.__filePath, os.F_OK):
+            os.makedirs(self.__sessionUserPath, exist_ok=True)
+            self.__setupPaths.discard(self.__filePath)
+        conn = sqlite3.connect(self.__filePath, timeout=self.__timeoutSeconds)
+        try:
+            conn.row_factory = sqlite3.Row
+            if self.__filePath not in self.__setupPaths:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS sessions "
+                    "(sid TEXT PRIMARY KEY, created REAL, last_access REAL, status TEXT, size INTEGER DEFAULT 0)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access, sid)")
+                conn.execute("CREATE INDEX IF NOT EXISTS sessions_created ON sessions (created, sid)")
+                conn.execute("CREATE INDEX IF NOT EXISTS sessions_status ON sessions (status, last_access)")
+                self.__setupPaths.add(self.__filePath)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def __execute(self, sql, params=()):
+        try:
+            with self.__connect() as conn:
+                conn.execute(sql, params)
+            return True
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Session index update failing for %s", self.__filePath)
+        return False
+
+    def add(self, sessionId, created=None, status="created"):
+        """Add a new session to the index."""
+        tS = created or time.time()
+        return self.__execute(
+            "INSERT OR REPLACE INTO sessions (sid, created, last_access, status, size) VALUES (?, ?, ?, ?, 0)",
+            (sessionId, tS, tS, status),
+        )
+
+    def touch(self, sessionId, size=None):
+        """Record an access to a session (adding it to the index if missing) and optionally its size."""
+        tS = time.time()
+        if size is None:
+            return self.__execute(
+                "INSERT INTO sessions (sid, created, last_access, status) VALUES (?, ?, ?, 'created') "
+                "ON CONFLICT(sid) DO UPDATE SET last_access = excluded.last_access",
+                (sessionId, tS, tS),
+            )
+        return self.__execute(
+            "INSERT INTO sessions (sid, created, last_access, status, size) VALUES (?, ?, ?, 'created', ?) "
+            "ON CONFLICT(sid) DO UPDATE SET last_access = excluded.last_access, size = excluded.size",
+            (sessionId, tS, tS, size),
+        )
+
+    def setStatus(self, sessionId, status):
+        tS = time.time()
+        return self.__execute(
+            "INSERT INTO sessions (sid, created, last_access, status) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(sid) DO UPDATE SET status = excluded.status, last_access = excluded.last_access",
+            (sessionId, tS, tS, status),
+        )
+
+    def remove(self, sessionIdList):
+        try:
+            with self.__connect() as conn:
+                conn.executemany("DELETE FROM sessions WHERE sid = ?", [(sid,) for sid in sessionIdList])
+            return True
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Session index update failing for %s", self.__filePath)
+        return False
+
+    def rebuild(self, rowList):
+        """Replace the index contents with rowList - dictionaries with keys sid, created, last_access, status, size."""
+        try:
+            with self.__connect() as conn:
+                conn.execute("DELETE FROM sessions")
+                conn.executemany(
+                    "INSERT INTO sessions (sid, created, last_access, status, size) "
+                    "VALUES (:sid, :created, :last_access, :status, :size)",
+                    rowList,
+                )
+            return True
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Session index rebuild failing for %s", self.__filePath)
+        return False
+
+    def __where(self, status, createdAfter, createdBefore, accessedAfter, accessedBefore):
+        cL = []
+        pL = []
+        if status is not None:
+            statusL = [status] if isinstance(status, str) else list(status)
+            cL.append("status IN (%s)" % ",".join("?" * len(statusL)))
+            pL.extend(statusL)
+        for col, op, val in (
+            ("created", ">=", createdAfter),
+            ("created", "<", createdBefore),
+            ("last_access", ">=", accessedAfter),
+            ("last_access", "<", accessedBefore),
+        ):
+            if val is not None:
+                cL.append("%s %s ?" % (col, op))
+                pL.append(val)
+        return (" WHERE " + " AND ".join(cL)) if cL else "", pL
+
+    def getSessions(
+        self,
+        status=None,
+        createdAfter=None,
+        createdBefore=None,
+        accessedAfter=None,
+        accessedBefore=None,
+        orderBy="last_access",
+        descending=True,
+        limit=50,
+        offset=0,
+    ):
+        """Return a page of index entries as a list of dictionaries.
+
+        :param status: status or list of statuses to select
+        :param float createdAfter,createdBefore,accessedAfter,accessedBefore: optional time bounds (epoch seconds)
+        :param string orderBy: one of created, last_access, status, size or sid
+        :param bool descending: sort order
+        :param int limit: page size
+        :param int offset: number of entries to skip
+        """
+        if orderBy not in self.ORDER_COLUMNS:
+            raise ValueError("Unsupported session index order %r" % orderBy)
+        if not self.exists():
+            return []
+        where, pL = self.__where(status, createdAfter, createdBefore, accessedAfter, accessedBefore)
+        direction = "DESC" if descending else "ASC"
+        sql = (
+            "SELECT sid, created, last_access, status, size FROM sessions%s ORDER BY %s %s, sid %s LIMIT ? OFFSET ?"
+            % (
+                where,
+                orderBy,
+                direction,
+                direction,
+            )
+        )
+        try:
+            with self.__connect() as conn:
+                return [dict(row) for row in conn.execute(sql, [*pL, limit, offset])]
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Session index query failing for %s", self.__filePath)
+        return []
+
+    def getCount(self, status=None, createdAfter=None, createdBefore=None, accessedAfter=None, accessedBefore=None):
+        """Return the number of index entries matching the filters."""
+        if not self.exists():
+            return 0
+        where, pL = self.__where(status, createdAfter, createdBefore, accessedAfter, accessedBefore)
+        try:
+            with self.__connect() as conn:
+                return conn.execute("SELECT COUNT(*) FROM sessions%s" % where, pL).fetchone()[0]
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Session index query failing for %s", self.__filePath)
+        return 0
@@ -0,0 +1,204 @@
+##
+# File: ServiceSessionPool.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Pool of pre-created empty session directories for low latency session creation.
+
+Each service user directory may hold a pool sub-directory (.pool) of empty
+directories named with fresh session identifiers.  A new session claims an
+entry with a single rename() into the session path, so the mkdir() calls
+(slow on network filesystems) are moved onto a background refiller thread.
+
+    pool = ServiceSessionPool.getPool(sessionUserPath, size=16, fanOut=True)
+    sessionId, sessionPath = pool.claim(pathFn)
+
+Pools are shared process-wide per (sessionUserPath, fanOut) and several
+processes may share the same pool directory.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import collections
+import logging
+import os
+import secrets
+import threading
+import time
+
+from wwpdb.utils.ws_utils.ServiceLockMetrics import LockHistogram
+
+logger = logging.getLogger()
+
+
+class ServiceSessionPool:
+    """Pre-created session directories for a service user, maintained by a background refiller."""
+
+    POOL_DIR_NAME = ".pool"
+    __guard = threading.Lock()
+    __poolD = {}  # noqa: RUF012
+
+    def __init__(self, sessionUserPath, size=8, fanOut=False, lowWater=None, refillSeconds=30.0):
+        """
+        :param string sessionUserPath: service user session directory (<topPath>/sessions/<service_user_id>)
+        :param int size: target number of pooled directories
+        :param bool fanOut: pre-create the hashed fan-out parents of pooled session identifiers
+        :param int lowWater: wake the refiller when fewer entries remain (default size/2)
+        :param float refillSeconds: period of the refiller when not woken by claims
+        """
+        self.__sessionUserPath = sessionUserPath
+        self.__poolPath = os.path.join(sessionUserPath, self.POOL_DIR_NAME)
+        self.__size = max(1, size)
+        self.__fanOut = fanOut
+        self.__lowWater = lowWater if lowWater is not None else self.__size // 2
+        self.__refillSeconds = refillSeconds
+        self.__nameQ = collections.deque()
+        self.__wake = threading.Event()
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__statsGuard = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__refillCount = 0
+        self.__refillHist = LockHistogram()
+
+    @classmethod
+    def getPool(cls, sessionUserPath, size=8, fanOut=False):
+        """Return the process-wide pool for the service user directory, starting its refiller if needed."""
+        ky = (os.path.abspath(sessionUserPath), fanOut)
+        with cls.__guard:
+            pool = cls.__poolD.get(ky)
+            if pool is None:
+                pool = cls(sessionUserPath, size=size, fanOut=fanOut)
+                pool.start()
+                cls.__poolD[ky] = pool
+            return pool
+
+    @classmethod
+    def stopAll(cls):
+        with cls.__guard:
+            poolL = list(cls.__poolD.values())
+            cls.__poolD = {}
+        for pool in poolL:
+            pool.stop()
+
+    def getPoolPath(self):
+        return self.__poolPath
+
+    def getUidPath(self, uid):
+        """Return the session path relative to the service user directory for the pool layout."""
+        if self.__fanOut:
+            return os.path.join(uid[0:2], uid[2:4], uid)
+        return uid
+
+    def start(self):
+        if self.__thread is None:
+            self.__stop.clear()
+            self.__thread = threading.Thread(target=self.__run, name="ServiceSessionPool", daemon=True)
+            self.__thread.start()
+
+    def stop(self):
+        if self.__thread is not None:
+            self.__stop.set()
+            self.__wake.set()
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        while not self.__stop.is_set():
+            try:
+                self.refill()
+            except:  # noqa: E722 pylint: disable=bare-except
+                logger.exception("Session pool refill failing for %s", self.__poolPath)
+            self.__wake.wait(self.__refillSeconds)
+            self.__wake.clear()
+
+    def refill(self):
+        """Create pooled directories up to the target size.  Returns the number created."""
+        tBegin = time.perf_counter()
+        os.makedirs(self.__poolPath, exist_ok=True)
+        nCur = len(os.listdir(self.__poolPath))
+        nCreated = 0
+        while nCur + nCreated < self.__size and not self.__stop.is_set():
+            uid = secrets.token_hex(20)
+            if self.__fanOut:
+                os.makedirs(os.path.join(self.__sessionUserPath, uid[0:2], uid[2:4]), exist_ok=True)
+            os.mkdir(os.path.join(self.__poolPath, uid))
+            self.__nameQ.append(uid)
+            nCreated += 1
+        if nCreated:
+            with self.__statsGuard:
+                self.__refillCount += nCreated
+                self.__refillHist.add(time.perf_counter() - tBegin)
+            logger.debug("Session pool %s refilled with %d entries", self.__poolPath, nCreated)
+        return nCreated
+
+    def __nextName(self):
+        try:
+            return self.__nameQ.popleft()
+        except IndexError:
+            pass
+        # pick up entries created by other processes or earlier runs
+        try:
+            self.__nameQ.extend(os.listdir(self.__poolPath))
+            return self.__nameQ.popleft()
+        except (FileNotFoundError, IndexError):
+            return None
+
+    def claim(self, targetPath=None, pathFn=None):
+        """Move a pooled directory into place with a single rename.
+
+        The target is targetPath or, when a pathFn is given, pathFn(uid) where uid
+        is the pooled session identifier.  Identifiers are 160-bit random values
+        so a pooled identifier is taken not to collide with an existing session.
+
+        Returns (uid, sessionPath) or (None, None) when the pool is empty.
+        """
+        try:
+            while True:
+                uid = self.__nextName()
+                if uid is None:
+                    break
+                src = os.path.join(self.__poolPath, uid)
+                dst = targetPath or pathFn(uid)
+                try:
+                    os.rename(src, dst)
+                except FileNotFoundError:
+                    if not os.access(src, os.F_OK):
+                        continue  # claimed by another worker
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    os.rename(src, dst)
+                self.__record(hit=True)
+                return uid, dst
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Session pool claim failing for %s", self.__poolPath)
+        finally:
+            if len(self.__nameQ) <= self.__lowWater:
+                self.__wake.set()
+        self.__record(hit=False)
+        return None, None
+
+    def __record(self, hit):
+        with self.__statsGuard:
+            if hit:
+                self.__hits += 1
+            else:
+                self.__misses += 1
+
+    def getMetrics(self):
+        """Return pool hit, miss and refill statistics."""
+        with self.__statsGuard:
+            return {
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "refilled": self.__refillCount,
+                "refill_latency": self.__refillHist.getDict(),
+            }
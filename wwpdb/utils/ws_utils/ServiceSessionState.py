@@ -4,6 +4,8 @@
 #
 # Updated:
 #         5-Aug-2016  jdw add support for application data
+#        19-Oct-2026      add request phase timing (Server-Timing)
+#        19-Oct-2026      add service status code
 ##
 """
 Accessors to encapsulate common service session data management details --
@@ -42,17 +44,22 @@ class ServiceSessionState:
         self.__A = {}
         self.__uFL = []
         self.__dFL = []
+        #
+        #  Request phase times -
+        self.__T = {}
         self.clear()
 
     def clear(self):
         self.__A = {}
         self.__uFL = []
         self.__dFL = []
+        self.__T = {}
         self.__D = {}
         for ky in self.__strKeyList:
             self.__D[ky] = ""
         for ky in self.__boolKeyList:
             self.__D[ky] = False
+        self.__D["statuscode"] = 200
 
     def setAppDataDict(self, dictval, errFlag=False, format="json"):  # noqa: A002 pylint: disable=redefined-builtin
         try:
@@ -145,6 +152,13 @@ class ServiceSessionState:
         self.__D["warningmessage"] = msg
         self.__D["responseformat"] = format
 
+    def setServiceStatusCode(self, statusCode):
+        """Set the HTTP status code suggested for the response (e.g. 429 for a rejected request)."""
+        self.__D["statuscode"] = statusCode
+
+    def getServiceStatusCode(self):
+        return self.__D["statuscode"]
+
     def setServiceErrorFlag(self, boolFlag):
         self.__D["errorflag"] = boolFlag
 
@@ -168,3 +182,14 @@ class ServiceSessionState:
 
     def getServiceWarningMessage(self):
         return self.__D["warningmessage"]
+
+    def setTimingDict(self, timingD):
+        """Set the request phase times (phase name -> seconds)."""
+        self.__T = timingD
+
+    def getTimingDict(self):
+        return self.__T
+
+    def getServerTiming(self):
+        """Return the request phase times as a Server-Timing header value (durations in milliseconds)."""
+        return ", ".join("%s;dur=%.3f" % (phase, 1000.0 * seconds) for phase, seconds in self.__T.items())
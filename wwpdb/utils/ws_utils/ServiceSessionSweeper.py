@@ -0,0 +1,415 @@
+##
+# File: ServiceSessionSweeper.py
+# Date: 19-Oct-2026
+#
+# Update:
+#  19-Oct-2026  skip the session pool directory
+#  19-Oct-2026  add session trash area with background deletion
+#  19-Oct-2026  update and reconcile session disk usage counters
+#  19-Oct-2026  update and rebuild the per-user session index
+##
+"""
+Expiry sweeper for service session directories.
+
+Walks <topPath>/sessions/<service_user_id>/ (flat and fan-out layouts), selects
+sessions by age of last activity and service history status, and removes them
+with bounded concurrency.  Sessions with a history status that is still in
+progress (e.g. 'submitted' without 'completed' or 'failed') are never removed.
+
+Session directories may also be discarded in constant time by moveToTrash(),
+which renames them into <service_user_id>/.trash/ and queues their deletion on
+a background thread.  The sweeper removes anything left in the trash area.
+
+Command line usage:
+
+    python -m wwpdb.utils.ws_utils.ServiceSessionSweeper --top_path <path> --max_age_days 7 [--dry_run]
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import argparse
+import concurrent.futures
+import logging
+import os
+import queue
+import secrets
+import shutil
+import string
+import threading
+import time
+
+from wwpdb.utils.ws_utils.ServiceHistory import ServiceHistory
+from wwpdb.utils.ws_utils.ServiceSessionIndex import ServiceSessionIndex
+from wwpdb.utils.ws_utils.ServiceSessionUsage import ServiceSessionUsage
+
+logger = logging.getLogger()
+
+TRASH_DIR_NAME = ".trash"
+
+_trashQ = queue.Queue()
+_trashThread = None
+_trashGuard = threading.Lock()
+
+
+def _trashWorker():
+    while True:
+        pth = _trashQ.get()
+        try:
+            shutil.rmtree(pth, ignore_errors=True)
+            logger.debug("Removed trash %s", pth)
+        finally:
+            _trashQ.task_done()
+
+
+def deleteLater(pth):
+    """Queue a directory tree for removal on a background thread."""
+    global _trashThread  # pylint: disable=global-statement
+    with _trashGuard:
+        if _trashThread is None:
+            _trashThread = threading.Thread(target=_trashWorker, name="ServiceSessionTrash", daemon=True)
+            _trashThread.start()
+    _trashQ.put(pth)
+
+
+def waitForTrash():
+    """Block until queued background removals have completed."""
+    _trashQ.join()
+
+
+def moveToTrash(pth, sessionUserPath, background=True):
+    """Atomically rename a session directory into the trash area of the service user directory.
+
+    The removal itself is queued for a background thread (background=True) or left for the sweeper.
+    Returns the trash path or None if the directory could not be moved.
+    """
+    trashPath = os.path.join(sessionUserPath, TRASH_DIR_NAME)
+    dst = os.path.join(trashPath, "%s.%s" % (os.path.basename(pth), secrets.token_hex(4)))
+    try:
+        try:
+            os.rename(pth, dst)
+        except FileNotFoundError:
+            if not os.access(pth, os.F_OK):
+                return None
+            os.makedirs(trashPath, exist_ok=True)
+            os.rename(pth, dst)
+    except:  # noqa: E722 pylint: disable=bare-except
+        logger.exception("Failing to move %s to trash", pth)
+        return None
+    if background:
+        deleteLater(dst)
+    return dst
+
+
+class ServiceSessionSweeper:
+    """Select and remove expired service session directories."""
+
+    #  History operations that end a session's processing
+    FINAL_STATUS_LIST = ("completed", "failed")
+    #  History operations that mark a session as in progress unless followed by a final status
+    ACTIVE_STATUS_LIST = ("submitted", "running")
+
+    def __init__(
+        self,
+        topPath,
+        maxAgeSeconds=7 * 86400,
+        useAccessTime=False,
+        statusList=None,
+        dryRun=False,
+        maxWorkers=4,
+        maxDeletesPerSecond=None,
+        reconcileUsage=False,
+        rebuildIndex=False,
+    ):
+        """
+        :param string topPath: top session path (containing the 'sessions' directory)
+        :param float maxAgeSeconds: remove sessions with no activity for longer than this
+        :param bool useAccessTime: judge activity by access time as well as modification time
+        :param list statusList: if set, only remove sessions whose history status is in this list
+                                (the status 'none' selects sessions without history)
+        :param bool dryRun: report the selected sessions without removing them
+        :param int maxWorkers: maximum number of concurrent removals
+        :param float maxDeletesPerSecond: optional limit on the rate of removals
+        :param bool reconcileUsage: rebuild the session disk usage counters of each swept user
+        :param bool rebuildIndex: rebuild the session index of each swept user
+        """
+        self.__topPath = topPath
+        self.__maxAgeSeconds = maxAgeSeconds
+        self.__useAccessTime = useAccessTime
+        self.__statusList = statusList
+        self.__dryRun = dryRun
+        self.__maxWorkers = max(1, maxWorkers)
+        self.__maxDeletesPerSecond = maxDeletesPerSecond
+        self.__reconcileUsage = reconcileUsage
+        self.__rebuildIndex = rebuildIndex
+        self.__sessionsPath = os.path.join(self.__topPath, "sessions")
+
+    def getServiceUserIds(self):
+        try:
+            return sorted(de.name for de in os.scandir(self.__sessionsPath) if de.is_dir(follow_symlinks=False))
+        except FileNotFoundError:
+            return []
+
+    def iterSessions(self, serviceUserId):
+        """Yield (sessionId, sessionPath) for each session of the service user in flat or fan-out layout."""
+        userPath = os.path.join(self.__sessionsPath, serviceUserId)
+        yield from self.__iterDir(userPath, depth=0)
+
+    def __iterDir(self, dirPath, depth):
+        try:
+            entries = list(os.scandir(dirPath))
+        except FileNotFoundError:
+            return
+        for de in entries:
+            # skip non-directories and internal directories such as the session pool
+            if de.name.startswith(".") or not de.is_dir(follow_symlinks=False):
+                continue
+            if depth < 2 and self.__isFanOutBucket(de.name):
+                yield from self.__iterDir(de.path, depth + 1)
+            else:
+                yield de.name, de.path
+
+    def __isFanOutBucket(self, name):
+        return len(name) == 2 and all(ch in string.hexdigits for ch in name)
+
+    def getLastActivity(self, sessionPath):
+        """Return the latest modification (optionally access) time of the session directory and its top level files."""
+        st = os.stat(sessionPath)
+        tLast = max(st.st_mtime, st.st_atime) if self.__useAccessTime else st.st_mtime
+        for de in os.scandir(sessionPath):
+            try:
+                st = de.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            tLast = max(tLast, st.st_mtime, st.st_atime) if self.__useAccessTime else max(tLast, st.st_mtime)
+        return tLast
+
+    def __getLatest(self, sessionD):
+        # the latest transition (tiso, order, op) is the current status
+        opL = [
+            (sessionD[op].get("tiso", "") if isinstance(sessionD[op], dict) else "", ii, op)
+            for ii, op in enumerate(self.ACTIVE_STATUS_LIST + self.FINAL_STATUS_LIST)
+            if op in sessionD
+        ]
+        return max(opL) if opL else None
+
+    def getStatus(self, sessionD):
+        """Return the status of a session from its service history operations dictionary."""
+        if not sessionD:
+            return "none"
+        latest = self.__getLatest(sessionD)
+        if latest is not None:
+            return latest[2]
+        return "created" if "created" in sessionD else max(sessionD)
+
+    def __isActive(self, status):
+        return status in self.ACTIVE_STATUS_LIST
+
+    def getStatusDict(self, historyD):
+        """Return a dictionary of status by session identifier for a service history dictionary.
+
+        Background job records (kept under the job identifier with a session_id) count towards
+        the status of their session -- a session is in progress while any of its jobs is.
+        """
+        statusD = {sId: self.getStatus(sessionD) for sId, sessionD in historyD.items()}
+        jobsD = {}
+        for jobD in historyD.values():
+            sessionId = next(
+                (dD["session_id"] for dD in jobD.values() if isinstance(dD, dict) and "session_id" in dD), None
+            )
+            latest = self.__getLatest(jobD) if sessionId is not None else None
+            if latest is not None:
+                jobsD.setdefault(sessionId, []).append(latest)
+        for sessionId, tL in jobsD.items():
+            latest = self.__getLatest(historyD.get(sessionId, {}))
+            if latest is not None:
+                tL.append(latest)
+            activeL = [tup for tup in tL if self.__isActive(tup[2])]
+            statusD[sessionId] = max(activeL or tL)[2]
+        return statusD
+
+    def select(self, serviceUserId, now=None):
+        """Return a list of (sessionId, sessionPath, status, ageSeconds) for expired sessions of the service user."""
+        now = now or time.time()
+        userPath = os.path.join(self.__sessionsPath, serviceUserId)
+        historyD = {}
+        if os.access(os.path.join(userPath, "history-session-store.pic"), os.F_OK):
+            historyD = ServiceHistory(historyPath=userPath).getHistory()
+        statusD = self.getStatusDict(historyD)
+        rL = []
+        for sessionId, pth in self.iterSessions(serviceUserId):
+            try:
+                ageSeconds = now - self.getLastActivity(pth)
+            except FileNotFoundError:
+                continue
+            if ageSeconds < self.__maxAgeSeconds:
+                continue
+            status = statusD.get(sessionId, "none")
+            if self.__isActive(status):
+                logger.debug("Skipping in progress session %s status %s", sessionId, status)
+                continue
+            if self.__statusList is not None and status not in self.__statusList:
+                continue
+            rL.append((sessionId, pth, status, ageSeconds))
+        return rL
+
+    def purgeTrash(self, serviceUserId):
+        """Remove directories left in the trash area of the service user.  Returns the number removed."""
+        trashPath = os.path.join(self.__sessionsPath, serviceUserId, TRASH_DIR_NAME)
+        try:
+            trashL = [de.path for de in os.scandir(trashPath)]
+        except FileNotFoundError:
+            return 0
+        if self.__dryRun:
+            logger.info("Dry run - would remove %d trash entries for %s", len(trashL), serviceUserId)
+            return 0
+        for pth in trashL:
+            shutil.rmtree(pth, ignore_errors=True)
+        return len(trashL)
+
+    def __remove(self, pth):
+        # Recheck activity just before removal - the session may have been used since selection
+        if time.time() - self.getLastActivity(pth) < self.__maxAgeSeconds:
+            return False
+        shutil.rmtree(pth)
+        return True
+
+    def sweep(self, serviceUserIdList=None):
+        """Remove expired sessions for the input service users (default: all users).
+
+        :rtype dictionary: counts of examined users, selected, removed, skipped and failed sessions
+        """
+        rD = {"users": 0, "selected": 0, "removed": 0, "skipped": 0, "errors": 0, "trash": 0, "dry_run": self.__dryRun}
+        userL = serviceUserIdList if serviceUserIdList is not None else self.getServiceUserIds()
+        interval = 1.0 / self.__maxDeletesPerSecond if self.__maxDeletesPerSecond else 0.0
+        guard = threading.Lock()
+        removedD = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.__maxWorkers) as executor:
+            futureD = {}
+            tNext = time.time()
+            for userId in userL:
+                rD["users"] += 1
+                rD["trash"] += self.purgeTrash(userId)
+                for sessionId, pth, status, ageSeconds in self.select(userId):
+                    rD["selected"] += 1
+                    if self.__dryRun:
+                        logger.info(
+                            "Dry run - would remove session %s/%s status %s age %.0f s",
+                            userId,
+                            sessionId,
+                            status,
+                            ageSeconds,
+                        )
+                        continue
+                    if interval:
+                        tNow = time.time()
+                        if tNow < tNext:
+                            time.sleep(tNext - tNow)
+                        tNext = max(tNow, tNext) + interval
+                    # bound the number of queued removals
+                    while len(futureD) >= 2 * self.__maxWorkers:
+                        doneS, _ = concurrent.futures.wait(futureD, return_when=concurrent.futures.FIRST_COMPLETED)
+                        for ft in doneS:
+                            self.__tally(rD, futureD.pop(ft), ft, guard, removedD)
+                    futureD[executor.submit(self.__remove, pth)] = (userId, sessionId)
+            for ft in concurrent.futures.as_completed(list(futureD)):
+                self.__tally(rD, futureD.pop(ft), ft, guard, removedD)
+        if not self.__dryRun:
+            for userId in userL:
+                self.__updateUsage(userId, removedD.get(userId, []))
+                self.__updateIndex(userId, removedD.get(userId, []))
+        logger.info("Session sweep %r", rD)
+        return rD
+
+    def __updateUsage(self, serviceUserId, sessionIdList):
+        usage = ServiceSessionUsage(os.path.join(self.__sessionsPath, serviceUserId))
+        if self.__reconcileUsage:
+            usage.reconcile(self.iterSessions(serviceUserId))
+        elif sessionIdList and os.access(usage.getFilePath(), os.F_OK):
+            usage.remove(sessionIdList)
+
+    def __updateIndex(self, serviceUserId, sessionIdList):
+        index = ServiceSessionIndex(os.path.join(self.__sessionsPath, serviceUserId))
+        if self.__rebuildIndex:
+            index.rebuild(self.getIndexRows(serviceUserId))
+        elif sessionIdList and index.exists():
+            index.remove(sessionIdList)
+
+    def getIndexRows(self, serviceUserId):
+        """Return session index entries for the service user computed from the file system and history."""
+        userPath = os.path.join(self.__sessionsPath, serviceUserId)
+        historyD = {}
+        if os.access(os.path.join(userPath, "history-session-store.pic"), os.F_OK):
+            historyD = ServiceHistory(historyPath=userPath).getHistory()
+        statusD = self.getStatusDict(historyD)
+        rL = []
+        for sessionId, pth in self.iterSessions(serviceUserId):
+            try:
+                rL.append(
+                    {
+                        "sid": sessionId,
+                        "created": os.stat(pth).st_ctime,
+                        "last_access": self.getLastActivity(pth),
+                        "status": statusD.get(sessionId, "none"),
+                        "size": ServiceSessionUsage.getTreeSize(pth),
+                    }
+                )
+            except FileNotFoundError:
+                continue
+        return rL
+
+    def __tally(self, rD, tup, ft, guard, removedD):
+        with guard:
+            try:
+                if ft.result():
+                    rD["removed"] += 1
+                    removedD.setdefault(tup[0], []).append(tup[1])
+                    logger.debug("Removed session %s/%s", tup[0], tup[1])
+                else:
+                    rD["skipped"] += 1
+            except Exception as e:  # noqa: BLE001
+                rD["errors"] += 1
+                logger.error("Failed removing session %s/%s - %r", tup[0], tup[1], str(e))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove expired service session directories")
+    parser.add_argument("--top_path", required=True, help="Top session path (containing the sessions directory)")
+    parser.add_argument("--max_age_days", type=float, default=7.0, help="Remove sessions idle for longer than this")
+    parser.add_argument(
+        "--service_user_id", action="append", default=None, help="Service user (repeatable, default all)"
+    )
+    parser.add_argument("--status", action="append", default=None, help="Only remove sessions with this history status")
+    parser.add_argument(
+        "--use_access_time", action="store_true", default=False, help="Include access times in activity"
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Maximum concurrent removals")
+    parser.add_argument("--rate", type=float, default=None, help="Maximum removals per second")
+    parser.add_argument(
+        "--reconcile_usage", action="store_true", default=False, help="Rebuild session disk usage counters"
+    )
+    parser.add_argument("--rebuild_index", action="store_true", default=False, help="Rebuild session indexes")
+    parser.add_argument("--dry_run", action="store_true", default=False, help="Report without removing")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s]-%(module)s.%(funcName)s: %(message)s")
+    sweeper = ServiceSessionSweeper(
+        args.top_path,
+        maxAgeSeconds=args.max_age_days * 86400.0,
+        useAccessTime=args.use_access_time,
+        statusList=args.status,
+        dryRun=args.dry_run,
+        maxWorkers=args.workers,
+        maxDeletesPerSecond=args.rate,
+        reconcileUsage=args.reconcile_usage,
+        rebuildIndex=args.rebuild_index,
+    )
+    rD = sweeper.sweep(args.service_user_id)
+    return 1 if rD["errors"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
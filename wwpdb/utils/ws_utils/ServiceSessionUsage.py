@@ -0,0 +1,188 @@
+##
+# File: ServiceSessionUsage.py
+# Date: 19-Oct-2026
+#
+# Update:
+#
+##
+"""
+Disk usage accounting and quota checks for service sessions.
+
+Per-session and per-user byte counters are kept in a small JSON sidecar in the
+service user directory (<topPath>/sessions/<service_user_id>/usage-session-store.json).
+Writers (uploads, session data store) add the size change of each write so the
+usage is known without walking the session tree.  The counters are rebuilt from
+the file system by reconcile() (see ServiceSessionSweeper) to correct drift from
+files written or removed outside of the accounting.
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import json
+import logging
+import os
+import time
+
+from wwpdb.utils.ws_utils.ServiceLockFile import (
+    LockFileTimeoutException,
+    ServiceLockManager,
+)
+
+logger = logging.getLogger()
+
+
+class ServiceSessionUsage:
+    """Per-session and per-user disk usage counters with optional quotas."""
+
+    USAGE_FILE_NAME = "usage-session-store.json"
+
+    def __init__(self, sessionUserPath, sessionId=None, quotaBytes=None, sessionQuotaBytes=None):
+        """
+        :param string sessionUserPath: service user session directory (<topPath>/sessions/<service_user_id>)
+        :param string sessionId: default session for counter updates and checks
+        :param int quotaBytes: optional limit on the total usage of the service user
+        :param int sessionQuotaBytes: optional limit on the usage of a single session
+        """
+        self.__sessionUserPath = sessionUserPath
+        self.__sessionId = sessionId
+        self.__quotaBytes = quotaBytes
+        self.__sessionQuotaBytes = sessionQuotaBytes
+        self.__filePath = os.path.join(sessionUserPath, self.USAGE_FILE_NAME)
+        self.__timeOutSeconds = 2.0
+        self.__retrySeconds = 0.05
+        self.__leaseSeconds = 60.0
+
+    def getFilePath(self):
+        return self.__filePath
+
+    def __lock(self):
+        return ServiceLockManager.lock(
+            self.__filePath,
+            timeoutSeconds=self.__timeOutSeconds,
+            retrySeconds=self.__retrySeconds,
+            leaseSeconds=self.__leaseSeconds,
+            waitStrategy="inotify",
+        )
+
+    def __load(self):
+        try:
+            with open(self.__filePath, "r") as ifh:
+                return json.load(ifh)
+        except FileNotFoundError:
+            pass
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Failing to read usage store %s", self.__filePath)
+        return {"total": 0, "sessions": {}, "reconciled": None}
+
+    def __store(self, uD):
+        tmpPath = "%s.%d.tmp" % (self.__filePath, os.getpid())
+        with open(tmpPath, "w") as ofh:
+            json.dump(uD, ofh)
+        os.replace(tmpPath, self.__filePath)
+
+    def __update(self, func):
+        """Apply func to the usage dictionary under the sidecar lock.  Returns True for success."""
+        try:
+            if not os.access(self.__sessionUserPath, os.F_OK):
+                os.makedirs(self.__sessionUserPath, exist_ok=True)
+            with self.__lock():
+                uD = self.__load()
+                func(uD)
+                self.__store(uD)
+            return True
+        except LockFileTimeoutException:
+            logger.warning("Timeout locking usage store %s", self.__filePath)
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Failing to update usage store %s", self.__filePath)
+        return False
+
+    def add(self, nBytes, sessionId=None):
+        """Add nBytes (may be negative) to the session and service user counters."""
+        sid = sessionId or self.__sessionId
+        if not nBytes or sid is None:
+            return True
+
+        def _add(uD):
+            sD = uD["sessions"]
+            sD[sid] = max(0, sD.get(sid, 0) + nBytes)
+            uD["total"] = max(0, uD["total"] + nBytes)
+
+        return self.__update(_add)
+
+    def remove(self, sessionIdList=None):
+        """Drop the counters of the input sessions (default: the current session)."""
+        sidL = sessionIdList if sessionIdList is not None else [self.__sessionId]
+
+        def _remove(uD):
+            for sid in sidL:
+                uD["total"] = max(0, uD["total"] - uD["sessions"].pop(sid, 0))
+
+        return self.__update(_remove)
+
+    def getUsage(self, sessionId=None):
+        """Return the usage in bytes of the session (default: current session)."""
+        sid = sessionId or self.__sessionId
+        return self.__load()["sessions"].get(sid, 0)
+
+    def getUserUsage(self):
+        """Return the total usage in bytes of the service user."""
+        return self.__load()["total"]
+
+    def getDictionary(self):
+        return self.__load()
+
+    def checkQuota(self, nBytes, sessionId=None):
+        """Return True if nBytes more may be written to the session within the user and session quotas."""
+        if self.__quotaBytes is None and self.__sessionQuotaBytes is None:
+            return True
+        sid = sessionId or self.__sessionId
+        uD = self.__load()
+        if self.__quotaBytes is not None and uD["total"] + nBytes > self.__quotaBytes:
+            logger.info(
+                "User quota exceeded in %s (%d + %d > %d)",
+                self.__sessionUserPath,
+                uD["total"],
+                nBytes,
+                self.__quotaBytes,
+            )
+            return False
+        sessionBytes = uD["sessions"].get(sid, 0)
+        if self.__sessionQuotaBytes is not None and sessionBytes + nBytes > self.__sessionQuotaBytes:
+            logger.info(
+                "Session quota exceeded for %s (%d + %d > %d)", sid, sessionBytes, nBytes, self.__sessionQuotaBytes
+            )
+            return False
+        return True
+
+    @staticmethod
+    def getTreeSize(pth):
+        """Return the total size in bytes of the files below pth."""
+        tSize = 0
+        for dirPath, _, fileNames in os.walk(pth):
+            for fn in fileNames:
+                try:
+                    tSize += os.lstat(os.path.join(dirPath, fn)).st_size
+                except FileNotFoundError:
+                    pass
+        return tSize
+
+    def reconcile(self, sessionIter):
+        """Rebuild the counters from the file system.
+
+        :param sessionIter: iterable of (sessionId, sessionPath) for all sessions of the service user
+        :rtype dictionary: the reconciled usage dictionary
+        """
+        sD = {sid: self.getTreeSize(pth) for sid, pth in sessionIter}
+        rD = {"total": sum(sD.values()), "sessions": sD, "reconciled": time.time()}
+
+        def _set(uD):
+            uD.clear()
+            uD.update(rD)
+
+        self.__update(_set)
+        return rD
@@ -0,0 +1,145 @@
+##
+# File: ServiceTimingMetrics.py
+# Date: 19-Oct-2026
+#
+# Update:
+#    19-Oct-2026      add the result cache phase
+##
+"""
+Process-wide per-route request phase timing.
+
+ServiceWorkerBase times the phases of each request -- session join
+(_getSession), session data store reads (_getSessionStoreDict), the dispatched
+operation (_run), result cache lookups and stores (cache), history writes
+(_trackServiceStatus) and the total -- and records them here keyed by route
+pattern and result (ok, error or cached) when the operation completes.  The
+phase times of the request are also attached to the returned
+ServiceSessionState (see getServerTiming()).
+
+Collection is disabled by default.  When disabled each timed phase costs a
+single class attribute test.
+
+    ServiceTimingMetrics.enable()
+    ...
+    summary = ServiceTimingMetrics.getSummary()
+    ServiceTimingMetrics.dump("/tmp/timing-metrics.json")
+
+"""
+
+__docformat__ = "restructuredtext en"
+__author__ = "John Westbrook"
+__email__ = "jwest@rcsb.rutgers.edu"
+__license__ = "Creative Commons Attribution 3.0 Unported"
+__version__ = "V0.07"
+
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+
+from wwpdb.utils.ws_utils.ServiceLockMetrics import LockHistogram
+
+logger = logging.getLogger()
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class PhaseTimer:
+    """Context manager adding the elapsed time of its block to timingD[phase]."""
+
+    __slots__ = ("__phase", "__tBegin", "__timingD")
+
+    def __init__(self, timingD, phase):
+        self.__timingD = timingD
+        self.__phase = phase
+        self.__tBegin = 0.0
+
+    def __enter__(self):
+        self.__tBegin = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.__timingD[self.__phase] = self.__timingD.get(self.__phase, 0.0) + time.perf_counter() - self.__tBegin
+        return False
+
+
+class ServiceTimingMetrics:
+    """Process-wide registry of request phase latency histograms keyed by route, result and phase."""
+
+    enabled = False
+    __guard = threading.Lock()
+    __statsD = {}  # noqa: RUF012
+
+    @classmethod
+    def enable(cls, flag=True):
+        cls.enabled = flag
+
+    @classmethod
+    def disable(cls):
+        cls.enabled = False
+
+    @classmethod
+    def reset(cls):
+        with cls.__guard:
+            cls.__statsD = {}
+
+    @classmethod
+    def timer(cls, timingD, phase):
+        """Return a context manager timing a phase into timingD (a no-op when collection is disabled)."""
+        return PhaseTimer(timingD, phase) if cls.enabled else _NULL_TIMER
+
+    @classmethod
+    def record(cls, route, result, phaseD):
+        """Add the phase times of one request.
+
+        :param string route: route pattern of the request
+        :param string result: request result (e.g. ok or error)
+        :param dict phaseD: phase name -> seconds
+        """
+        with cls.__guard:
+            rD = cls.__statsD.setdefault(route, {}).setdefault(result, {})
+            for phase, seconds in phaseD.items():
+                hist = rD.get(phase)
+                if hist is None:
+                    hist = rD[phase] = LockHistogram()
+                hist.add(seconds)
+
+    @classmethod
+    def getSummary(cls):
+        """Return a dictionary route -> result -> phase -> histogram summary."""
+        with cls.__guard:
+            return {
+                route: {result: {phase: hist.getDict() for phase, hist in pD.items()} for result, pD in rD.items()}
+                for route, rD in cls.__statsD.items()
+            }
+
+    @classmethod
+    def dump(cls, filePath=None):
+        """Log a one line summary per route, result and phase and optionally write the full summary as JSON to filePath."""
+        sD = cls.getSummary()
+        for route, rD in sorted(sD.items()):
+            for result, pD in sorted(rD.items()):
+                for phase, hD in sorted(pD.items()):
+                    logger.info(
+                        "Route %s %s %-10s count %d mean %.6f p50 %.6f p90 %.6f p99 %.6f max %.6f",
+                        route,
+                        result,
+                        phase,
+                        hD["count"],
+                        hD["mean"],
+                        hD["p50"],
+                        hD["p90"],
+                        hD["p99"],
+                        hD["max"],
+                    )
+        if filePath:
+            try:
+                tmpPath = "%s.%d.tmp" % (filePath, os.getpid())
+                with open(tmpPath, "w") as ofh:
+                    json.dump({"pid": os.getpid(), "time": time.time(), "routes": sD}, ofh, indent=2)
+                os.replace(tmpPath, filePath)
+            except:  # noqa: E722 pylint: disable=bare-except
+                logger.exception("Timing metrics dump failing for %s", filePath)
+        return sD
@@ -8,6 +8,7 @@
 #  28-Feb-2014   jdw add rename and file extension methods
 #   2-Apr-2014   jdw add version flag to getFileExtension(fileName,ignoreVersion=False)
 #  14-Sep-2014   jdw add getUploadFileName():
+#  19-Oct-2026       check session quota before copying uploads and account for their size
 ##
 """
 Utilities to manage  web application upload tasks.
@@ -40,6 +41,7 @@ class ServiceUploadUtils:
         self.__reqObj = reqObj
         self.__sessionObj = self.__reqObj.getSessionObj()
         self.__sessionPath = self.__sessionObj.getPath()
+        self.__usage = self.__sessionObj.getUsage()
         logger.debug(" - session id   %s\n", self.__sessionObj.getId())
         logger.debug(" - session path %s\n", self.__sessionPath)
 
@@ -79,13 +81,38 @@ class ServiceUploadUtils:
 
         return None
 
+    def getUploadFileSize(self, fileTag="file"):
+        """Return the size in bytes of the uploaded file or None if this cannot be determined."""
+        try:
+            fh = self.__reqObj.getRawValue(fileTag).file
+            pos = fh.tell()
+            fh.seek(0, os.SEEK_END)
+            nBytes = fh.tell()
+            fh.seek(pos)
+            return nBytes
+        except:  # noqa: E722 pylint: disable=bare-except
+            return None
+
+    def isWithinQuota(self, fileTag="file"):
+        """Return True if the uploaded file fits in the session disk quota (or no quota applies)."""
+        if self.__usage is None:
+            return True
+        nBytes = self.getUploadFileSize(fileTag)
+        return nBytes is None or self.__usage.checkQuota(nBytes)
+
     def copyToSession(self, fileTag="file", sessionFileName=None, uncompress=True):
         """Copy uploaded file identified form element name 'fileTag' to the current session directory.
 
         File is copied to user uploaded file or to the sessionFileName if this is provided.
+
+        Uploads exceeding a session disk quota are rejected before copying (returns None).  Uncompressed
+        uploads are checked again against the quota with their uncompressed size and removed if over quota.
         """
         logger.debug("- operation started")
         try:
+            if not self.isWithinQuota(fileTag):
+                logger.warning("Upload rejected by session disk quota")
+                return None
             fs = self.__reqObj.getRawValue(fileTag)
 
             logger.debug("- upload file descriptor fs =     %r\n", fs)
@@ -111,12 +138,27 @@ class ServiceUploadUtils:
             logger.debug("- upload input file name     %s", uploadInputFileName)
             logger.debug("- session target file path   %s", sessionInputFilePath)
             logger.debug("- session target file name   %s", sessionInputFileName)
+            writtenL = [sessionInputFilePath]
+            if uncompress and sessionInputFilePath.endswith(".gz"):
+                writtenL.append(sessionInputFilePath[:-3])
+            oldSize = sum(self.__getFileSize(pth) for pth in writtenL)
             with open(sessionInputFilePath, "wb") as outfile:
                 outfile.write(fs.file.read())
             if uncompress and sessionInputFilePath.endswith(".gz"):
                 logger.debug("-uncompressing file %s", str(sessionInputFilePath))
                 self.__copyGzip(sessionInputFilePath, sessionInputFilePath[:-3])
                 sessionInputFileName = sessionInputFileName[:-3]
+            if self.__usage is not None:
+                nBytes = sum(self.__getFileSize(pth) for pth in writtenL) - oldSize
+                # the upload size checked above is the compressed size of an uncompressed upload
+                if nBytes > 0 and not self.__usage.checkQuota(nBytes):
+                    logger.warning("Uncompressed upload rejected by session disk quota")
+                    for pth in writtenL:
+                        if os.access(pth, os.F_OK):
+                            os.remove(pth)
+                    self.__usage.add(-oldSize)
+                    return None
+                self.__usage.add(nBytes)
 
             logger.debug("Uploaded file %s", str(sessionInputFileName))
             return sessionInputFileName
@@ -200,6 +242,12 @@ class ServiceUploadUtils:
 
         return fId, fType
 
+    def __getFileSize(self, filePath):
+        try:
+            return os.path.getsize(filePath)
+        except OSError:
+            return 0
+
     def __copyGzip(self, inpFilePath, outFilePath):
         """"""
         try:
@@ -8,6 +8,16 @@
 #     2-Dec-2016  jdw include remote_addr in all tracking records.
 #    18-Feb-2017  jdw use internal method to obtain siteId.
 #    15-Mar-2017  jdw add trackHistory=True to _getSession()
+#    19-Oct-2026      pass session disk usage accounting to the session data store
+#    19-Oct-2026      maintain the per-user session index and add _getSessionList()
+#    19-Oct-2026      compiled routing table with path parameters and method matching
+#    19-Oct-2026      per-route request phase timing (ServiceTimingMetrics)
+#    19-Oct-2026      use the process-wide ServiceConfigCache for site configuration
+#    19-Oct-2026      asynchronous routes run as background jobs and add _jobStatusOp()
+#    19-Oct-2026      optional per-user and route admission control
+#    19-Oct-2026      optional result cache for cacheable routes
+#    19-Oct-2026      on-demand operation profiling by route (ServiceProfiler)
+#    19-Oct-2026      batch dispatch of sub-operations in a single session (_batchOp())
 ##
 """
 Base class for supporting web service processing modules.
@@ -25,24 +35,49 @@ __email__ = "jwest@rcsb.rutgers.edu"
 __license__ = "Creative Commons Attribution 3.0 Unported"
 __version__ = "V0.07"
 
-# import os
 # import sys
 # import types
 # import string
 # import traceback
 # import ntpath
+import copy
 import logging
+import os
 import time
 
-from wwpdb.utils.config.ConfigInfo import ConfigInfo
+from wwpdb.utils.ws_utils.ServiceAdmissionControl import ServiceAdmissionControl
+from wwpdb.utils.ws_utils.ServiceConfigCache import ServiceConfigCache
 from wwpdb.utils.ws_utils.ServiceDataStore import ServiceDataStore
 from wwpdb.utils.ws_utils.ServiceHistory import ServiceHistory
+from wwpdb.utils.ws_utils.ServiceJobManager import ServiceJobManager
+from wwpdb.utils.ws_utils.ServiceJson import loads
+from wwpdb.utils.ws_utils.ServiceProfiler import ServiceProfiler
+from wwpdb.utils.ws_utils.ServiceResultCache import ServiceResultCache
+from wwpdb.utils.ws_utils.ServiceRouter import ServiceRouter
 from wwpdb.utils.ws_utils.ServiceSessionState import ServiceSessionState
+from wwpdb.utils.ws_utils.ServiceTimingMetrics import ServiceTimingMetrics
 
 logger = logging.getLogger()
 
 
 class ServiceWorkerBase:
+    #  Maximum number of sub-operations in a batch request (see _batchOp())
+    BATCH_MAX_OPERATIONS = 50
+    #  Request parameters set by the service (identity, session and routing) that batch sub-operation args may not set
+    BATCH_RESERVED_ARGS = (
+        "service_user_id",
+        "top_session_path",
+        "session_user_path",
+        "session_id",
+        "wwpdb_site_id",
+        "semaphore",
+        "remote_addr",
+        "request_path",
+        "request_method",
+        "batch",
+        "batch_stop_on_error",
+    )
+
     def __init__(self, reqObj=None, sessionDataPrefix=None):
         """
         Base class supporting web application worker methods.
@@ -56,7 +91,7 @@ class ServiceWorkerBase:
         self._sessionPath = None
         self._rltvSessionPath = None
         self._siteId = self._reqObj.getSiteId()
-        self._cI = ConfigInfo(self._siteId)
+        self._cI = ServiceConfigCache.getConfigInfo(self._siteId)
         #
         #  ServiceDataStore prefix for general session data -- used by _getSession()
         self._sdsPrefix = sessionDataPrefix or "general"
@@ -64,7 +99,61 @@ class ServiceWorkerBase:
         #
         # Service items include:
         # self.__class__.__name__,sys._getframe().f_code.co_name
-        self.__appPathD = {}
+        #
+        #  Request path (pattern) -> (bound operation method, pattern, asynchronous, cacheable)
+        self.__router = ServiceRouter()
+        #
+        #  Phase times of the current request (phase -> seconds) when ServiceTimingMetrics is enabled
+        self.__timingD = {}
+        #
+        #  Optional limit on in-flight requests per service user and route
+        self.__admission = None
+        #
+        #  Optional cache of the results of cacheable routes
+        self.__resultCache = None
+        #
+        #  Batch dispatch state - the session joined by the batch is reused by its sub-operations
+        #  which share a snapshot of the session data store (discarded on store writes)
+        self.__inBatch = False
+        self.__storeSnapshot = None
+
+    def setAdmissionControl(self, admission=None, **kwargs):
+        """Limit the requests in flight per service user and route (see ServiceAdmissionControl).
+
+        :param admission: ServiceAdmissionControl object shared by the workers of a process, or None to
+                          create one from kwargs with slot files in <top_session_path>/admission
+        """
+        if admission is None and kwargs:
+            lockDirPath = kwargs.pop("lockDirPath", None) or os.path.join(self._reqObj.getTopSessionPath(), "admission")
+            admission = ServiceAdmissionControl(lockDirPath, **kwargs)
+        self.__admission = admission
+
+    def setResultCache(self, resultCache=None, **kwargs):
+        """Answer repeated identical requests to cacheable routes from a result cache (see ServiceResultCache).
+
+        :param resultCache: ServiceResultCache object shared by the workers of a process, or None to
+                            create one from kwargs in <top_session_path>/result-cache
+        """
+        if resultCache is None and kwargs:
+            cacheDirPath = kwargs.pop("cacheDirPath", None) or os.path.join(
+                self._reqObj.getTopSessionPath(), "result-cache"
+            )
+            resultCache = ServiceResultCache(cacheDirPath, **kwargs)
+        self.__resultCache = resultCache
+
+    def _timePhase(self, phase):
+        """Return a context manager adding the time of its block to the named phase of the current request."""
+        return ServiceTimingMetrics.timer(self.__timingD, phase)
+
+    def __recordTiming(self, route, sst, tBegin, result=None):
+        timingD = self.__timingD
+        self.__timingD = {}
+        timingD["total"] = time.perf_counter() - tBegin
+        if result is None:
+            result = "error" if sst is None or sst.getServiceErrorFlag() else "ok"
+        ServiceTimingMetrics.record(route, result, timingD)
+        if sst is not None:
+            sst.setTimingDict(timingD)
 
     def _trackServiceStatus(self, op, **params):
         """Add a service history status tracking record.
@@ -75,20 +164,60 @@ class ServiceWorkerBase:
         """
         if params and "remote_addr" not in params:
             params["remote_addr"] = self._reqObj.getValue("remote_addr")
-        sH = ServiceHistory(historyPath=self._reqObj.getSessionUserPath())
-        return sH.add(sessionId=self._sessionId, statusOp=op, **params)
+        with self._timePhase("history"):
+            sH = ServiceHistory(historyPath=self._reqObj.getSessionUserPath())
+            ok = sH.add(sessionId=self._sessionId, statusOp=op, **params)
+            index = self._sObj.getIndex() if self._sObj is not None else None
+            if index is not None:
+                index.setStatus(self._sessionId, op)
+        return ok
+
+    def _getSessionList(self, **kwargs):
+        """Return a page of the current service user's sessions from the session index.
+
+        Keyword arguments are the filter and pagination options of ServiceSessionIndex.getSessions().
+        """
+        index = self._sObj.getIndex() if self._sObj is not None else None
+        if index is None:
+            return []
+        return index.getSessions(**kwargs)
 
     def _getServiceActivitySummary(self):
         """Get the service activity summary."""
         sH = ServiceHistory(historyPath=self._reqObj.getSessionUserPath())
         return sH.getActivitySummary()
 
-    def addService(self, url, opName):
-        self.__appPathD[url] = opName
+    def addService(self, url, opName, methods=None, asynchronous=False, cacheable=False):
+        """Map a request path to the operation method opName.
+
+        :param string url: request path or pattern with path parameters (e.g. /service/v1/entry/{entry_id})
+                           captured parameter values are set in the request object before the operation is called
+        :param string opName: name of the operation method of this class
+        :param methods: optional list of HTTP methods accepted (default any method)
+        :param bool asynchronous: run the operation as a background job (see ServiceJobManager) and
+                                  return the job identifier at once
+        :param bool cacheable: the operation result depends only on the request parameters and uploaded
+                               files and may be answered from the result cache (see setResultCache())
+        """
+        mth = getattr(self, opName, None)
+        if mth is None:
+            logger.error("Unknown operation %r for service path %r", opName, url)
+        if asynchronous and cacheable:
+            logger.warning("Results of asynchronous service path %r are not cached", url)
+            cacheable = False
+        self.__router.add(url, (mth, url, asynchronous, cacheable), methods=methods)
 
     def addServices(self, serviceDict):
+        """Map request paths to operations - values are operation names, (operation name, methods) tuples
+        or dictionaries of addService() keyword arguments with the operation name as key opName.
+        """
         for k, v in serviceDict.items():
-            self.__appPathD[k] = v
+            if isinstance(v, dict):
+                self.addService(k, **v)
+            elif isinstance(v, (tuple, list)):
+                self.addService(k, v[0], methods=v[1])
+            else:
+                self.addService(k, v)
 
     def _run(self, reqPath=None):
         """Map operation to path and invoke operation.  Exceptions are caught within this method.
@@ -97,23 +226,245 @@ class ServiceWorkerBase:
 
         Operation output is packaged in a ServiceSessionState() object.
 
+        With ServiceTimingMetrics enabled the phase times of the request are recorded under the
+        route pattern and attached to the returned object.  Requests answered from the result
+        cache are recorded with the result 'cached'.  Operations of routes selected with
+        ServiceProfiler are profiled.
+
         """
         requestPath = None
+        route = "unmatched"
+        result = None
+        tBegin = time.perf_counter() if ServiceTimingMetrics.enabled else None
         try:
             requestPath = reqPath or self._reqObj.getRequestPath()
-            if requestPath not in self.__appPathD:
+            requestMethod = self._reqObj.getValue("request_method") or None
+            target, paramD = self.__router.match(requestPath, requestMethod)
+            if paramD is None:
                 # bail out if operation is unknown -
                 sst = ServiceSessionState()
-                sst.setServiceError(msg="Unknown operation")
+                if self.__router.getAllowedMethods(requestPath):
+                    sst.setServiceError(msg="Method not allowed")
+                else:
+                    sst.setServiceError(msg="Unknown operation")
             else:
-                mth = getattr(self, self.__appPathD[requestPath], None)
-                sst = mth()
-            return sst
+                mth, route, asynchronous, cacheable = target
+                for k, v in paramD.items():
+                    self._reqObj.setValue(k, v)
+                cacheKey = sst = None
+                if cacheable and self.__resultCache is not None:
+                    with self._timePhase("cache"):
+                        cacheKey = self.__resultCache.getKey(route, self._reqObj)
+                        sst = self.__resultCache.get(cacheKey, route)
+                if sst is not None:
+                    result = "cached"
+                else:
+                    sst = self.__dispatch(mth, route, asynchronous)
+                    if cacheKey is not None:
+                        with self._timePhase("cache"):
+                            self.__resultCache.set(cacheKey, route, sst)
         except:  # noqa: E722 pylint: disable=bare-except
             logging.exception("FAILING for requestPath %r ", requestPath)
             sst = ServiceSessionState()
             sst.setServiceError(msg="Operation failure")
 
+        if tBegin is not None:
+            self.__recordTiming(route, sst, tBegin, result=result)
+        return sst
+
+    def __dispatch(self, mth, route, asynchronous):
+        """Run or submit the operation within the admission limits of the service user and route."""
+        slot = None
+        if self.__admission is not None:
+            slot = self.__admission.acquire(self._reqObj.getServiceUserId(), route)
+            if slot is None:
+                sst = ServiceSessionState()
+                sst.setServiceError(msg="Too many requests")
+                sst.setServiceStatusCode(429)
+                return sst
+        try:
+            if asynchronous:
+                return self.__submitJob(mth, route)
+            with self._timePhase("operation"), ServiceProfiler.profile(route):
+                return mth()
+        finally:
+            if slot is not None:
+                self.__admission.release(slot)
+
+    def __submitJob(self, mth, route):
+        """Join the request session (or create one), record the job as submitted and run mth in the background.
+
+        The job runs on a copy of this worker bound to a copy of the request and records its status
+        with the session values captured here -- the request thread goes on using the worker and
+        request objects once the response is returned.
+        """
+        sst = ServiceSessionState()
+        if not self._getSession(new=not self._reqObj.getSessionId(), trackHistory=False):
+            sst.setServiceError(msg="Job session failure")
+            return sst
+        jobId = ServiceJobManager.newJobId()
+        jobD = {
+            "jobId": jobId,
+            "sessionId": self._sessionId,
+            "sessionPath": self._sessionPath,
+            "sessionUserPath": self._reqObj.getSessionUserPath(),
+            "remoteAddr": self._reqObj.getValue("remote_addr"),
+            "usage": self._sObj.getUsage(),
+            "index": self._sObj.getIndex(),
+        }
+        with self._timePhase("history"):
+            self.__trackJobStatus(jobD, "submitted", route=route, **ServiceJobManager.getOwner())
+        jobWorker = copy.copy(self)
+        jobWorker._reqObj = self._reqObj.copy()
+        jobWorker.__timingD = {}
+        jobWorker.__inBatch = False
+        jobWorker.__storeSnapshot = None
+        jobMth = mth.__func__.__get__(jobWorker) if getattr(mth, "__self__", None) is self else mth
+        ServiceJobManager.submit(jobId, self.__runJob, jobMth, route, jobD)
+        sst.setAppDataDict({"job_id": jobId, "session_id": self._sessionId, "status": "submitted"})
+        return sst
+
+    @staticmethod
+    def __trackJobStatus(jobD, op, **params):
+        # job records are kept under the job identifier - a session may run several jobs
+        params["session_id"] = jobD["sessionId"]
+        params["remote_addr"] = jobD["remoteAddr"]
+        ok = ServiceHistory(historyPath=jobD["sessionUserPath"]).add(sessionId=jobD["jobId"], statusOp=op, **params)
+        if jobD["index"] is not None:
+            jobD["index"].setStatus(jobD["sessionId"], op)
+        return ok
+
+    @staticmethod
+    def __runJob(mth, route, jobD):
+        jobId = jobD["jobId"]
+        ServiceWorkerBase.__trackJobStatus(jobD, "running", **ServiceJobManager.getOwner())
+        sds = ServiceJobManager.getResultStore(jobD["sessionPath"], jobId, usage=jobD["usage"])
+        op = "failed"
+        try:
+            with ServiceProfiler.profile(route):
+                sst = mth()
+            if sst is not None and not sst.getServiceErrorFlag():
+                sds.set("result", sst.getAppDataDict())
+                op = "completed"
+            else:
+                sds.set("errormessage", sst.getServiceErrorMessage() if sst is not None else "Operation failure")
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("FAILING job %s", jobId)
+            sds.set("errormessage", "Operation failure")
+        ServiceWorkerBase.__trackJobStatus(jobD, op)
+
+    def _jobStatusOp(self):
+        """Standard job status operation - reports the status and result of the job job_id of the
+        service user.  Register it for a status route with addService().
+        """
+        sst = ServiceSessionState()
+        jobId = self._reqObj.getValue("job_id")
+        if not jobId:
+            sst.setServiceError(msg="Missing job identifier")
+            return sst
+        rD = ServiceJobManager.getJobStatus(self._reqObj.getSessionObj().getSessionUserPath(), jobId)
+        if rD.get("session_id"):
+            self._reqObj.setValue("session_id", rD["session_id"])
+            rD.update(ServiceJobManager.getJobResult(self._reqObj.getSessionObj().getPath(), jobId, rD["status"]))
+        sst.setAppDataDict(rD)
+        if rD["status"] == "none":
+            sst.setServiceError(msg="Unknown job")
+        return sst
+
+    def _batchOp(self):
+        """Standard batch operation - runs the sub-operations in the request parameter 'batch' in order
+        against a single joined session.  Register it for a batch route with addService().
+
+        'batch' is a JSON list of sub-operations, each a dictionary with keys path, args (optional
+        dictionary of request parameters for the sub-operation) and method (optional HTTP method),
+        or a [path, args] pair.  With batch_stop_on_error set the sub-operations following a failing
+        sub-operation are not run.
+
+        Sub-operations are dispatched as by _run() (routing, admission control, result cache,
+        profiling and background jobs) with their args set in the request object.  Batches with
+        args in BATCH_RESERVED_ARGS (e.g. service_user_id, session_id) are rejected.  Sub-operations joining the request
+        session reuse the session joined by the first one (without further 'begins' history records)
+        and read one shared snapshot of the session data store, which is kept up to date with the
+        store writes of the worker.
+
+        The returned application data has the keys session_id and results -- a list of dictionaries
+        with keys path, errorflag, errormessage, statuscode, appdata and downloads (file names)
+        for each sub-operation run.
+        """
+        sst = ServiceSessionState()
+        if self.__inBatch:
+            sst.setServiceError(msg="Nested batch request")
+            return sst
+        try:
+            opL = loads(self._reqObj.getValue("batch") or "[]")
+            opL = [op if isinstance(op, dict) else {"path": op[0], "args": op[1] if len(op) > 1 else {}} for op in opL]
+            if not all(isinstance(op.get("path"), str) and isinstance(op.get("args", {}), dict) for op in opL):
+                raise ValueError("invalid sub-operation")
+        except:  # noqa: E722 pylint: disable=bare-except
+            logger.exception("Invalid batch request")
+            sst.setServiceError(msg="Invalid batch request")
+            return sst
+        if not opL:
+            sst.setServiceError(msg="Empty batch request")
+            return sst
+        if len(opL) > self.BATCH_MAX_OPERATIONS:
+            sst.setServiceError(msg="Too many batch operations")
+            return sst
+        if any(k in self.BATCH_RESERVED_ARGS for op in opL for k in op.get("args", {})):
+            sst.setServiceError(msg="Reserved batch argument")
+            return sst
+        stopOnError = self._reqObj.getValue("batch_stop_on_error").lower() in ("1", "true", "yes")
+        reqD = self._reqObj.getDictionary()
+        savedD = dict(reqD)
+        rL = []
+        self.__inBatch = True
+        try:
+            for op in opL:
+                reqD.pop("batch", None)
+                reqD.pop("batch_stop_on_error", None)
+                for k, v in op.get("args", {}).items():
+                    if isinstance(v, list):
+                        self._reqObj.setValueList(k, v)
+                    else:
+                        self._reqObj.setValue(k, v)
+                self._reqObj.setValue("request_path", op["path"])
+                self._reqObj.setValue("request_method", op.get("method") or "")
+                # the sub-operation is timed under its own route - keep the phase times of the batch request
+                timingD = self.__timingD
+                self.__timingD = {}
+                try:
+                    subSst = self._run(op["path"])
+                finally:
+                    self.__timingD = timingD
+                rL.append(
+                    {
+                        "path": op["path"],
+                        "errorflag": subSst.getServiceErrorFlag(),
+                        "errormessage": subSst.getServiceErrorMessage(),
+                        "statuscode": subSst.getServiceStatusCode(),
+                        "appdata": subSst.getAppDataDict(),
+                        "downloads": [fT[0] for fT in subSst.getDownloadList()],
+                    }
+                )
+                # restore the request parameters of the batch keeping the session joined or created
+                reqD = self._reqObj.getDictionary()
+                for k in [k for k in reqD if k not in savedD]:
+                    del reqD[k]
+                for k, vL in savedD.items():
+                    self._reqObj.setValueList(k, list(vL))
+                if self._sessionId:
+                    self._reqObj.setValue("session_id", self._sessionId)
+                if self._sObj is not None:
+                    self._reqObj.setValue("session_user_path", self._sObj.getSessionUserPath())
+                if stopOnError and subSst.getServiceErrorFlag():
+                    break
+        finally:
+            self.__inBatch = False
+            self.__storeSnapshot = None
+        nFail = sum(1 for rD in rL if rD["errorflag"])
+        if nFail:
+            sst.setServiceWarning("%d of %d batch operations failed" % (nFail, len(rL)))
+        sst.setAppDataDict({"session_id": self._sessionId, "results": rL})
         return sst
 
     def _appendSessionStore(self, iD=None):
@@ -125,6 +476,7 @@ class ServiceWorkerBase:
         """
         try:
             if iD is not None and isinstance(iD, dict) and len(iD) > 0:
+                self.__storeSnapshot = None
                 self._sds.update(iD)
             return True
         except:  # noqa: E722 pylint: disable=bare-except
@@ -134,7 +486,13 @@ class ServiceWorkerBase:
     def _getSessionStoreDict(self):
         """Recover session store data as a dictionary."""
         try:
-            return self._sds.getDictionary()
+            if self.__storeSnapshot is not None:
+                return dict(self.__storeSnapshot)
+            with self._timePhase("store_read"):
+                dd = self._sds.getDictionary()
+            if self.__inBatch:
+                self.__storeSnapshot = dict(dd)
+            return dd
         except:  # noqa: E722 pylint: disable=bare-except
             logging.exception("FAILED to recover session store")
 
@@ -143,7 +501,13 @@ class ServiceWorkerBase:
     def _setSessionStoreValue(self, ky, val):
         """Set session store data as a dictionary."""
         try:
-            return self._sds.set(ky, val)
+            ok = self._sds.set(ky, val)
+            if self.__storeSnapshot is not None:
+                if ok:
+                    self.__storeSnapshot[ky] = val
+                else:
+                    self.__storeSnapshot = None
+            return ok
         except:  # noqa: E722 pylint: disable=bare-except
             logging.exception("FAILED to set session store value")
 
@@ -152,27 +516,50 @@ class ServiceWorkerBase:
     def _trackSessionHistory(self, msg="ok"):
         rP = self._reqObj.getRequestPath()
         tS = time.strftime("%Y %m %d %H:%M:%S", time.localtime())
-        self._sds.append("session_history", (rP, tS, msg))
+        ok = self._sds.append("session_history", (rP, tS, msg))
+        if self.__storeSnapshot is not None:
+            if ok:
+                self.__storeSnapshot["session_history"] = [
+                    *self.__storeSnapshot.get("session_history", []),
+                    (rP, tS, msg),
+                ]
+            else:
+                self.__storeSnapshot = None
 
     def _getSession(self, new=False, useContext=False, contextOverWrite=True, trackHistory=True):
-        """Join existing session or create new session as required."""
-        try:
-            self._sObj = self._reqObj.getSessionObj(new=new)
-            self._sessionId = self._sObj.getId()
-            self._sessionPath = self._sObj.getPath()
-            logging.debug("session   id  %s", self._sessionId)
-            logging.debug("session path  %s", self._sessionPath)
-            if self._sessionPath is None:
-                return False
-            self._rltvSessionPath = self._sObj.getRelativePath()
-            self._sds = ServiceDataStore(sessionPath=self._sessionPath, prefix=self._sdsPrefix)
-            if useContext and not new:
-                dd = self._getSessionStoreDict()
-                logging.debug("Imported %r", dd)
-                self._reqObj.setDictionary(dd, overWrite=contextOverWrite)
-            if trackHistory:
-                self._trackSessionHistory(msg="begins")
+        """Join existing session or create new session as required.
+
+        Within a batch request (see _batchOp()) the session already joined by the request is reused.
+        """
+        if self.__inBatch and not new and self._sds is not None and self._sessionId == self._reqObj.getSessionId():
+            if useContext:
+                self._reqObj.setDictionary(self._getSessionStoreDict(), overWrite=contextOverWrite)
             return True
+        self.__storeSnapshot = None
+        try:
+            with self._timePhase("session"):
+                self._sObj = self._reqObj.getSessionObj(new=new)
+                self._sessionId = self._sObj.getId()
+                self._sessionPath = self._sObj.getPath()
+                logging.debug("session   id  %s", self._sessionId)
+                logging.debug("session path  %s", self._sessionPath)
+                if self._sessionPath is None:
+                    return False
+                self._rltvSessionPath = self._sObj.getRelativePath()
+                self._sds = ServiceDataStore(
+                    sessionPath=self._sessionPath, prefix=self._sdsPrefix, usage=self._sObj.getUsage()
+                )
+                index = self._sObj.getIndex()
+                if index is not None and not new:
+                    usage = self._sObj.getUsage()
+                    index.touch(self._sessionId, size=usage.getUsage() if usage is not None else None)
+                if useContext and not new:
+                    dd = self._getSessionStoreDict()
+                    logging.debug("Imported %r", dd)
+                    self._reqObj.setDictionary(dd, overWrite=contextOverWrite)
+                if trackHistory:
+                    self._trackSessionHistory(msg="begins")
+                return True
         except:  # noqa: E722 pylint: disable=bare-except
             logging.exception("FAILING create or joining session")
         return False
@@ -6,6 +6,8 @@
 #   2-Aug-2016 jdw standardized error diagnostics --
 #  25-Sep-2016 jdw revise exception messages
 #  13-Feb-2017 jdw add token prefix to foken data store file name -
+#  19-Oct-2026     record lock contention in ServiceLockMetrics
+#  19-Oct-2026     use the process-wide ServiceConfigCache for site configuration
 ##
 """
 Base class for supporting application token management.
@@ -35,7 +37,8 @@ import sys
 import jwt
 from oslo_concurrency import lockutils
 
-from wwpdb.utils.config.ConfigInfo import ConfigInfo
+from wwpdb.utils.ws_utils.ServiceConfigCache import ServiceConfigCache
+from wwpdb.utils.ws_utils.ServiceLockMetrics import synchronized
 
 logger = logging.getLogger()
 
@@ -47,18 +50,19 @@ class TokenUtilsBase:
         kwargs allows for overriding ConfigInfo for testing
 
         """
-        self._cI = ConfigInfo(siteId)
+        self._siteId = siteId
+        self._cI = ServiceConfigCache.getConfigInfo(siteId)
         if tokenPrefix is not None:
             fn = tokenPrefix + "_TOKEN_STORE.pic"
         else:
             fn = "ANONYMOUSWS_TOKEN_STORE.pic"
         self.__filePath = kwargs.get("site_service_registration_dir_path")
         if not self.__filePath:
-            self.__filePath = os.path.join(self._cI.get("SITE_SERVICE_REGISTRATION_DIR_PATH"), fn)
+            self.__filePath = os.path.join(ServiceConfigCache.get(siteId, "SITE_SERVICE_REGISTRATION_DIR_PATH"), fn)
         logger.debug("Assigning token store file path %r", self.__filePath)
         self.__lockDirPath = kwargs.get("site_service_registration_lockdir_path")
         if not self.__lockDirPath:
-            self.__lockDirPath = self._cI.get("SITE_SERVICE_REGISTRATION_LOCKDIR_PATH", ".")
+            self.__lockDirPath = ServiceConfigCache.get(siteId, "SITE_SERVICE_REGISTRATION_LOCKDIR_PATH", ".")
         self.__tokenD = {}
         self.__emailD = {}
         self.__tokenPrefix = tokenPrefix or "WS"
@@ -81,7 +85,7 @@ class TokenUtilsBase:
     def getFilePath(self):
         return self.__filePath
 
-    @lockutils.synchronized("tokenutils.serialize-lock", external=True)
+    @synchronized("tokenutils.serialize-lock", external=True)
     def serialize(self):
         try:
             with open(self.__filePath, "wb") as outfile:
@@ -117,7 +121,7 @@ class TokenUtilsBase:
             pass
         return False
 
-    @lockutils.synchronized("tokenutils.transaction-lock", external=True)
+    @synchronized("tokenutils.transaction-lock", external=True)
     def remove(self, tokenId):
         self.serialize()
         try:
@@ -202,7 +206,7 @@ class JwtTokenUtils(TokenUtilsBase):
         #
         # self.__inputToken = self._reqObj.getValue('authorization').split()[1]
         #
-        serviceKey = self._cI.get("SITE_SERVICE_REGISTRATION_KEY", None)
+        serviceKey = ServiceConfigCache.get(self._siteId, "SITE_SERVICE_REGISTRATION_KEY", None)
         self.__serviceKey = serviceKey or "secretvalue"
         self.__tokenErrorCode = 401
 
@@ -304,8 +308,8 @@ class JwtTokenReader:
         Limited set of token methods required to read and validate a JWT tokens.
 
         """
-        self._cI = ConfigInfo(siteId)
-        serviceKey = self._cI.get("SITE_SERVICE_REGISTRATION_KEY", default=None)
+        self._cI = ServiceConfigCache.getConfigInfo(siteId)
+        serviceKey = ServiceConfigCache.get(siteId, "SITE_SERVICE_REGISTRATION_KEY", default=None)
         self.__serviceKey = serviceKey or "secretvalue"
         self.__tokenErrorCode = 401
 